@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Load-generation benchmarks against the local stand-in server.
+
+Runs single, chunked, batched, pooled and async workloads and reports
+latency percentiles and throughput for each:
+
+    python benchmarks/bench.py --requests 200 --latency 0.005
+'''
+
+from randompy import AsyncRandomPy, RandomPool, RandomPy
+from randompy.standin import StandInServer
+import argparse
+import asyncio
+import time
+
+
+MODES = ('single', 'chunked', 'batched', 'pooled', 'async')
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def timed(func, count):
+    '''Call func count times; returns the latency of every call.'''
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_single(rand, args):
+    return timed(lambda: rand.integers(args.n, min=1, max=100),
+                 args.requests), args.n
+
+
+def bench_chunked(rand, args):
+    n = args.n * 25
+    return timed(lambda: rand.integers(n, min=1, max=100),
+                 max(1, args.requests // 10)), n
+
+
+def bench_batched(rand, args):
+    def run():
+        with rand.batch() as batch:
+            for _ in range(args.batch):
+                batch.integers(args.n, min=1, max=100)
+    return timed(run, max(1, args.requests // args.batch)), \
+        args.n * args.batch
+
+
+def bench_pooled(rand, args):
+    with RandomPool(rand, 'integers', capacity=args.n * 10, min=1,
+                    max=100) as pool:
+        return timed(lambda: pool.take(args.n), args.requests), args.n
+
+
+def bench_async(rand, args):
+    async def run():
+        async with AsyncRandomPy(key=rand.key, signed=rand.signed,
+                                 verify=rand.verify,
+                                 url=rand.api.url) as arand:
+            arand.public_key = rand.public_key
+            sem = asyncio.Semaphore(args.concurrency)
+            latencies = []
+
+            async def one():
+                async with sem:
+                    start = time.perf_counter()
+                    await arand.integers(args.n, min=1, max=100)
+                    latencies.append(time.perf_counter() - start)
+
+            await asyncio.gather(*(one() for _ in range(args.requests)))
+            return latencies
+    return asyncio.run(run()), args.n
+
+
+BENCHES = {
+    'single': bench_single,
+    'chunked': bench_chunked,
+    'batched': bench_batched,
+    'pooled': bench_pooled,
+    'async': bench_async,
+}
+
+
+def report(mode, latencies, values, elapsed):
+    ms = [x * 1000 for x in latencies]
+    print('{:8} {:6d} {:9.2f} {:9.2f} {:9.2f} {:10.1f} {:12.0f}'.format(
+          mode, len(ms), percentile(ms, 50), percentile(ms, 90),
+          percentile(ms, 99), len(ms) / elapsed,
+          len(ms) * values / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modes', nargs='*', metavar='mode',
+                        help='one of {} (default: all)'.format(
+                            ', '.join(MODES)))
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--n', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--unsigned', action='store_true')
+    parser.add_argument('--verify', choices=('remote', 'local'),
+                        default='local')
+    args = parser.parse_args()
+    for mode in args.modes:
+        if mode not in MODES:
+            parser.error('unknown mode: {}'.format(mode))
+
+    with StandInServer(latency=args.latency, error_rate=args.error_rate,
+                       requests=10 ** 9, bits=10 ** 12) as server:
+        rand = RandomPy(key='bench', signed=not args.unsigned,
+                        verify=args.verify, url=server.url)
+        rand.public_key = server.public_key
+
+        print('{:8} {:>6} {:>9} {:>9} {:>9} {:>10} {:>12}'.format(
+              'mode', 'calls', 'p50 ms', 'p90 ms', 'p99 ms', 'calls/s',
+              'values/s'))
+        for mode in args.modes or MODES:
+            start = time.perf_counter()
+            latencies, values = BENCHES[mode](rand, args)
+            report(mode, latencies, values, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,41 @@
 
 from .randompy import RandomPy
 from .api import RandomAPI
+from .cache import ResponseCache
+from .keys import KeyPool
+from .metrics import Metrics
+from .pool import PoolEmpty, RandomPool
+from .scheduler import QuotaExceeded, Scheduler
 
 
 __version__ = '1.1.2'
 
 
+# Imported on first access, so that plain sync use does not load asyncio
+LAZY = {
+    'AsyncRandomAPI': 'aio',
+    'AsyncRandomPy': 'aio',
+}
+
+
+def __getattr__(name):
+    if name in LAZY:
+        from importlib import import_module
+        return getattr(import_module('.' + LAZY[name], __name__), name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(
+                         __name__, name))
+
+
 __all__ = [
     'RandomPy',
     'RandomAPI',
+    'AsyncRandomPy',
+    'AsyncRandomAPI',
+    'RandomPool',
+    'PoolEmpty',
+    'Scheduler',
+    'QuotaExceeded',
+    'KeyPool',
+    'ResponseCache',
+    'Metrics',
 ]
@@ -2,12 +2,14 @@
 # -*- coding: utf-8 -*-
 
 from . import __version__
-from .randompy import RandomPy
 from io import StringIO
-import argparse
 import sys
 
 
+# Arguments of the bulk export, not passed on to generate
+EXPORT_ARGS = ('out', 'out_format', 'workers', 'chunk_size', 'quiet')
+
+
 def cli_error(resp):
     error = resp['error']
     msg = StringIO()
@@ -32,8 +34,43 @@ def cli_success(resp):
     return output
 
 
-def main():
-    '''Console script entrypoint.'''
+def cli_export(args, kwargs):
+    from .export import export, print_progress
+    from .randompy import RandomPy
+
+    # Fill in the config defaults, so a resumed export sees the same job.
+    params = RandomPy(signed=args.signed)._prepare(**kwargs)
+    method, n = params.pop('method'), params.pop('number')
+    params.pop('signed')
+    try:
+        export(args.out, method, n, format=args.out_format,
+               chunk_size=args.chunk_size, workers=args.workers,
+               client={'signed': args.signed},
+               progress=None if args.quiet else print_progress, **params)
+    except Exception as e:
+        print('Export failed: {}'.format(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+def cli_audit(args):
+    from .audit import audit, print_report
+    from .signature import load_public_key
+
+    key = load_public_key(args.public_key) if args.public_key else None
+    try:
+        report = audit(args.log, public_key=key, workers=args.workers)
+    except Exception as e:
+        print('Audit failed: {}'.format(e), file=sys.stderr)
+        return 1
+    print_report(report)
+    return 1 if report['failed'] or report['gaps'] else 0
+
+
+def build_parser():
+    '''Build the argument parser; returns it with its subparsers.'''
+    import argparse
+
     parser = argparse.ArgumentParser(description='Get random numbers!')
     subparsers = parser.add_subparsers()
 
@@ -44,6 +81,7 @@ def main():
     parser_str = subparsers.add_parser('strings')
     parser_uui = subparsers.add_parser('uuids')
     parser_blo = subparsers.add_parser('blobs')
+    parser_aud = subparsers.add_parser('audit')
 
     parser.add_argument('--version', action='version', version='randompy {}'
                         .format(__version__))
@@ -52,6 +90,19 @@ def main():
     parser.add_argument('-n', '--number', help='number of randoms to generate',
                         type=int, default=1)
 
+    # Add bulk export arguments
+    parser.add_argument('-o', '--out', metavar='FILE',
+                        help='export to FILE in chunks (resumable)')
+    parser.add_argument('--format', dest='out_format', default='ndjson',
+                        choices=('ndjson', 'csv', 'binary'),
+                        help='export file format')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='number of export and audit workers')
+    parser.add_argument('--chunk-size', type=int, metavar='N',
+                        help='values per request when exporting')
+    parser.add_argument('-q', '--quiet', action='store_true', default=False,
+                        help='do not show export progress')
+
     # Add integer arguments
     parser_int.add_argument('-m', '--min', type=int, action='store',
                             help='minimum of random numbers (-1e9-1e9)')
@@ -101,12 +152,35 @@ def main():
                             return format')
     parser_blo.set_defaults(method='blobs')
 
+    # Add audit arguments
+    parser_aud.add_argument('log', metavar='LOG',
+                            help='audit log to verify (with its rotations)')
+    parser_aud.add_argument('-k', '--public-key', metavar='FILE',
+                            help='verify locally against this random.org '
+                                 'public key (PEM or DER)')
+    parser_aud.set_defaults(command='audit')
+
+    return parser, subparsers
+
+
+def main():
+    '''Console script entrypoint.'''
+    parser, subparsers = build_parser()
     args = parser.parse_args()
 
     # If subparser was not supplied, print help; else call main
     if any(k in sys.argv for k in subparsers.choices.keys()):
-        r = RandomPy(args.signed)
-        kwargs = {k: v for k, v in vars(args).items() if v is not None}
+        if getattr(args, 'command', None) == 'audit':
+            sys.exit(cli_audit(args))
+
+        kwargs = {k: v for k, v in vars(args).items()
+                  if v is not None and k not in EXPORT_ARGS}
+        if args.out is not None:
+            sys.exit(cli_export(args, kwargs))
+
+        from .randompy import RandomPy
+
+        r = RandomPy(signed=args.signed)
         o = r.generate(errorfunc=cli_error, successfunc=cli_success, **kwargs)
         print(o)
         sys.exit()
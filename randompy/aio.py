@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .api import RETRY_STATUSES, RandomAPI
+from .chunking import merge, split, truthy
+from .randompy import (FALLBACK_ERRORS, RandomPy, _entropy_bytes,
+                       _entropy_kwargs)
+from .scheduler import QuotaExceeded
+from .specs import MAX_BLOB_BYTES, MAX_N
+from .stream import ChunkFetcher
+from .transforms import Entropy
+from collections import deque
+from functools import partial
+import asyncio
+
+
+# aiohttp timeouts are no OSErrors before Python 3.11
+ASYNC_FALLBACK_ERRORS = FALLBACK_ERRORS + (asyncio.TimeoutError,)
+
+
+def _aiohttp():
+    # aiohttp is optional and slow to import; load it on first use.
+    try:
+        import aiohttp
+    except ImportError:
+        return None
+    return aiohttp
+
+
+async def gather(*aws, limit=10):
+    '''Await all awaitables with at most limit running at the same time.
+
+    Results are returned in the order of the arguments.
+    '''
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(bounded(aw) for aw in aws))
+
+
+class AsyncStream:
+    '''Async iterator twin of randompy.stream.stream.'''
+
+    def __init__(self, rand, method, chunk_size=None, prefetch=False,
+                 **params):
+        self.fetcher = ChunkFetcher(rand, method, chunk_size, **params)
+        self.prefetch = prefetch
+        self.buffer = deque()
+        self.task = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.buffer:
+            data = await self._next_chunk()
+            if data is None:
+                raise StopAsyncIteration
+            self.buffer.extend(data)
+        return self.buffer.popleft()
+
+    async def aclose(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _next_chunk(self):
+        if self.task is not None:
+            data = await self.task
+        else:
+            data = await self._fetch()
+        self.task = None
+        if data is not None and self.prefetch:
+            self.task = asyncio.ensure_future(self._fetch())
+        return data
+
+    async def _fetch(self):
+        fetcher = self.fetcher
+        if fetcher.exhausted:
+            return None
+        await asyncio.sleep(fetcher.wait_time())
+        return fetcher.update(await fetcher.rand.generate(**fetcher.kwargs()))
+
+
+class AsyncRandomAPI(RandomAPI):
+    '''RandomAPI twin whose calls are coroutines.
+
+    Uses aiohttp when it is installed; otherwise the shared blocking session
+    is run in the default executor.
+    '''
+
+    def __init__(self, url, pool_size=10, timeout=10.0, retries=3,
+                 backoff=0.5, keep_alive=True, scheduler=None,
+                 serializer='auto', cache=None, metrics=None,
+                 retry_statuses=RETRY_STATUSES):
+        super().__init__(url, pool_size=pool_size, timeout=timeout,
+                         retries=retries, backoff=backoff,
+                         keep_alive=keep_alive, scheduler=scheduler,
+                         serializer=serializer, cache=cache, metrics=metrics,
+                         retry_statuses=retry_statuses)
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.keep_alive = keep_alive
+        self.client = None
+
+    async def call(self, req):
+        with self._time('validate', req):
+            self.check(req)
+        if self.cache is not None:
+            resp = self.cache.get(req)
+            if resp is not None:
+                return resp
+
+        if self.scheduler is not None:
+            await asyncio.sleep(self.scheduler.reserve(req))
+        resp = await self._post(req)
+        self._record(req, resp)
+        return resp
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    async def _post(self, req):
+        aiohttp = _aiohttp()
+        if aiohttp is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, RandomAPI._post, self,
+                                              req)
+
+        if self.client is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size,
+                                             force_close=not self.keep_alive)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self.client = aiohttp.ClientSession(connector=connector,
+                                                timeout=timeout)
+
+        # Like the blocking session, retry failed connections and the
+        # retry_statuses, but not requests that may have been served.
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                with self._time('http', req):
+                    data = self.serializer.dumps(req)
+                    async with self.client.post(self.url, data=data,
+                                                headers=self.headers) as resp:
+                        status = resp.status
+                        body = await resp.read()
+            except aiohttp.ClientConnectorError:
+                if last:
+                    raise
+            else:
+                if last or status not in self.retry_statuses:
+                    with self._time('decode', req):
+                        return self._parse(body)
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+
+class AsyncRandomPy(RandomPy):
+    '''RandomPy twin whose generating methods are coroutines.'''
+
+    api_class = AsyncRandomAPI
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._slots = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        self._shutdown()
+        await self.api.close()
+
+    def stream(self, method, chunk_size=None, prefetch=False, **kwargs):
+        return AsyncStream(self, method, chunk_size, prefetch, **kwargs)
+
+    def batch(self):
+        raise TypeError('Batches are not supported by AsyncRandomPy; run '
+                        'the calls concurrently with asyncio.gather instead')
+
+    async def entropy(self, nbytes=MAX_BLOB_BYTES * 8, numpy=None):
+        '''Fetch nbytes of raw entropy as blobs; returns an Entropy.
+
+        Unlike RandomPy.entropy, the Entropy does not refill itself; await
+        entropy() again for more bytes.
+        '''
+        result = await self.blobs(**_entropy_kwargs(nbytes))
+        return Entropy(_entropy_bytes(result), numpy=numpy)
+
+    async def submit(self, method, n, **kwargs):
+        '''Generate n values in a task; returns the task.
+
+        Waits while in_flight calls are already running.
+        '''
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.in_flight)
+        slots = self._slots
+        await slots.acquire()
+        task = asyncio.ensure_future(self.generate(number=n, method=method,
+                                                   **kwargs))
+        task.add_done_callback(lambda task: slots.release())
+        return task
+
+    async def map(self, method, ns, **kwargs):
+        '''Generate n values for every n in ns in concurrent tasks.
+
+        An async generator: results are yielded in order, with at most
+        in_flight calls running or waiting to be yielded at any time.
+        '''
+        pending = deque()
+        try:
+            for n in ns:
+                if len(pending) >= self.in_flight:
+                    yield await pending.popleft()
+                pending.append(await self.submit(method, n, **kwargs))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate(self, **kwargs):
+        kwargs = self._prepare(**kwargs)
+
+        if self.engine.serves(kwargs['method']):
+            if self.engine.needs_seed():
+                await self._reseed(self.engine)
+            # Engines may block (the reservoir waits for its filler), so
+            # they run in a worker thread instead of the event loop.
+            resp = await asyncio.get_running_loop().run_in_executor(
+                None, partial(self._generate_engine, **kwargs))
+        else:
+            try:
+                resp = await self._generate_remote(**kwargs)
+            except ASYNC_FALLBACK_ERRORS:
+                if not self._falls_back(kwargs):
+                    raise
+                resp = None
+            resp = self._remote_result(resp, **kwargs)
+
+        return self._finish(resp, **kwargs)
+
+    async def _generate_remote(self, **kwargs):
+        limit = MAX_N.get(kwargs['method'])
+        if limit is not None and kwargs['number'] > limit:
+            return await self._generate_chunked(limit, **kwargs)
+        return await self._fetch(**kwargs)
+
+    async def _reseed(self, engine):
+        try:
+            resp = await self._generate_remote(**self._prepare(
+                                               **engine.seed_kwargs()))
+        except ASYNC_FALLBACK_ERRORS:
+            resp = None
+        engine.reseed(self._seed_result(resp))
+
+    async def _fetch(self, **kwargs):
+        return await self._verified(kwargs, await self._request(**kwargs))
+
+    async def _request(self, **kwargs):
+        method = kwargs['method']
+        refused = []
+        for attempt in range(self._attempts()):
+            with self._time('build', method):
+                rID, req = self._build_request(exclude=refused, **kwargs)
+            try:
+                resp = await self.api.call(req)
+            except QuotaExceeded:
+                if not self._refused_key(req, refused, attempt):
+                    raise
+                continue
+            self._check_id(rID, resp)
+            if not self._record_key(req, resp):
+                break
+        return resp
+
+    async def _verified(self, kwargs, resp):
+        if self._signed_result(kwargs, resp) and not self._audited(resp):
+            with self._time('verify', kwargs['method']):
+                authentic = await self._verify_response(resp)
+            if not authentic:
+                raise Exception('Response could not be verified!')
+        return resp
+
+    async def _generate_chunked(self, limit, **kwargs):
+        if 'replacement' in kwargs and not truthy(kwargs['replacement']):
+            return await self._generate_unique(limit, **kwargs)
+
+        sizes = split(kwargs['number'], limit)
+        resps = await gather(*(self._fetch(**dict(kwargs, number=size))
+                               for size in sizes), limit=self.workers)
+
+        errors = [r for r in resps if 'error' in r]
+        return errors[0] if errors else merge(resps)
+
+    async def _generate_unique(self, limit, **kwargs):
+        sample = self._unique_sample(limit, **kwargs)
+        pending = []
+        try:
+            while not sample.done:
+                chunk = sample.chunk_kwargs(kwargs, sample.next_size())
+                if self.pipeline:
+                    resp = await self._request(**chunk)
+                    pending.append(asyncio.ensure_future(
+                        self._verified(chunk, resp)))
+                else:
+                    resp = await self._fetch(**chunk)
+                if 'error' in resp:
+                    return resp
+                sample.add(resp)
+            await asyncio.gather(*pending)
+        finally:
+            for task in pending:
+                task.cancel()
+        return sample.result()
+
+    async def _verify_response(self, resp):
+        local = self._verify_locally(resp)
+        if local is not None:
+            return local
+        rID, req = self._verify_request(resp)
+        ver_resp = await self.api.call(req)
+        return self._authentic(ver_resp)
@@ -1,43 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from requests import post
-
-
-# Value constraints
-CONSTRAINTS = {
-    'integers': {
-        'n': lambda x: x >= 1 and x <= 1e4,
-        'min': lambda x: x >= -1e9 and x <= 1e9,
-        'max': lambda x: x >= -1e9 and x <= 1e9,
-        'base': lambda x: x in [2, 8, 10, 12],
-    },
-    'decimals': {
-        'n': lambda x: x >= 1 and x <= 1e4,
-        'decimalPlaces': lambda x: x >= 1 and x <= 20,
-    },
-    'gaussians': {
-        'n': lambda x: x >= 1 and x <= 1e4,
-        'mean': lambda x: x >= -1e6 and x <= 1e6,
-        'standardDeviation': lambda x: x >= -1e6 and x <= 1e6,
-        'significantDigits': lambda x: x >= 2 and x <= 20,
-    },
-    'strings': {
-        'n': lambda x: x >= 1 and x <= 1e4,
-        'length': lambda x: x >= 1 and x <= 20,
-        'characters': lambda x: len(x) >= 1 and len(x) <= 80,
-    },
-    'uuids': {
-        'n': lambda x: x >= 1 and x <= 1e3,
-    },
-    'blobs': {
-        'n': lambda x: x >= 1 and x <= 100,
-        'size': lambda x: x >= 1 and x <= 1048576 and x % 8 == 0,
-        'format': lambda x: x in BLOB_FORMATS,
-    },
-    'verify': {
-    },
-}
+from .metrics import NULL
+from .serializers import Response, get_serializer
+from .specs import SPECS
+from threading import Lock
 
 
 ALIAS = {
@@ -57,32 +24,148 @@ ALIAS = {
 }
 
 
-BLOB_FORMATS = [
-    'base64',
-    'hex',
-]
+# Parameter specs per API method name
+METHOD_SPECS = {method: SPECS[alias] for method, alias in ALIAS.items()}
+
+
+# HTTP statuses retried by default. A 503 means that the request was not
+# served, so retrying it does not spend quota twice; a 502 or 504 may come
+# after the API has already served it.
+RETRY_STATUSES = (503,)
+
+
+# Shared HTTP sessions, keyed by URL and connection pool settings
+_sessions = {}
+_sessions_lock = Lock()
+
+
+def get_session(url, pool_size=10, retries=3, backoff=0.5,
+                retry_statuses=RETRY_STATUSES):
+    '''Return the long-lived session shared by all clients of url.'''
+    retry_statuses = tuple(retry_statuses)
+    key = (url, pool_size, retries, backoff, retry_statuses)
+    with _sessions_lock:
+        if key not in _sessions:
+            # requests is slow to import; only load it once it is needed
+            from requests import Session
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(total=retries, read=0, backoff_factor=backoff,
+                          status_forcelist=retry_statuses,
+                          allowed_methods=frozenset(['POST']),
+                          raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                  max_retries=retry)
+            session = Session()
+            session.mount(url, adapter)
+            _sessions[key] = session
+        return _sessions[key]
 
 
 class RandomAPI:
 
-    def __init__(self, url):
+    def __init__(self, url, pool_size=10, timeout=10.0, retries=3,
+                 backoff=0.5, keep_alive=True, scheduler=None,
+                 serializer='auto', cache=None, metrics=None,
+                 retry_statuses=RETRY_STATUSES):
         self.url = url
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.cache = cache
+        self.metrics = metrics
+        if isinstance(serializer, str):
+            serializer = get_serializer(serializer)
+        self.serializer = serializer
         self.headers = {'Content-Type': 'application/json'}
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self.retry_statuses = tuple(retry_statuses)
+        self.pool = (pool_size, retries, backoff, self.retry_statuses)
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = get_session(self.url, *self.pool)
+        return self._session
 
     def call(self, req):
-        v = self.valid(req)
-        if not v[1]:
-            raise Exception('Argument constraints violated: {}'.format(
-                            ', '.join(k for k in v[0] if v[0][k] is False)))
-        else:
-            return self._post(req)
+        with self._time('validate', req):
+            self.check(req)
+        if self.cache is not None:
+            resp = self.cache.get(req)
+            if resp is not None:
+                return resp
+
+        if self.scheduler is not None:
+            self.scheduler.acquire(req)
+        resp = self._post(req)
+        self._record(req, resp)
+        return resp
+
+    def call_batch(self, reqs):
+        with self._time('validate', reqs):
+            for req in reqs:
+                self.check(req)
+
+        cached = []
+        if self.cache is not None:
+            hits = [(req, self.cache.get(req)) for req in reqs]
+            cached = [resp for _, resp in hits if resp is not None]
+            reqs = [req for req, resp in hits if resp is None]
+            if not reqs:
+                return cached
+
+        if self.scheduler is not None:
+            for req in reqs:
+                self.scheduler.acquire(req)
+
+        resps = self._post(reqs)
+        if isinstance(resps, dict):
+            raise Exception('Batch request failed: {}'.format(
+                            resps.get('error')))
+
+        if (self.scheduler is not None or self.cache is not None or
+                self.metrics is not None):
+            by_id = {req['id']: req for req in reqs}
+            for resp in resps:
+                if resp.get('id') in by_id:
+                    self._record(by_id[resp['id']], resp)
+        return cached + resps
+
+    def _record(self, req, resp):
+        # Feed a response to the scheduler, the cache and the metrics.
+        if self.metrics is not None:
+            self.metrics.record(ALIAS.get(req['method'], req['method']), resp)
+        if self.scheduler is not None:
+            self.scheduler.update(req, resp)
+        if self.cache is not None:
+            self.cache.put(req, resp)
+
+    def check(self, req):
+        METHOD_SPECS[req['method']].check(req['params'])
 
     def valid(self, req):
-        alias = ALIAS[req['method']]
-        funcs = CONSTRAINTS[alias]
-        params = req['params']
-        results = {k: funcs[k](params[k]) for k in params if k in funcs}
+        results = METHOD_SPECS[req['method']].results(req['params'])
         return results, all(results.values())
 
+    def _time(self, stage, req):
+        # Timer for one stage of req (a request or a batch of requests).
+        if self.metrics is None:
+            return NULL
+        method = ALIAS.get(req['method']) if isinstance(req, dict) else None
+        return self.metrics.time(stage, method or 'batch')
+
     def _post(self, req):
-        return post(self.url, json=req, headers=self.headers).json()
+        with self._time('http', req):
+            data = self.serializer.dumps(req)
+            body = self.session.post(self.url, data=data,
+                                     headers=self.headers,
+                                     timeout=self.timeout).content
+        with self._time('decode', req):
+            return self._parse(body)
+
+    def _parse(self, body):
+        resp = self.serializer.loads(body)
+        return Response(resp, body) if isinstance(resp, dict) else resp
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Audit log of signed results and its batch re-verification.
+
+Every signed result is appended with its signature, serial number and the
+time it was logged, so its provenance can be proven later without verifying
+inline. Logs are NDJSON or length-prefixed binary and rotate at max_bytes:
+the current file is renamed to ``path.1``, ``path.2``, ... in order, and
+no rotated file is ever renamed or removed again.
+
+The random object is kept byte for byte as random.org signed it.
+'''
+
+from .serializers import RawJSON, raw_member, raw_random
+from .signature import serialize, verify
+from base64 import b64decode, b64encode
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from threading import Lock
+import glob
+import json
+import os
+import struct
+import time
+
+
+# Log formats
+FORMATS = ('ndjson', 'binary')
+
+
+# Binary logs: file magic, then per record the length of the random object,
+# the length of the signature, the serial number (-1 if unknown) and the time
+# it was logged, followed by the random object and the raw signature
+MAGIC = b'RPYAUD01'
+RECORD = struct.Struct('>IHqd')
+
+
+# Entries handed to the verifiers at a time, per worker
+WINDOW = 256
+
+
+def _ndjson(raw, signature, serial, logged):
+    head = {'serialNumber': serial, 'logged': logged,
+            'signature': signature}
+    if b'\n' in raw:
+        # Keep the line intact; the bytes are stored as a string instead.
+        head['randomText'] = raw.decode('utf-8')
+        return json.dumps(head).encode('utf-8') + b'\n'
+    return (json.dumps(head)[:-1].encode('utf-8') + b', "random": ' + raw +
+            b'}\n')
+
+
+def _binary(raw, signature, serial, logged):
+    sig = b64decode(signature)
+    return RECORD.pack(len(raw), len(sig), -1 if serial is None else serial,
+                       logged) + raw + sig
+
+
+ENCODERS = {
+    'ndjson': _ndjson,
+    'binary': _binary,
+}
+
+
+class AuditLog:
+    '''Appends signed results to a rotating log file.'''
+
+    _shared = {}
+    _shared_lock = Lock()
+
+    def __init__(self, path, format='ndjson', max_bytes=64 << 20):
+        if format not in FORMATS:
+            raise Exception('Unknown audit log format: {}'.format(format))
+        self.path = os.path.expanduser(path)
+        self.format = format
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self.file = None
+
+    @classmethod
+    def shared(cls, path, format='ndjson', max_bytes=64 << 20):
+        '''Process-wide log per path, so clients do not interleave writes.'''
+        path = os.path.expanduser(path)
+        with cls._shared_lock:
+            if path not in cls._shared:
+                cls._shared[path] = cls(path, format, max_bytes)
+            return cls._shared[path]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def record(self, resp):
+        '''Append the signed result of resp.'''
+        result = resp['result']
+        raw = raw_random(resp)
+        if raw is None:
+            raw = serialize(result['random'])
+        serial = result['random'].get('serialNumber')
+        entry = ENCODERS[self.format](raw, result['signature'], serial,
+                                      time.time())
+        with self.lock:
+            if self.file is None:
+                self._open()
+            if self.file.tell() + len(entry) > self.max_bytes and \
+                    self.file.tell() > len(MAGIC):
+                self._rotate()
+            self.file.write(entry)
+            self.file.flush()
+
+    def _open(self):
+        self.file = open(self.path, 'ab')
+        if self.format == 'binary' and self.file.tell() == 0:
+            self.file.write(MAGIC)
+
+    def _rotate(self):
+        self.file.close()
+        os.rename(self.path, '{}.{}'.format(self.path,
+                                            len(log_files(self.path))))
+        self._open()
+
+
+def log_files(path):
+    '''Files of the log at path, oldest first.'''
+    path = os.path.expanduser(path)
+    rotated = []
+    for name in glob.glob(glob.escape(path) + '.*'):
+        suffix = name[len(path) + 1:]
+        if suffix.isdigit():
+            rotated.append((int(suffix), name))
+    files = [name for _, name in sorted(rotated)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def _read_ndjson(f):
+    for line in f:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if 'randomText' in entry:
+            raw = entry['randomText'].encode('utf-8')
+        else:
+            raw = raw_member(line, 'random')
+        yield raw, entry['signature']
+
+
+def _read_binary(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise Exception('Not a binary audit log: {}'.format(f.name))
+    while True:
+        head = f.read(RECORD.size)
+        if not head:
+            return
+        if len(head) < RECORD.size:
+            raise Exception('Truncated audit log: {}'.format(f.name))
+        size, sig_size, _, _ = RECORD.unpack(head)
+        body = f.read(size + sig_size)
+        if len(body) < size + sig_size:
+            raise Exception('Truncated audit log: {}'.format(f.name))
+        yield body[:size], b64encode(body[size:]).decode('ascii')
+
+
+def entries(path):
+    '''(random object bytes, signature) of every entry, oldest first.'''
+    for name in log_files(path):
+        with open(name, 'rb') as f:
+            binary = f.read(len(MAGIC)) == MAGIC
+            f.seek(0)
+            yield from (_read_binary if binary else _read_ndjson)(f)
+
+
+# Public key of a verifying worker process
+_key = None
+
+
+def _init_worker(key):
+    global _key
+    _key = key
+
+
+def _check_local(entry):
+    raw, signature = entry
+    random = json.loads(raw)
+    return (random.get('hashedApiKey'), random.get('serialNumber'),
+            verify(raw, signature, _key))
+
+
+def _remote_checker(rand):
+    def check(entry):
+        raw, signature = entry
+        random = json.loads(raw)
+        authentic = rand.generate(
+            method='verify', random=RawJSON(raw), signature=signature,
+            errorfunc=lambda resp: False,
+            successfunc=lambda resp: resp['result']['authenticity'])
+        return (random.get('hashedApiKey'), random.get('serialNumber'),
+                authentic)
+    return check
+
+
+def gaps(serials):
+    '''Missing (first, last) ranges and duplicates in serial numbers.'''
+    missing, duplicates = [], []
+    ordered = sorted(serials)
+    for a, b in zip(ordered, ordered[1:]):
+        if b == a:
+            duplicates.append(a)
+        elif b > a + 1:
+            missing.append((a + 1, b - 1))
+    return missing, duplicates
+
+
+def audit(path, public_key=None, workers=4, client=None):
+    '''Re-verify every entry of the log at path; returns a report.
+
+    With a public key, signatures are checked locally by worker processes;
+    otherwise by worker threads that ask random.org (client holds the
+    RandomPy arguments). Serial numbers are checked for gaps per API key.
+    '''
+    if public_key is not None:
+        # multiprocessing is slow to import; only load it for an audit
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=_init_worker,
+                                       initargs=(public_key,))
+        check = _check_local
+    else:
+        from .randompy import RandomPy
+        executor = ThreadPoolExecutor(max_workers=workers)
+        check = _remote_checker(RandomPy(**dict(client or {}, signed=False)))
+
+    start = time.monotonic()
+    serials = defaultdict(list)
+    failed = []
+    count = 0
+    todo = entries(path)
+    with executor:
+        while True:
+            window = list(islice(todo, WINDOW * workers))
+            if not window:
+                break
+            for key, serial, ok in executor.map(check, window,
+                                                chunksize=WINDOW // 4):
+                count += 1
+                if serial is not None:
+                    serials[key].append(serial)
+                if not ok:
+                    failed.append((key, serial))
+    seconds = time.monotonic() - start
+
+    report = {'entries': count, 'failed': failed, 'gaps': [],
+              'duplicates': [], 'seconds': seconds,
+              'rate': count / seconds if seconds else 0.0}
+    for key in sorted(serials, key=str):
+        missing, duplicates = gaps(serials[key])
+        report['gaps'].extend((key, a, b) for a, b in missing)
+        report['duplicates'].extend((key, s) for s in duplicates)
+    return report
+
+
+def print_report(report, file=None):
+    '''Print an audit report in a human readable form.'''
+    def out(line):
+        print(line, file=file)
+
+    out('Entries: {}'.format(report['entries']))
+    out('Failed: {}'.format(len(report['failed'])))
+    for key, serial in report['failed']:
+        out('  serial {} (key {})'.format(serial, key))
+    out('Gaps: {}'.format(len(report['gaps'])))
+    for key, first, last in report['gaps']:
+        out('  serials {}..{} missing (key {})'.format(first, last, key))
+    out('Duplicates: {}'.format(len(report['duplicates'])))
+    for key, serial in report['duplicates']:
+        out('  serial {} (key {})'.format(serial, key))
+    out('Throughput: {:.1f} entries/s ({:.2f} s)'.format(report['rate'],
+                                                         report['seconds']))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .ids import Registry
+from concurrent.futures import Future
+
+
+class Batch:
+    '''Queue of generate calls sent as a single JSON-RPC batch.
+
+    Every queued call returns a Future that resolves to the output of its
+    errorfunc/successfunc once the batch is sent, either explicitly with
+    ``send`` or on leaving the ``with`` block. Signed responses are verified
+    with one follow-up batch of verifySignature calls.
+    '''
+
+    def __init__(self, rand):
+        self.rand = rand
+        self.entries = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.send()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def integers(self, n, **kwargs):
+        return self.generate(number=n, method='integers', **kwargs)
+
+    def decimals(self, n, **kwargs):
+        return self.generate(number=n, method='decimals', **kwargs)
+
+    def gaussians(self, n, **kwargs):
+        return self.generate(number=n, method='gaussians', **kwargs)
+
+    def strings(self, n, **kwargs):
+        return self.generate(number=n, method='strings', **kwargs)
+
+    def uuids(self, n, **kwargs):
+        return self.generate(number=n, method='uuids', **kwargs)
+
+    def blobs(self, n, **kwargs):
+        return self.generate(number=n, method='blobs', **kwargs)
+
+    def generate(self, **kwargs):
+        kwargs = self.rand._prepare(**kwargs)
+        rID, req = self.rand._build_request(**kwargs)
+        self.rand.api.check(req)
+
+        future = Future()
+        self.entries[rID] = (req, kwargs, future)
+        return future
+
+    def send(self):
+        '''Send all queued calls; returns their futures in queue order.'''
+        entries, self.entries = self.entries, {}
+        if not entries:
+            return []
+
+        try:
+            resps = self._call(req for req, _, _ in entries.values())
+            if self.rand.signed:
+                verified = self._verify(resps)
+        except Exception as e:
+            for _, _, future in entries.values():
+                future.set_exception(e)
+            raise
+
+        for rID, (req, kwargs, future) in entries.items():
+            try:
+                resp = resps[rID].result()
+                self.rand._record_key(req, resp)
+                if self.rand.signed and not verified.get(rID, True):
+                    raise Exception('Response could not be verified!')
+                future.set_result(self.rand._finish(resp, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+        return [future for _, _, future in entries.values()]
+
+    def _call(self, reqs):
+        # Map request IDs to futures holding their (raw) responses.
+        reqs = list(reqs)
+        registry = Registry()
+        futures = {req['id']: registry.register(req['id']) for req in reqs}
+        registry.dispatch(self.rand.api.call_batch(reqs))
+        registry.fail_all(Exception('No response for request!'))
+        return futures
+
+    def _verify(self, resps):
+        # Map request IDs to their authenticity; local checks first, the
+        # rest in a single verifySignature batch.
+        verified = {}
+        pending = {}
+        for rID, future in resps.items():
+            if future.exception() is not None:
+                continue
+            resp = future.result()
+            if 'error' in resp:
+                continue
+            if self.rand._audited(resp):
+                verified[rID] = True
+                continue
+            local = self.rand._verify_locally(resp)
+            if local is not None:
+                verified[rID] = local
+                continue
+            vID, req = self.rand._verify_request(resp)
+            pending[vID] = (rID, req)
+
+        if pending:
+            ver_resps = self._call(req for _, req in pending.values())
+            for vID, (rID, _) in pending.items():
+                future = ver_resps[vID]
+                verified[rID] = (future.exception() is None and
+                                 self.rand._authentic(future.result()))
+
+        return verified
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .serializers import RawJSON
+from collections import OrderedDict
+from threading import Lock
+import json
+import os
+import sqlite3
+import time
+
+
+# Methods whose responses only depend on their parameters. Generation
+# methods must never be cached.
+CACHEABLE = frozenset(['verifySignature'])
+
+
+def _canonical(obj):
+    if isinstance(obj, RawJSON):
+        return json.loads(obj.raw.decode('utf-8'))
+    if isinstance(obj, dict):
+        return {k: _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_canonical(v) for v in obj]
+    return obj
+
+
+def cache_key(req):
+    '''Canonical form of a request's method and params (without its id).'''
+    return json.dumps([req['method'], _canonical(req['params'])],
+                      sort_keys=True, separators=(',', ':'))
+
+
+class ResponseCache:
+    '''LRU/TTL cache of responses to deterministic requests.
+
+    Keeps up to maxsize responses in memory for ttl seconds (forever if ttl
+    is None). With a path, responses are also stored in an SQLite database
+    so they survive restarts.
+    '''
+
+    def __init__(self, maxsize=1024, ttl=None, path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(os.path.expanduser(path),
+                                      check_same_thread=False)
+            self.db.execute('CREATE TABLE IF NOT EXISTS responses '
+                            '(key TEXT PRIMARY KEY, expires REAL, '
+                            'resp TEXT)')
+            self.db.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def cacheable(self, req):
+        return req.get('method') in CACHEABLE
+
+    def get(self, req):
+        '''Cached response to req (with req's id), or None.'''
+        if not self.cacheable(req):
+            return None
+        key = cache_key(req)
+        now = time.time()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < now:
+                del self.entries[key]
+                entry = None
+            if entry is None and self.db is not None:
+                entry = self._load(key, now)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+
+        return dict(entry[1], id=req.get('id'))
+
+    def put(self, req, resp):
+        if not self.cacheable(req) or 'error' in resp:
+            return
+        key = cache_key(req)
+        expires = time.time() + self.ttl if self.ttl else None
+        entry = (expires, dict(resp))
+
+        with self.lock:
+            self._remember(key, entry)
+            if self.db is not None:
+                self.db.execute('INSERT OR REPLACE INTO responses '
+                                'VALUES (?, ?, ?)',
+                                (key, expires, json.dumps(entry[1])))
+                self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute('DELETE FROM responses')
+                self.db.commit()
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _load(self, key, now):
+        row = self.db.execute('SELECT expires, resp FROM responses '
+                              'WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[0] is not None and row[0] < now:
+            self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self.db.commit()
+            return None
+        return row[0], json.loads(row[1])
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from math import ceil
+
+
+# Keys of a result object that are summed/minimized/maximized on merge
+SUMMED = ('bitsUsed',)
+MINIMIZED = ('bitsLeft', 'requestsLeft')
+MAXIMIZED = ('advisoryDelay',)
+
+# Keys of a signed random object that only hold for one chunk
+PER_CHUNK = ('method', 'hashedApiKey', 'serialNumber', 'completionTime',
+             'license', 'licenseData', 'userData', 'ticketData')
+
+# Shuffles are driven by integers drawn with replacement from [0, DRAWS)
+DRAWS = 10 ** 9
+
+
+def truthy(value):
+    '''Interpret config strings ('yes', 'no', ...) as well as plain bools.'''
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'yes', 'true', 'on')
+    return bool(value)
+
+
+def split(n, limit):
+    '''Split n into chunk sizes of at most limit.'''
+    full, rest = divmod(n, limit)
+    return [limit] * full + ([rest] if rest else [])
+
+
+def population(method, params):
+    '''Number of distinct values a request can produce, or None if unknown.'''
+    if method == 'integers':
+        return params['max'] - params['min'] + 1
+    if method == 'decimals':
+        return 10 ** params['decimalPlaces']
+    if method == 'strings':
+        return len(params['characters']) ** params['length']
+    return None
+
+
+def request_size(shortfall, seen, pop, limit):
+    '''Chunk size to ask for when topping up a sample without replacement.
+
+    Each chunk is unique on its own, but may overlap the values seen so far;
+    ask for enough to cover the expected overlap.
+    '''
+    unseen = pop - seen
+    size = int(ceil(shortfall * pop / unseen))
+    return max(1, min(size, limit, pop))
+
+
+class UniqueSample:
+    '''Collects chunks into a sample of n unique values.
+
+    Every chunk is unique on its own, but chunks may overlap each other;
+    values that were already seen are dropped and topped up by the next
+    chunk until n values are collected.
+    '''
+
+    def __init__(self, n, pop, limit):
+        if n > pop:
+            raise Exception('Cannot pick {} unique values out of {}!'
+                            .format(n, pop))
+        self.n = n
+        self.pop = pop
+        self.limit = limit
+        self.seen = set()
+        self.data = []
+        self.resps = []
+
+    @property
+    def done(self):
+        return len(self.data) >= self.n
+
+    def next_size(self):
+        return request_size(self.n - len(self.data), len(self.seen),
+                            self.pop, self.limit)
+
+    def chunk_kwargs(self, kwargs, size):
+        return dict(kwargs, number=size)
+
+    def add(self, resp):
+        self.resps.append(resp)
+        for x in resp['result']['random']['data']:
+            if x not in self.seen:
+                self.seen.add(x)
+                self.data.append(x)
+
+    def result(self):
+        resp = merge(self.resps)
+        resp['result']['random']['data'] = self.data[:self.n]
+        resp['result']['random']['n'] = self.n
+        return resp
+
+
+class ShuffledSample:
+    '''Picks n unique integers out of min..max by a partial shuffle.
+
+    Rejecting repeats needs ever more requests as n approaches the
+    population (the coupon collector's problem). Instead, the first n
+    positions of the population are shuffled (Fisher-Yates), with one
+    integer drawn with replacement per swap; draws above the largest
+    multiple of the range left are rejected, so every swap is uniform.
+    The drawing chunks are kept under ``chunks``.
+    '''
+
+    def __init__(self, n, low, pop, limit):
+        if n > pop:
+            raise Exception('Cannot pick {} unique values out of {}!'
+                            .format(n, pop))
+        self.n = n
+        self.low = low
+        self.limit = limit
+        self.values = list(range(low, low + pop))
+        self.i = 0
+        self.resps = []
+
+    @property
+    def done(self):
+        return self.i >= self.n
+
+    def next_size(self):
+        return min(self.n - self.i, self.limit)
+
+    def chunk_kwargs(self, kwargs, size):
+        return dict(kwargs, number=size, min=0, max=DRAWS - 1,
+                    replacement=True)
+
+    def add(self, resp):
+        self.resps.append(resp)
+        values = self.values
+        for x in resp['result']['random']['data']:
+            if self.i >= self.n:
+                break
+            m = len(values) - self.i
+            if x >= DRAWS - DRAWS % m:
+                continue
+            j = self.i + x % m
+            values[self.i], values[j] = values[j], values[self.i]
+            self.i += 1
+
+    def result(self):
+        resp = merge(self.resps)
+        random = resp['result']['random']
+        random['data'] = self.values[:self.n]
+        random['n'] = self.n
+        random['min'] = self.low
+        random['max'] = self.low + len(self.values) - 1
+        random['replacement'] = False
+        return resp
+
+
+def merge(resps):
+    '''Merge successful chunk responses into a single response.
+
+    The merged ``random`` object holds the concatenated data and the request
+    parameters; the original per-chunk results (including their signatures,
+    serial numbers and completion times) are only kept under ``chunks``.
+    '''
+    results = [r['result'] for r in resps]
+    random = {k: v for k, v in results[0]['random'].items()
+              if k not in PER_CHUNK}
+    random['data'] = [x for r in results for x in r['random']['data']]
+    random['n'] = len(random['data'])
+
+    merged = {'random': random, 'chunks': results}
+    for k in SUMMED:
+        if all(k in r for r in results):
+            merged[k] = sum(r[k] for r in results)
+    for k in MINIMIZED:
+        if all(k in r for r in results):
+            merged[k] = min(r[k] for r in results)
+    for k in MAXIMIZED:
+        if all(k in r for r in results):
+            merged[k] = max(r[k] for r in results)
+
+    return {
+        'jsonrpc': resps[0].get('jsonrpc'),
+        'id': resps[0]['id'],
+        'result': merged,
+    }
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Coalescing of concurrent identical requests.
+
+Threads asking for values of the same method and parameters within a short
+window share one request for the sum of their numbers, and each gets its own
+slice of the returned data.
+'''
+
+from .chunking import PER_CHUNK
+from concurrent.futures import Future
+from threading import Event, Lock
+
+
+class Group:
+    '''Callers sharing one request: (offset, n, future) each.'''
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.total = 0
+        self.waiters = []
+        self.closed = Event()
+
+
+def split(resp, offset, n):
+    '''Response with the n values of resp starting at offset.
+
+    A signed result is kept under ``chunks``, as for merged chunk responses,
+    so that the slice can be verified; it holds the values of all callers of
+    the group. Unsigned results are not passed on.
+    '''
+    result = resp['result']
+    part = {k: v for k, v in result.items() if k != 'signature'}
+    random = {k: v for k, v in result['random'].items()
+              if k not in PER_CHUNK}
+    random['data'] = random['data'][offset:offset + n]
+    random['n'] = n
+    part['random'] = random
+    if 'signature' in result:
+        part['chunks'] = [result]
+    part['coalesced'] = {'offset': offset, 'n': n}
+    return {'jsonrpc': resp.get('jsonrpc'), 'id': resp['id'], 'result': part}
+
+
+class Coalescer:
+    '''Merges concurrent requests with the same key into one.
+
+    The first caller of a key waits up to window seconds for others to join,
+    or until the numbers asked for reach the cap of the group, and then makes
+    the request for everybody. Error responses and exceptions are passed on
+    to every caller of the group.
+    '''
+
+    def __init__(self, window=0.001):
+        self.window = window
+        self.groups = {}
+        self.lock = Lock()
+
+    def generate(self, key, n, cap, fetch):
+        '''The response for n values; fetch(total) makes the request.'''
+        future = Future()
+        with self.lock:
+            group = self.groups.get(key)
+            if group is not None and group.total + n > group.cap:
+                self._close(key, group)
+                group = None
+            leader = group is None
+            if leader:
+                group = self.groups[key] = Group(cap)
+            group.waiters.append((group.total, n, future))
+            group.total += n
+            if group.total >= group.cap:
+                self._close(key, group)
+
+        if leader:
+            group.closed.wait(self.window)
+            with self.lock:
+                if self.groups.get(key) is group:
+                    self._close(key, group)
+            self._dispatch(group, fetch)
+        return future.result()
+
+    def _close(self, key, group):
+        # Called with the lock held; later callers start a new group.
+        del self.groups[key]
+        group.closed.set()
+
+    def _dispatch(self, group, fetch):
+        try:
+            resp = fetch(group.total)
+        except BaseException as e:
+            for _, _, future in group.waiters:
+                future.set_exception(e)
+            return
+        if 'error' in resp or len(group.waiters) == 1:
+            for _, _, future in group.waiters:
+                future.set_result(resp)
+            return
+        for offset, n, future in group.waiters:
+            future.set_result(split(resp, offset, n))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from configparser import ConfigParser
+from threading import Lock
+import os
+
+
+DEFAULTS = os.path.join(os.path.dirname(__file__), 'defaults.ini')
+
+
+# Parsed config, the files it was read from and their modification times
+_cache = {'config': None, 'paths': (), 'mtimes': None}
+_cache_lock = Lock()
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read():
+    config = ConfigParser()
+    config.read(DEFAULTS)
+    try:
+        user = os.path.expanduser(config['config']['path'])
+        config.read(user)
+    except:
+        raise Exception('No user config found!')
+    return config, user
+
+
+def load_config():
+    '''Process-wide parsed config, reloaded when one of its files changes.
+
+    The returned ConfigParser is shared and must not be modified.
+    '''
+    with _cache_lock:
+        mtimes = tuple(_mtime(p) for p in _cache['paths'])
+        if _cache['config'] is not None and mtimes == _cache['mtimes']:
+            return _cache['config']
+
+        config, user = _read()
+        _cache['config'] = config
+        _cache['paths'] = (DEFAULTS, user)
+        _cache['mtimes'] = tuple(_mtime(p) for p in _cache['paths'])
+        return config
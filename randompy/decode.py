@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from binascii import a2b_base64
+
+
+# Output modes for generated data
+OUTPUTS = ('list', 'array', 'numpy')
+
+
+# array.array typecodes and NumPy dtypes per method
+TYPECODES = {
+    'integers': 'q',
+    'decimals': 'd',
+    'gaussians': 'd',
+}
+
+
+DTYPES = {
+    'integers': 'int64',
+    'decimals': 'float64',
+    'gaussians': 'float64',
+}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise Exception('NumPy output needs numpy to be installed!')
+    return numpy
+
+
+def decode_blobs(data, fmt):
+    '''Decode blobs into one buffer; returns a memoryview per blob.'''
+    if not data:
+        return []
+    if fmt == 'hex':
+        buf = bytes.fromhex(''.join(data))
+        size = len(buf) // len(data)
+    else:
+        size = len(a2b_base64(data[0]))
+        buf = bytearray(size * len(data))
+        for i, blob in enumerate(data):
+            buf[i * size:(i + 1) * size] = a2b_base64(blob)
+    view = memoryview(buf)
+    return [view[i * size:(i + 1) * size] for i in range(len(data))]
+
+
+def decode(data, method, output='list', base=10, format='base64'):
+    '''Convert API data into the requested output type.
+
+    Integers in base 2, 8 or 12 are parsed into numbers for the array and
+    numpy outputs; blobs become a memoryview per blob ('array') or a 2D
+    uint8 array ('numpy').
+    '''
+    if output not in OUTPUTS:
+        raise Exception('Unknown output: {}'.format(output))
+    if output == 'list':
+        return data
+
+    if method == 'blobs':
+        views = decode_blobs(data, format)
+        if output == 'array':
+            return views
+        np = _numpy()
+        if not views:
+            return np.empty((0, 0), dtype='uint8')
+        buf = views[0].obj
+        return np.frombuffer(buf, dtype='uint8').reshape(len(views), -1)
+
+    if method not in TYPECODES:
+        raise Exception('No {} output for {}!'.format(output, method))
+
+    base = int(base)
+    if method == 'integers' and base != 10:
+        data = [int(x, base) for x in data]
+
+    if output == 'array':
+        return array(TYPECODES[method], data)
+    return _numpy().fromiter(data, dtype=DTYPES[method], count=len(data))
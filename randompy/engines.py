@@ -0,0 +1,467 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Sources of random values behind the generating methods of RandomPy.
+
+The remote engine asks random.org for every value. The local engine draws
+from the operating system CSPRNG, and the hybrid engine from a fast DRBG that
+is reseeded from random.org blobs. The reservoir engine reads random.org
+bytes that a filler process stored on disk. Their results have the same shape
+as API results, without a signature; every result records its ``source``.
+'''
+
+from .chunking import population
+from .reservoir import Reservoir
+from .transforms import Entropy
+from base64 import b64encode
+from datetime import datetime, timezone
+from hashlib import shake_256
+from threading import Lock
+import os
+import random
+import secrets
+import sys
+import time
+import uuid
+
+
+# Engine names
+ENGINES = ('remote', 'local', 'hybrid', 'reservoir')
+
+
+# Sources recorded in results
+SOURCES = {
+    'remote': 'random.org',
+    'local': 'local',
+    'hybrid': 'hybrid',
+    'reservoir': 'reservoir',
+}
+
+
+def _in_base(x, base):
+    digits = '0123456789ab'
+    out = ''
+    sign, x = ('-', -x) if x < 0 else ('', x)
+    while True:
+        x, d = divmod(x, base)
+        out = digits[d] + out
+        if not x:
+            return sign + out
+
+
+def _sample(rng, pop, n):
+    '''n distinct integers out of range(pop).'''
+    if n > pop:
+        raise Exception('Cannot pick {} unique values out of {}!'
+                        .format(n, pop))
+    if pop <= sys.maxsize:
+        return rng.sample(range(pop), n)
+    seen = set()
+    out = []
+    while len(out) < n:
+        x = rng.randrange(pop)
+        if x not in seen:
+            seen.add(x)
+            out.append(x)
+    return out
+
+
+def _bulk(rng, size):
+    # The Entropy of a RequestRandom, if it can serve a range of size values.
+    entropy = getattr(rng, 'entropy', None)
+    return entropy if entropy is not None and size <= 2 ** 64 else None
+
+
+def _integers(rng, p):
+    lo, hi, base = p['min'], p['max'], p.get('base', 10)
+    entropy = _bulk(rng, hi - lo + 1)
+    if p.get('replacement', True) and entropy is not None:
+        data = entropy.integers(p['n'], lo, hi)
+    elif p.get('replacement', True):
+        data = [rng.randint(lo, hi) for _ in range(p['n'])]
+    else:
+        data = [lo + x for x in _sample(rng, hi - lo + 1, p['n'])]
+    if base != 10:
+        data = [_in_base(x, base) for x in data]
+    return data, int(p['n'] * (hi - lo + 1).bit_length())
+
+
+def _decimals(rng, p):
+    places = p['decimalPlaces']
+    scale = 10 ** places
+    entropy = _bulk(rng, scale)
+    if p.get('replacement', True) and entropy is not None:
+        ints = entropy.integers(p['n'], 0, scale - 1)
+    elif p.get('replacement', True):
+        ints = [rng.randrange(scale) for _ in range(p['n'])]
+    else:
+        ints = _sample(rng, scale, p['n'])
+    return [round(x / scale, places) for x in ints], \
+        int(p['n'] * places * 3.33)
+
+
+def _gaussians(rng, p):
+    digits = p['significantDigits']
+    data = [float('{:.{}g}'.format(rng.gauss(p['mean'],
+                                             p['standardDeviation']),
+                                   digits))
+            for _ in range(p['n'])]
+    return data, int(p['n'] * digits * 3.33)
+
+
+def _strings(rng, p):
+    chars, length = p['characters'], p['length']
+    entropy = _bulk(rng, len(chars))
+    if p.get('replacement', True) and entropy is not None:
+        picks = [chars[i] for i in entropy.integers(p['n'] * length, 0,
+                                                    len(chars) - 1)]
+        data = [''.join(picks[i:i + length])
+                for i in range(0, len(picks), length)]
+    elif p.get('replacement', True):
+        data = [''.join(rng.choice(chars) for _ in range(length))
+                for _ in range(p['n'])]
+    else:
+        k = len(chars)
+        data = []
+        for x in _sample(rng, population('strings', p), p['n']):
+            s = ''
+            for _ in range(length):
+                x, d = divmod(x, k)
+                s += chars[d]
+            data.append(s)
+    bits = int(p['n'] * length * max(len(chars).bit_length() - 1, 1))
+    return data, bits
+
+
+def _uuids(rng, p):
+    data = [str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            for _ in range(p['n'])]
+    return data, p['n'] * 122
+
+
+def _blobs(rng, p):
+    size = p['size'] // 8
+    blobs = [rng.getrandbits(size * 8).to_bytes(size, 'big')
+             for _ in range(p['n'])]
+    if p.get('format', 'base64') == 'hex':
+        data = [b.hex() for b in blobs]
+    else:
+        data = [b64encode(b).decode('ascii') for b in blobs]
+    return data, p['n'] * p['size']
+
+
+# Value generators per method: (rng, params) -> (data, bits used)
+GENERATORS = {
+    'integers': _integers,
+    'decimals': _decimals,
+    'gaussians': _gaussians,
+    'strings': _strings,
+    'uuids': _uuids,
+    'blobs': _blobs,
+}
+
+
+class ByteRandom(random.Random):
+    '''random.Random drawing all of its bits from ``randbytes``.'''
+
+    def seed(self, *args, **kwargs):
+        # Called by random.Random.__init__; there is no seed to set.
+        pass
+
+    def getrandbits(self, k):
+        if k == 0:
+            return 0
+        n = (k + 7) // 8
+        return int.from_bytes(self.randbytes(n), 'big') >> (n * 8 - k)
+
+    def random(self):
+        return (int.from_bytes(self.randbytes(7), 'big') >> 3) * 2 ** -53
+
+    def unread(self, data):
+        '''Put back bytes that were drawn but not used.'''
+        pass
+
+    def getstate(self):
+        raise NotImplementedError('{} state cannot be saved!'.format(
+                                  type(self).__name__))
+
+    def setstate(self, state):
+        raise NotImplementedError('{} state cannot be restored!'.format(
+                                  type(self).__name__))
+
+
+class RequestRandom(ByteRandom):
+    '''Serves the values of one request from bytes drawn in bulk.
+
+    The shared source is locked once per block rather than once per value;
+    blocks double in size up to MAX_BLOCK. Bytes left over are handed back
+    to the source by ``close``.
+    '''
+
+    BLOCK = 256
+    MAX_BLOCK = 1 << 20
+
+    def __init__(self, source):
+        self.source = source
+        self.block = self.BLOCK
+        self.entropy = Entropy(refill=self._refill, numpy=False)
+        super().__init__()
+
+    def randbytes(self, n):
+        return self.entropy.take(n)
+
+    def close(self):
+        left = len(self.entropy)
+        if left:
+            self.source.unread(self.entropy.take(left))
+
+    def _refill(self):
+        data = self.source.randbytes(self.block)
+        self.block = min(2 * self.block, self.MAX_BLOCK)
+        return data
+
+
+class DRBG(ByteRandom):
+    '''Deterministic random bit generator keyed by a seed.
+
+    Output is a SHAKE-256 keystream; every block also derives the key for
+    the next one, so earlier output cannot be recovered from the state.
+    ``reseed`` mixes new entropy into the key; ``output`` counts the bytes
+    served since. A forked child reseeds itself from os.urandom before its
+    first output, so it does not repeat the output of its parent.
+    '''
+
+    BLOCK = 1 << 16
+
+    def __init__(self, seed=None):
+        self.key = bytes(64)
+        self.buffer = b''
+        self.pos = 0
+        self.counter = 0
+        self.output = 0
+        self.pid = os.getpid()
+        self.lock = Lock()
+        super().__init__()
+        if seed is not None:
+            self.reseed(seed)
+
+    def reseed(self, entropy):
+        with self.lock:
+            self._rekey(entropy)
+
+    def randbytes(self, n):
+        with self.lock:
+            if self.pid != os.getpid():
+                self._rekey(os.urandom(64))
+                self.pid = os.getpid()
+            if self.pos + n > len(self.buffer):
+                self._refill(n)
+            out = self.buffer[self.pos:self.pos + n]
+            self.pos += n
+            self.output += n
+            return out
+
+    def unread(self, data):
+        with self.lock:
+            if self.pid == os.getpid():
+                self.buffer = data + self.buffer[self.pos:]
+                self.pos = 0
+                self.output -= len(data)
+
+    def _rekey(self, entropy):
+        self.key = shake_256(b'reseed' + self.key + entropy).digest(64)
+        self.buffer = b''
+        self.pos = 0
+        self.output = 0
+
+    def _refill(self, n):
+        size = max(self.BLOCK, n)
+        self.counter += 1
+        out = shake_256(b'generate' + self.key +
+                        self.counter.to_bytes(8, 'big')).digest(64 + size)
+        self.key = out[:64]
+        self.buffer = self.buffer[self.pos:] + out[64:]
+        self.pos = 0
+
+
+class ReservoirRandom(ByteRandom):
+    '''Draws bytes from a Reservoir, block bytes per claim.
+
+    Claimed bytes that are not served yet stay in this process: a forked
+    child drops them, so they are never served by both processes.
+    '''
+
+    def __init__(self, reservoir, block=4096):
+        self.reservoir = reservoir
+        self.block = block
+        self.buffer = b''
+        self.pos = 0
+        self.pid = os.getpid()
+        self.lock = Lock()
+        super().__init__()
+
+    def randbytes(self, n):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.buffer = b''
+                self.pos = 0
+                self.pid = os.getpid()
+            if self.pos + n > len(self.buffer):
+                self.buffer = self.buffer[self.pos:] + self.reservoir.take(
+                    max(self.block, n - len(self.buffer) + self.pos))
+                self.pos = 0
+            out = self.buffer[self.pos:self.pos + n]
+            self.pos += n
+            return out
+
+    def unread(self, data):
+        with self.lock:
+            if self.pid == os.getpid():
+                self.buffer = data + self.buffer[self.pos:]
+                self.pos = 0
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%SZ')
+
+
+class Engine:
+    '''Base class of the engines that generate values themselves.'''
+
+    name = None
+
+    def __init__(self):
+        self.rng = None
+
+    @property
+    def source(self):
+        return SOURCES[self.name]
+
+    def serves(self, method):
+        return method in GENERATORS
+
+    def needs_seed(self):
+        return False
+
+    def generate(self, rID, method, params):
+        '''Generate values for params; returns an API-shaped response.'''
+        if isinstance(self.rng, ByteRandom):
+            rng = RequestRandom(self.rng)
+            try:
+                data, bits = GENERATORS[method](rng, params)
+            finally:
+                rng.close()
+        else:
+            data, bits = GENERATORS[method](self.rng, params)
+        result = {
+            'random': {'data': data, 'completionTime': _now()},
+            'bitsUsed': bits,
+            'advisoryDelay': 0,
+            'source': self.source,
+        }
+        return {'jsonrpc': '2.0', 'id': rID, 'result': result}
+
+
+class RemoteEngine(Engine):
+    '''Every value comes from random.org.'''
+
+    name = 'remote'
+
+    def serves(self, method):
+        return False
+
+
+class LocalEngine(Engine):
+    '''Values come from the operating system CSPRNG (``secrets``).'''
+
+    name = 'local'
+
+    def __init__(self):
+        self.rng = secrets.SystemRandom()
+
+
+class HybridEngine(Engine):
+    '''Values come from a DRBG that is reseeded from random.org blobs.
+
+    A new seed of seed_bits bits is requested after reseed_bytes bytes of
+    output or reseed_interval seconds, whichever comes first. Seeds are
+    mixed with os.urandom, so neither source alone determines the output.
+    '''
+
+    name = 'hybrid'
+
+    def __init__(self, seed_bits=512, reseed_bytes=1 << 20,
+                 reseed_interval=3600.0):
+        self.rng = DRBG(os.urandom(64))
+        self.seed_bits = seed_bits
+        self.reseed_bytes = reseed_bytes
+        self.reseed_interval = reseed_interval
+        self.seed_info = None
+        self.seeded_at = None
+        self.lock = Lock()
+
+    def needs_seed(self):
+        with self.lock:
+            return (self.seeded_at is None or
+                    self.rng.output >= self.reseed_bytes or
+                    time.monotonic() - self.seeded_at >= self.reseed_interval)
+
+    def seed_kwargs(self):
+        '''generate arguments of the blobs request for a new seed.'''
+        return {'method': 'blobs', 'number': 1, 'size': self.seed_bits,
+                'format': 'base64'}
+
+    def reseed(self, result):
+        '''Mix the blob of a blobs result into the DRBG.
+
+        With result None (random.org could not be reached), the DRBG is
+        reseeded from os.urandom only and the seed is recorded as local.
+        '''
+        if result is None:
+            entropy = b''
+            info = {'source': SOURCES['local']}
+        else:
+            random = result['random']
+            entropy = random['data'][0].encode('ascii')
+            info = {'source': SOURCES['remote'],
+                    'completionTime': random.get('completionTime')}
+            if 'serialNumber' in random:
+                info['serialNumber'] = random['serialNumber']
+        self.rng.reseed(entropy + os.urandom(64))
+        with self.lock:
+            self.seed_info = info
+            self.seeded_at = time.monotonic()
+
+    def generate(self, rID, method, params):
+        resp = super().generate(rID, method, params)
+        with self.lock:
+            resp['result']['seed'] = dict(self.seed_info)
+        return resp
+
+
+class ReservoirEngine(Engine):
+    '''Values come from an on-disk reservoir filled from random.org.
+
+    Bytes are claimed block bytes at a time, so processes sharing the
+    reservoir take the file lock once per block rather than per value.
+    '''
+
+    name = 'reservoir'
+
+    def __init__(self, path, block=4096, timeout=5.0):
+        self.reservoir = Reservoir(path, timeout=timeout)
+        self.rng = ReservoirRandom(self.reservoir, block)
+
+
+ENGINE_CLASSES = {
+    'remote': RemoteEngine,
+    'local': LocalEngine,
+    'hybrid': HybridEngine,
+    'reservoir': ReservoirEngine,
+}
+
+
+def get_engine(name, **options):
+    if name not in ENGINE_CLASSES:
+        raise Exception('Unknown engine: {}'.format(name))
+    return ENGINE_CLASSES[name](**options)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Bulk export of large requests to a file.
+
+The job is split into chunks that worker processes fetch (and verify) with
+their own RandomPy client. Chunks are written to the output file in order as
+they arrive, and a checkpoint next to the file records how many chunks are
+complete, so an interrupted export resumes where it stopped.
+'''
+
+from .chunking import split, truthy
+from .decode import decode
+from .functions import error_raise
+from .specs import MAX_N
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import io
+import json
+import os
+import sys
+
+
+# Output file formats
+FORMATS = ('ndjson', 'csv', 'binary')
+
+
+# Methods that can be written in the binary format
+BINARY = ('integers', 'decimals', 'gaussians', 'blobs')
+
+
+# RandomPy client of a worker process
+_client = None
+
+
+def _ndjson(data, method, params):
+    return ''.join(json.dumps(x) + '\n' for x in data).encode('utf-8')
+
+
+def _csv(data, method, params):
+    out = io.StringIO(newline='')
+    csv.writer(out).writerows([x] for x in data)
+    return out.getvalue().encode('utf-8')
+
+
+def _binary(data, method, params):
+    # Numbers as little-endian int64/float64, blobs as their raw bytes.
+    values = decode(data, method, 'array', base=params.get('base', 10),
+                    format=params.get('format', 'base64'))
+    if method == 'blobs':
+        return b''.join(values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+ENCODERS = {
+    'ndjson': _ndjson,
+    'csv': _csv,
+    'binary': _binary,
+}
+
+
+def _init_worker(client):
+    global _client
+    from .randompy import RandomPy
+    _client = RandomPy(**client)
+
+
+_errorfunc = error_raise('Export request')
+
+
+def _fetch_chunk(method, size, fmt, params):
+    data = _client.generate(method=method, number=size, errorfunc=_errorfunc,
+                            successfunc=lambda resp: resp['result'],
+                            **params)['random']['data']
+    return len(data), ENCODERS[fmt](data, method, params)
+
+
+class Checkpoint:
+    '''Progress of an export: the job, completed chunks and file size.'''
+
+    def __init__(self, path, job):
+        self.path = path
+        self.job = job
+        self.chunks = 0
+        self.size = 0
+
+    def load(self):
+        '''Load the saved progress; False if there is none.'''
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        if state['job'] != self.job:
+            raise Exception('Checkpoint {} belongs to a different export!'
+                            .format(self.path))
+        self.chunks = state['chunks']
+        self.size = state['size']
+        return True
+
+    def save(self, chunks, size):
+        self.chunks = chunks
+        self.size = size
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'job': self.job, 'chunks': chunks, 'size': size}, f)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        os.remove(self.path)
+
+
+def print_progress(done, total):
+    sys.stderr.write('\r{}/{} values ({:.1%})'.format(done, total,
+                                                      done / total))
+    if done == total:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
+
+
+def export(path, method, n, format='ndjson', chunk_size=None, workers=4,
+           client=None, progress=None, **params):
+    '''Generate n values of method into the file at path.
+
+    chunk_size values are fetched per request by workers processes, each
+    with a RandomPy(**client). progress(done, total) is called after every
+    chunk. Resumes from path + '.ckpt' if an earlier run was interrupted;
+    returns the number of values written.
+    '''
+    if format not in FORMATS:
+        raise Exception('Unknown export format: {}'.format(format))
+    if format == 'binary' and method not in BINARY:
+        raise Exception('No binary export for {}!'.format(method))
+    if 'replacement' in params and not truthy(params['replacement']):
+        raise Exception('Bulk export cannot pick values without '
+                        'replacement!')
+
+    chunk_size = min(chunk_size or MAX_N[method], MAX_N[method])
+    sizes = split(n, chunk_size)
+    job = {'method': method, 'n': n, 'format': format,
+           'chunk_size': chunk_size, 'params': params}
+
+    checkpoint = Checkpoint(path + '.ckpt', job)
+    if checkpoint.load():
+        # Drop whatever was written after the last completed chunk.
+        f = open(path, 'r+b')
+        f.truncate(checkpoint.size)
+        f.seek(checkpoint.size)
+    else:
+        f = open(path, 'wb')
+    done = sum(sizes[:checkpoint.chunks])
+
+    with f, ProcessPoolExecutor(max_workers=workers,
+                                initializer=_init_worker,
+                                initargs=(client or {},)) as executor:
+        pending = deque()
+        todo = iter(range(checkpoint.chunks, len(sizes)))
+
+        def submit():
+            # Keep up to two chunks per worker in flight.
+            for index in todo:
+                pending.append(executor.submit(_fetch_chunk, method,
+                                               sizes[index], format, params))
+                if len(pending) >= 2 * workers:
+                    return
+
+        submit()
+        try:
+            while pending:
+                count, data = pending.popleft().result()
+                submit()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                done += count
+                checkpoint.save(checkpoint.chunks + 1, f.tell())
+                if progress is not None:
+                    progress(done, n)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    checkpoint.remove()
+    return done
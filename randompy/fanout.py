@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+
+class FanOut:
+    '''Thread pool that never holds more than in_flight calls.
+
+    ``submit`` blocks while in_flight calls are queued or running, so
+    producers cannot run ahead of the workers and pile up pending requests.
+    '''
+
+    def __init__(self, workers, in_flight=None):
+        self.in_flight = in_flight or 2 * workers
+        self.slots = BoundedSemaphore(self.in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='randompy')
+
+    def submit(self, fn, *args, **kwargs):
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f: self.slots.release())
+        return future
+
+    def map(self, fn, *iterables):
+        '''Like Executor.map, but lazy: at most in_flight calls ahead.'''
+        pending = deque()
+        try:
+            for args in zip(*iterables):
+                if len(pending) >= self.in_flight:
+                    yield pending.popleft().result()
+                pending.append(self.submit(fn, *args))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
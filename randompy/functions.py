@@ -40,3 +40,15 @@ def error_code(resp):
 
 def error_data(resp):
     return resp['error']['data']
+
+
+def error_raise(what):
+    '''errorfunc raising an Exception with the code and message of errors.
+
+    what names the failed request in the message, e.g. 'Stream request'.
+    '''
+    def errorfunc(resp):
+        error = resp['error']
+        raise Exception('{} failed ({}): {}'.format(
+                        what, error.get('code'), error.get('message')))
+    return errorfunc
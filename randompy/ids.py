@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import Future
+from itertools import count
+from threading import Lock
+
+
+class IDGenerator:
+    '''Monotonic request IDs, unique within the process.'''
+
+    def __init__(self, start=1):
+        self.counter = count(start)
+        self.lock = Lock()
+
+    def __call__(self):
+        with self.lock:
+            return next(self.counter)
+
+
+next_id = IDGenerator()
+
+
+class Registry:
+    '''In-flight requests, mapping request IDs to futures.
+
+    Responses can be dispatched in any order; each one resolves the future
+    registered under its ID. Any future with set_result/set_exception works,
+    so asyncio futures can be registered as well.
+    '''
+
+    def __init__(self):
+        self.futures = {}
+        self.lock = Lock()
+
+    def __contains__(self, rID):
+        return rID in self.futures
+
+    def __len__(self):
+        return len(self.futures)
+
+    def register(self, rID, future=None):
+        future = future if future is not None else Future()
+        with self.lock:
+            if rID in self.futures:
+                raise Exception('Request ID {} is already in flight!'
+                                .format(rID))
+            self.futures[rID] = future
+        return future
+
+    def resolve(self, resp):
+        '''Resolve the future waiting for resp; False if nobody waits.'''
+        with self.lock:
+            future = self.futures.pop(resp.get('id'), None)
+        if future is None:
+            return False
+        future.set_result(resp)
+        return True
+
+    def dispatch(self, resps):
+        '''Resolve futures for all resps; returns the unmatched ones.'''
+        return [resp for resp in resps if not self.resolve(resp)]
+
+    def fail(self, rID, exc):
+        with self.lock:
+            future = self.futures.pop(rID, None)
+        if future is not None:
+            future.set_exception(exc)
+
+    def fail_all(self, exc):
+        with self.lock:
+            futures, self.futures = self.futures, {}
+        for future in futures.values():
+            future.set_exception(exc)
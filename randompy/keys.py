@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .scheduler import BITS_EXHAUSTED, REQUESTS_EXHAUSTED, QuotaExceeded
+from threading import Lock
+import time
+
+
+class KeyPool:
+    '''Spreads requests over several API keys by their remaining quota.
+
+    Keys that run out of requests or bits cool down for cooldown seconds
+    before they are used again.
+    '''
+
+    def __init__(self, keys, cooldown=3600.0):
+        if not keys:
+            raise Exception('A key pool needs at least one key!')
+        self.keys = list(keys)
+        self.cooldown = cooldown
+        self.requests_left = {}
+        self.bits_left = {}
+        self.cooling = {}
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_config(cls, config, section='keys', cooldown=3600.0):
+        '''Read all keys of a config section (name = key pairs).
+
+        A cooldown option of the section overrides the cooldown argument.
+        '''
+        keys = dict(config[section])
+        cooldown = float(keys.pop('cooldown', cooldown))
+        return cls(list(keys.values()), cooldown=cooldown)
+
+    def available(self):
+        now = time.monotonic()
+        with self.lock:
+            return [k for k in self.keys if self.cooling.get(k, 0) <= now]
+
+    def acquire(self, exclude=()):
+        '''The available key with the most requests and bits left.'''
+        keys = [k for k in self.available() if k not in exclude]
+        if not keys:
+            raise QuotaExceeded('All API keys are cooling down!')
+
+        def remaining(key):
+            return (self.requests_left.get(key, float('inf')),
+                    self.bits_left.get(key, float('inf')))
+
+        with self.lock:
+            key = max(keys, key=remaining)
+            if key in self.requests_left:
+                self.requests_left[key] -= 1
+            return key
+
+    def mark_exhausted(self, key):
+        with self.lock:
+            self.cooling[key] = time.monotonic() + self.cooldown
+
+    def update(self, key, resp):
+        '''Record the usage info of resp; exhausted keys cool down.
+
+        Returns True if resp is an exhaustion error, so that the request
+        should be sent again with another key. A successful response that
+        uses up the quota is kept.
+        '''
+        if 'error' in resp:
+            exhausted = resp['error'].get('code') in (REQUESTS_EXHAUSTED,
+                                                      BITS_EXHAUSTED)
+        else:
+            result = resp.get('result', {})
+            with self.lock:
+                if 'requestsLeft' in result:
+                    self.requests_left[key] = result['requestsLeft']
+                if 'bitsLeft' in result:
+                    self.bits_left[key] = result['bitsLeft']
+            exhausted = (result.get('requestsLeft') == 0 or
+                         result.get('bitsLeft') == 0)
+
+        if exhausted:
+            self.mark_exhausted(key)
+        return exhausted and 'error' in resp
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left
+from contextlib import nullcontext
+from threading import Lock
+import time
+
+
+# Stages of a generate call, in order
+STAGES = ('validate', 'build', 'http', 'decode', 'verify', 'handle')
+
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+
+# Context manager used for stages when no metrics are collected
+NULL = nullcontext()
+
+
+def _labels(**labels):
+    return '{' + ','.join('{}="{}"'.format(k, v)
+                          for k, v in labels.items()) + '}'
+
+
+def _num(x):
+    return repr(x) if isinstance(x, float) else str(x)
+
+
+class Histogram:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            yield bound, total
+
+
+class Timer:
+    '''Times one stage and reports it to the registry on exit.'''
+
+    def __init__(self, metrics, stage, method):
+        self.metrics = metrics
+        self.stage = stage
+        self.method = method
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, self.method,
+                             time.perf_counter() - self.start)
+
+
+class Metrics:
+    '''In-process registry of stage timings and quota usage.
+
+    ``time`` returns a context manager that records the duration of a stage
+    in a histogram per stage and method, and calls every hook with
+    (stage, method, seconds). ``record`` counts the requests, bits and errors
+    of a response and keeps the last bitsLeft/requestsLeft reported. The
+    registry is exported as Prometheus text by ``prometheus``.
+    '''
+
+    _shared = None
+    _shared_lock = Lock()
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.hooks = []
+        self.lock = Lock()
+
+    @classmethod
+    def shared(cls):
+        '''Process-wide registry, so every client reports to one place.'''
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def time(self, stage, method):
+        return Timer(self, stage, method)
+
+    def observe(self, stage, method, seconds):
+        with self.lock:
+            hist = self.histograms.get((stage, method))
+            if hist is None:
+                hist = self.histograms[stage, method] = Histogram(
+                    self.buckets)
+            hist.observe(seconds)
+        for hook in self.hooks:
+            hook(stage, method, seconds)
+
+    def inc(self, name, method, value=1):
+        with self.lock:
+            key = (name, method)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def record(self, method, resp):
+        '''Count the quota usage reported by one response.'''
+        if 'error' in resp:
+            self.inc('errors', method)
+            return
+        result = resp.get('result', {})
+        self.inc('requests', method)
+        if 'bitsUsed' in result:
+            self.inc('bits', method, result['bitsUsed'])
+        with self.lock:
+            for name in ('bitsLeft', 'requestsLeft'):
+                if name in result:
+                    self.gauges[name] = result[name]
+
+    def prometheus(self):
+        '''Export the registry in the Prometheus text format.'''
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            gauges = dict(self.gauges)
+
+        lines = [
+            '# HELP randompy_stage_seconds Time spent per stage of a call.',
+            '# TYPE randompy_stage_seconds histogram',
+        ]
+        for (stage, method), hist in histograms:
+            for bound, total in hist.cumulative():
+                le = '+Inf' if bound == float('inf') else _num(bound)
+                lines.append('randompy_stage_seconds_bucket{} {}'.format(
+                             _labels(stage=stage, method=method, le=le),
+                             total))
+            labels = _labels(stage=stage, method=method)
+            lines.append('randompy_stage_seconds_sum{} {}'.format(
+                         labels, _num(hist.sum)))
+            lines.append('randompy_stage_seconds_count{} {}'.format(
+                         labels, hist.count))
+
+        for name, help in (('requests', 'Successful API requests.'),
+                           ('bits', 'Random bits used.'),
+                           ('errors', 'API error responses.')):
+            metric = 'randompy_{}_total'.format(name)
+            lines.append('# HELP {} {}'.format(metric, help))
+            lines.append('# TYPE {} counter'.format(metric))
+            for (counter, method), value in counters:
+                if counter == name:
+                    lines.append('{}{} {}'.format(
+                                 metric, _labels(method=method), value))
+
+        for name, metric in (('bitsLeft', 'randompy_bits_left'),
+                             ('requestsLeft', 'randompy_requests_left')):
+            if name in gauges:
+                lines.append('# TYPE {} gauge'.format(metric))
+                lines.append('{} {}'.format(metric, gauges[name]))
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.gauges.clear()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .chunking import truthy
+from .functions import error_raise
+from .specs import MAX_N
+from collections import deque
+from inspect import iscoroutinefunction
+from threading import Condition, Thread
+import time
+
+
+# Buffer exhaustion policies
+POLICIES = ('block', 'fail')
+
+
+_errorfunc = error_raise('Pool refill')
+
+
+class PoolEmpty(Exception):
+    pass
+
+
+class RandomPool:
+    '''Buffer of prefetched values for one method and parameter set.
+
+    Values are fetched in batches through ``RandomPy.generate`` by a
+    background thread whenever the buffer drops below the low-water mark,
+    and served from memory by ``take``. A failed refill is retried after
+    retry seconds, doubling with every further failure; after max_failures
+    failures in a row the thread gives up, and ``take`` raises the last
+    error once the buffer cannot serve it.
+    '''
+
+    def __init__(self, rand, method, capacity=10000, batch=None, low=None,
+                 policy='block', retry=1.0, max_failures=5, **params):
+        if iscoroutinefunction(rand.generate):
+            raise TypeError('Pools are not supported by AsyncRandomPy; use a '
+                            'RandomPy for the refill thread instead')
+        if policy not in POLICIES:
+            raise Exception('Unknown pool policy: {}'.format(policy))
+        if 'replacement' in params and not truthy(params['replacement']):
+            raise Exception('Pools cannot serve values without replacement!')
+
+        self.rand = rand
+        self.method = method
+        self.params = params
+        self.capacity = capacity
+        self.batch = batch if batch is not None else min(capacity,
+                                                         MAX_N[method])
+        self.low = low if low is not None else capacity // 4
+        self.policy = policy
+        self.retry = retry
+        self.max_failures = max_failures
+
+        self.buffer = deque()
+        self.cond = Condition()
+        self.wanted = 0
+        self.error = None
+        self.failures = 0
+        self.closed = False
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def take(self, k=1, timeout=None):
+        '''Take k values from the buffer.
+
+        Raises PoolEmpty if the buffer cannot serve k values right away
+        (policy 'fail') or within timeout seconds (policy 'block').
+        '''
+        if k > self.capacity:
+            raise Exception('Cannot take more than {} values at once!'
+                            .format(self.capacity))
+
+        with self.cond:
+            if len(self.buffer) < k:
+                if self.policy == 'fail':
+                    if self._failed():
+                        raise self.error
+                    self.cond.notify_all()
+                    raise PoolEmpty('Pool has {} values, {} requested!'
+                                    .format(len(self.buffer), k))
+                self._wait(k, timeout)
+
+            values = [self.buffer.popleft() for _ in range(k)]
+            if len(self.buffer) < self.low:
+                self.cond.notify_all()
+            return values
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+
+    def _wait(self, k, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.wanted = max(self.wanted, k)
+        try:
+            while len(self.buffer) < k:
+                if self._failed():
+                    raise self.error
+                if self.closed:
+                    raise PoolEmpty('Pool is closed!')
+                self.cond.notify_all()
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolEmpty('Timed out waiting for {} values!'
+                                        .format(k))
+                self.cond.wait(remaining)
+        finally:
+            self.wanted = 0
+
+    def _failed(self):
+        # True once the refill thread has given up.
+        return self.failures >= self.max_failures
+
+    def _needs_refill(self):
+        level = max(self.low, self.wanted)
+        return len(self.buffer) < level and len(self.buffer) < self.capacity
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.closed and not self._needs_refill():
+                    self.cond.wait()
+                if self.closed:
+                    return
+                size = min(self.batch, self.capacity - len(self.buffer))
+
+            try:
+                values = list(self._fetch(size))
+            except Exception as e:
+                with self.cond:
+                    self.error = e
+                    self.failures += 1
+                    self.cond.notify_all()
+                    if self._failed():
+                        return
+                    self._backoff(self.retry * 2 ** (self.failures - 1))
+                continue
+
+            with self.cond:
+                self.error = None
+                self.failures = 0
+                self.buffer.extend(values)
+                self.cond.notify_all()
+
+    def _backoff(self, delay):
+        # Called with the lock held; sleeps for delay seconds or until close.
+        deadline = time.monotonic() + delay
+        while not self.closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self.cond.wait(remaining)
+
+    def _fetch(self, size):
+        def successfunc(resp):
+            return resp['result']['random']['data']
+
+        return self.rand.generate(method=self.method, number=size,
+                                  errorfunc=_errorfunc,
+                                  successfunc=successfunc, **self.params)
@@ -2,13 +2,38 @@
 # -*- coding: utf-8 -*-
 
 from .api import RandomAPI
-from .functions import error_all, result_all
-from configparser import ConfigParser
-from random import randint
-import os
+from .audit import AuditLog
+from .batch import Batch
+from .cache import ResponseCache
+from .chunking import (ShuffledSample, UniqueSample, merge, population,
+                       split, truthy)
+from .coalesce import Coalescer
+from .config import load_config
+from .decode import decode
+from .engines import GENERATORS, SOURCES, LocalEngine, get_engine
+from .fanout import FanOut
+from .functions import error_all, error_raise, result_all
+from .ids import next_id
+from .keys import KeyPool
+from .metrics import NULL, Metrics
+from .reservoir import ReservoirEmpty
+from .scheduler import (BITS_EXHAUSTED, REQUESTS_EXHAUSTED, QuotaExceeded,
+                        Scheduler)
+from .serializers import RawJSON, raw_random
+from .signature import load_public_key, verify_result
+from .specs import MAX_BLOB_BYTES, MAX_N, SPECS
+from .stream import stream
+from .transforms import Entropy
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
 import string
 
 
+# Errors and error codes on which the local engine takes over, if enabled
+FALLBACK_ERRORS = (OSError, QuotaExceeded)
+EXHAUSTED = (REQUESTS_EXHAUSTED, BITS_EXHAUSTED)
+
+
 # Supported methods and related subparsers
 METHODS = {
     'integers': 'generate{}Integers',
@@ -21,39 +46,8 @@ METHODS = {
 }
 
 
-# Request keys
-KEYS = {
-    'integers': (
-        ('min', int),
-        ('max', int),
-        ('replacement', bool),
-        ('base', int),
-    ),
-    'decimals': (
-        ('decimalPlaces', int),
-        ('replacement', bool),
-    ),
-    'gaussians': (
-        ('mean', float),
-        ('standardDeviation', float),
-        ('significantDigits', int),
-    ),
-    'strings': (
-        ('length', int),
-        ('characters', str),
-        ('replacement', bool),
-    ),
-    'uuids': (
-    ),
-    'blobs': (
-        ('size', int),
-        ('format', str),
-    ),
-    'verify': (
-        ('random', lambda x: x),
-        ('signature', str),
-    ),
-}
+# Signature verification modes
+VERIFY_MODES = ('remote', 'local', 'audit')
 
 
 # Default alphabets
@@ -70,17 +64,134 @@ ABCS = {
 }
 
 
+_entropy_error = error_raise('Entropy request')
+
+
+def _entropy_kwargs(nbytes):
+    # blobs arguments for nbytes of raw entropy
+    size = min(nbytes, MAX_BLOB_BYTES)
+    return {'n': -(-nbytes // size), 'size': size * 8, 'format': 'base64',
+            'output': 'array', 'errorfunc': _entropy_error,
+            'successfunc': lambda resp: resp['result']}
+
+
+def _entropy_bytes(result):
+    return result['random']['data'][0].obj
+
+
 class RandomPy:
 
-    def __init__(self, key=None, signed=True):
+    api_class = RandomAPI
+
+    def __init__(self, key=None, signed=True, workers=None, verify=None,
+                 scheduler=None, keys=None, cache=None, url=None,
+                 metrics=None, pipeline=None, in_flight=None, engine=None,
+                 audit=None, coalesce=None):
         self.config = self._get_config()
         self.signed = signed
         self.fmt = 'Signed' if signed else ''
 
-        url = self.config['config']['url']
-        self.api = RandomAPI(url)
-
-        self.key = key if key is not None else self.config['config']['key']
+        if workers is None:
+            workers = self.config['config'].getint('workers')
+        self.workers = workers
+        if in_flight is None:
+            in_flight = self.config['config'].getint('in_flight')
+        self.in_flight = in_flight
+        self._fanout = None
+
+        if coalesce is None:
+            conf = self.config['coalesce']
+            coalesce = conf.getboolean('enabled') and conf.getfloat('window')
+        self.coalescer = Coalescer(coalesce) if coalesce else None
+
+        conf = self.config['verify']
+        self.verify = verify if verify is not None else conf['mode']
+        if self.verify not in VERIFY_MODES:
+            raise Exception('Unknown verify mode: {}'.format(self.verify))
+        self.verify_fallback = conf.getboolean('fallback')
+        if pipeline is None:
+            pipeline = conf.getboolean('pipeline')
+        self.pipeline = pipeline
+        self._verifier = None
+        self._executors_lock = Lock()
+        self.public_key = None
+        if self.verify == 'local' and conf['public_key']:
+            self.public_key = load_public_key(conf['public_key'])
+
+        conf = self.config['audit']
+        if audit is None and conf.getboolean('enabled'):
+            audit = AuditLog.shared(conf['path'], format=conf['format'],
+                                    max_bytes=conf.getint('max_bytes'))
+        self.audit = audit
+        if self.verify == 'audit' and audit is None:
+            raise Exception('The audit verify mode needs an audit log!')
+
+        conf = self.config['scheduler']
+        if scheduler is None and conf.getboolean('enabled'):
+            scheduler = Scheduler.shared(conf['policy'],
+                                         conf.getfloat('cooldown'))
+
+        conf = self.config['cache']
+        if cache is None and conf.getboolean('enabled'):
+            cache = ResponseCache(maxsize=conf.getint('maxsize'),
+                                  ttl=conf.getfloat('ttl') or None,
+                                  path=conf['path'] or None)
+
+        conf = self.config['engine']
+        if engine is None:
+            engine = conf['name']
+        if isinstance(engine, str):
+            options = {}
+            if engine == 'hybrid':
+                options = {'seed_bits': conf.getint('seed_bits'),
+                           'reseed_bytes': conf.getint('reseed_bytes'),
+                           'reseed_interval': conf.getfloat(
+                               'reseed_interval')}
+            elif engine == 'reservoir':
+                options = {'path': conf['reservoir'],
+                           'block': conf.getint('reservoir_block'),
+                           'timeout': conf.getfloat('reservoir_timeout')}
+            engine = get_engine(engine, **options)
+        self.engine = engine
+        self.engine_fallback = conf.getboolean('fallback')
+        self._local = None
+
+        conf = self.config['metrics']
+        if metrics is None and conf.getboolean('enabled'):
+            metrics = Metrics.shared()
+        self.metrics = metrics
+
+        if url is None:
+            url = self.config['config']['url']
+        http = self.config['http']
+        statuses = [int(s) for s in http['retry_statuses'].split(',')
+                    if s.strip()]
+        self.api = self.api_class(url, pool_size=http.getint('pool_size'),
+                                  timeout=http.getfloat('timeout'),
+                                  retries=http.getint('retries'),
+                                  backoff=http.getfloat('backoff'),
+                                  keep_alive=http.getboolean('keep_alive'),
+                                  scheduler=scheduler,
+                                  serializer=http['serializer'],
+                                  cache=cache, metrics=metrics,
+                                  retry_statuses=statuses)
+
+        if keys is None and key is None and self.config.has_section('keys'):
+            keys = KeyPool.from_config(self.config)
+        self.keys = keys
+        if keys is None and key is None:
+            key = self.config['config']['key']
+        self.key = key
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        '''Shut down the thread pools of submit/map and verification.'''
+        self._shutdown()
 
     def integers(self, n, **kwargs):
         method = 'integers'
@@ -106,19 +217,148 @@ class RandomPy:
         method = 'blobs'
         return self.generate(number=n, method=method, **kwargs)
 
+    def batch(self):
+        return Batch(self)
+
+    def entropy(self, nbytes=MAX_BLOB_BYTES * 8, refill=True, numpy=None):
+        '''Fetch nbytes of raw entropy as blobs; returns an Entropy.
+
+        The Entropy derives integers, floats, gaussians, shuffles and more
+        from the bytes locally; with refill, it fetches another nbytes
+        whenever it runs out.
+        '''
+        def fetch():
+            return _entropy_bytes(self.blobs(**_entropy_kwargs(nbytes)))
+
+        return Entropy(fetch(), refill=fetch if refill else None,
+                       numpy=numpy)
+
+    def submit(self, method, n, **kwargs):
+        '''Generate n values in a worker thread; returns a Future.
+
+        Blocks while in_flight calls are already queued or running.
+        '''
+        return self._get_fanout().submit(self.generate, number=n,
+                                         method=method, **kwargs)
+
+    def map(self, method, ns, **kwargs):
+        '''Generate n values for every n in ns over the worker threads.
+
+        Results are yielded in order; at most in_flight calls are queued or
+        running at any time.
+        '''
+        def generate(n):
+            return self.generate(number=n, method=method, **kwargs)
+        return self._get_fanout().map(generate, ns)
+
+    def stream(self, method, chunk_size=None, prefetch=False, **kwargs):
+        return stream(self, method, chunk_size, prefetch, **kwargs)
+
     def generate(self, **kwargs):
+        kwargs = self._prepare(**kwargs)
+
+        if self.engine.serves(kwargs['method']):
+            if self.engine.needs_seed():
+                self._reseed(self.engine)
+            resp = self._generate_engine(**kwargs)
+        else:
+            try:
+                resp = self._generate_remote(**kwargs)
+            except FALLBACK_ERRORS:
+                if not self._falls_back(kwargs):
+                    raise
+                resp = None
+            resp = self._remote_result(resp, **kwargs)
+
+        return self._finish(resp, **kwargs)
+
+    def _generate_remote(self, **kwargs):
+        limit = MAX_N.get(kwargs['method'])
+        if limit is not None and kwargs['number'] > limit:
+            return self._generate_chunked(limit, **kwargs)
+        if self.coalescer is not None and limit is not None:
+            return self._coalesced(limit, **kwargs)
+        return self._fetch(**kwargs)
+
+    def _coalesced(self, limit, **kwargs):
+        # Concurrent requests with the same parameters share one request
+        # for up to limit values; without replacement, the values of all
+        # callers must fit into the population.
+        method = kwargs['method']
+        params = self._params(**dict(kwargs, number=1))
+        del params['n']
+        cap = limit
+        if not truthy(params.get('replacement', True)):
+            cap = min(limit, population(method, params))
+        key = (method, repr(sorted(params.items())))
+
+        def fetch(total):
+            return self._fetch(**dict(kwargs, number=total))
+        return self.coalescer.generate(key, kwargs['number'], cap, fetch)
+
+    def _generate_locally(self, engine, **kwargs):
+        # Any number of values is generated in one go.
+        params = self._params(**dict(kwargs, number=1))
+        params['n'] = kwargs['number']
+        return engine.generate(next_id(), kwargs['method'], params)
+
+    def _generate_engine(self, **kwargs):
+        try:
+            return self._generate_locally(self.engine, **kwargs)
+        except ReservoirEmpty:
+            if not self._falls_back(kwargs):
+                raise
+            return self._remote_result(None, **kwargs)
+
+    def _falls_back(self, kwargs):
+        return self.engine_fallback and kwargs['method'] in GENERATORS
+
+    def _remote_result(self, resp, **kwargs):
+        # Fall back to the local engine if random.org could not be reached
+        # (resp is None) or the quota ran out.
+        if resp is None or (self._falls_back(kwargs) and 'error' in resp and
+                            resp['error'].get('code') in EXHAUSTED):
+            if self._local is None:
+                self._local = LocalEngine()
+            return self._generate_locally(self._local, **kwargs)
+        if 'result' in resp:
+            resp['result']['source'] = SOURCES['remote']
+        return resp
+
+    def _seed_result(self, resp):
+        # The result carrying a new seed, or None to seed locally.
+        if resp is not None and 'error' not in resp:
+            return resp['result']
+        if not self.engine_fallback:
+            raise Exception('Could not fetch a seed from random.org!')
+        return None
+
+    def _reseed(self, engine):
+        try:
+            resp = self._generate_remote(**self._prepare(
+                                         **engine.seed_kwargs()))
+        except FALLBACK_ERRORS:
+            resp = None
+        engine.reseed(self._seed_result(resp))
+
+    def _prepare(self, **kwargs):
         method = kwargs['method']
-        keys = (x[0] for x in KEYS[method])
+        keys = SPECS[method].keys
         conf = self.config[method]
-        kwargs.update({k: kwargs.get(k, conf[k]) for k in keys})
-        rID, req = self._build_request(**kwargs)
-        resp = self.api.call(req)
+        kwargs.update({k: conf[k] for k in keys if k not in kwargs})
+        return kwargs
 
-        if not rID == resp['id']:
-            raise Exception('Response ID did not match request ID!')
+    def _finish(self, resp, **kwargs):
+        with self._time('handle', kwargs['method']):
+            return self._handle(resp, **kwargs)
 
-        if self.signed and not self._verify_response(resp):
-            raise Exception('Response could not be verified!')
+    def _handle(self, resp, **kwargs):
+        output = kwargs.get('output', 'list')
+        if output != 'list' and 'result' in resp:
+            random = resp['result']['random']
+            random['data'] = decode(random['data'], kwargs['method'], output,
+                                    base=kwargs.get('base', 10),
+                                    format=kwargs.get('format', 'base64'))
 
         if 'errorfunc' in kwargs:
             errorfunc = kwargs['errorfunc']
@@ -132,30 +372,196 @@ class RandomPy:
 
         return self._handle_response(resp, errorfunc, successfunc)
 
-    def _get_config(self):
-        config = ConfigParser()
-        path = os.path.join(os.path.dirname(__file__), 'defaults.ini')
-        config.read(path)
+    def _fetch(self, **kwargs):
+        return self._verified(kwargs, self._request(**kwargs))
+
+    def _request(self, **kwargs):
+        # Fetch one chunk without verifying it.
+        method = kwargs['method']
+        refused = []
+        for attempt in range(self._attempts()):
+            with self._time('build', method):
+                rID, req = self._build_request(exclude=refused, **kwargs)
+            try:
+                resp = self.api.call(req)
+            except QuotaExceeded:
+                if not self._refused_key(req, refused, attempt):
+                    raise
+                continue
+            self._check_id(rID, resp)
+            if not self._record_key(req, resp):
+                break
+        return resp
+
+    def _unverified(self, **kwargs):
+        # One chunk from the engine or random.org, as generate would make
+        # it, but without verifying it.
+        if self.engine.serves(kwargs['method']):
+            if self.engine.needs_seed():
+                self._reseed(self.engine)
+            return self._generate_engine(**kwargs)
         try:
-            config.read(os.path.expanduser(config['config']['path']))
-        except:
-            raise Exception('No user config found!')
-        return config
+            resp = self._request(**kwargs)
+        except FALLBACK_ERRORS:
+            if not self._falls_back(kwargs):
+                raise
+            resp = None
+        return self._remote_result(resp, **kwargs)
+
+    def _verified(self, kwargs, resp):
+        if self._signed_result(kwargs, resp) and not self._audited(resp):
+            with self._time('verify', kwargs['method']):
+                authentic = self._verify_response(resp)
+            if not authentic:
+                raise Exception('Response could not be verified!')
+        return resp
+
+    def _audited(self, resp):
+        # Log a signed response; True if its verification is left to the
+        # audit of the log.
+        if self.audit is None or 'signature' not in resp['result']:
+            return False
+        self.audit.record(resp)
+        return self.verify == 'audit'
+
+    def _verify_later(self, kwargs, resp):
+        '''Verify resp in the background; returns a Future of resp.'''
+        if not self._signed_result(kwargs, resp):
+            future = Future()
+            future.set_result(resp)
+            return future
+        with self._executors_lock:
+            if self._verifier is None:
+                self._verifier = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='randompy-verify')
+        return self._verifier.submit(self._verified, kwargs, resp)
+
+    def _get_fanout(self):
+        with self._executors_lock:
+            if self._fanout is None:
+                self._fanout = FanOut(self.workers, self.in_flight)
+            return self._fanout
+
+    def _shutdown(self):
+        with self._executors_lock:
+            fanout, self._fanout = self._fanout, None
+            verifier, self._verifier = self._verifier, None
+        if fanout is not None:
+            fanout.shutdown()
+        if verifier is not None:
+            verifier.shutdown()
+
+    def _time(self, stage, method):
+        if self.metrics is None:
+            return NULL
+        return self.metrics.time(stage, method)
+
+    def _signed_result(self, kwargs, resp):
+        # verifySignature responses carry no signature of their own.
+        return (self.signed and kwargs['method'] != 'verify' and
+                'error' not in resp)
+
+    def _attempts(self):
+        # With a key pool, a request is retried once per key on exhaustion
+        # or when the scheduler refuses a key.
+        return len(self.keys) if self.keys is not None else 1
+
+    def _record_key(self, req, resp):
+        # True if req failed on an exhausted key and another should be tried.
+        if self.keys is None or 'apiKey' not in req['params']:
+            return False
+        return self.keys.update(req['params']['apiKey'], resp)
+
+    def _refused_key(self, req, refused, attempt):
+        # True if another key should be tried after the scheduler refused
+        # the key of req (it stays usable for later requests).
+        if self.keys is None or 'apiKey' not in req['params']:
+            return False
+        refused.append(req['params']['apiKey'])
+        return attempt + 1 < self._attempts()
 
-    def _build_request(self, **kwargs):
-        rID = randint(0, 999999)
+    def _api_key(self, exclude=()):
+        if self.keys is None:
+            return self.key
+        return self.keys.acquire(exclude)
+
+    def _check_id(self, rID, resp):
+        if not rID == resp['id']:
+            raise Exception('Response ID did not match request ID!')
+
+    def _unique_sample(self, limit, **kwargs):
+        # Shuffle decimal integers when most of the population is asked for;
+        # otherwise reject repeats.
+        params = self._params(**dict(kwargs, number=1))
+        pop = population(kwargs['method'], params)
+        n = kwargs['number']
+        if (kwargs['method'] == 'integers' and params.get('base', 10) == 10 and
+                2 * n > pop):
+            return ShuffledSample(n, params['min'], pop, limit)
+        return UniqueSample(n, pop, limit)
+
+    def _generate_chunked(self, limit, **kwargs):
+        if 'replacement' in kwargs and not truthy(kwargs['replacement']):
+            return self._generate_unique(limit, **kwargs)
+
+        def fetch(size):
+            return self._fetch(**dict(kwargs, number=size))
+
+        def request(size):
+            return self._request(**dict(kwargs, number=size))
+
+        sizes = split(kwargs['number'], limit)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            if self.pipeline:
+                # Fetching goes on while earlier chunks are verified.
+                pending = [self._verify_later(kwargs, resp)
+                           for resp in executor.map(request, sizes)]
+                resps = [future.result() for future in pending]
+            else:
+                resps = list(executor.map(fetch, sizes))
+
+        errors = [r for r in resps if 'error' in r]
+        return errors[0] if errors else merge(resps)
+
+    def _generate_unique(self, limit, **kwargs):
+        sample = self._unique_sample(limit, **kwargs)
+        pending = []
+        while not sample.done:
+            chunk = sample.chunk_kwargs(kwargs, sample.next_size())
+            if self.pipeline:
+                resp = self._request(**chunk)
+                pending.append(self._verify_later(chunk, resp))
+            else:
+                resp = self._fetch(**chunk)
+            if 'error' in resp:
+                return resp
+            sample.add(resp)
+        for future in pending:
+            future.result()
+        return sample.result()
+
+    def _get_config(self):
+        return load_config()
+
+    def _build_request(self, exclude=(), **kwargs):
+        rID = next_id()
         method = kwargs['method']
         methodfmt = METHODS[method].format(self.fmt)
         req = {
             'jsonrpc': 2.0,
             'id': rID,
             'method': methodfmt,
-            'params': {},
+            'params': self._params(**kwargs),
         }
 
-        if kwargs['method'] != 'verify':
-            req['params']['apiKey'] = self.key
-            req['params']['n'] = kwargs['number']
+        if method != 'verify':
+            req['params']['apiKey'] = self._api_key(exclude)
+
+        return rID, req
+
+    def _params(self, **kwargs):
+        method = kwargs['method']
 
         # transform alphabet keywords into character string
         if method == 'strings':
@@ -164,21 +570,43 @@ class RandomPy:
             s = ''.join(ABCS[c] for c in chars)
             kwargs['characters'] = s
 
-        # map value types over values
-        for k, ktype in KEYS[method]:
-            req['params'][k] = ktype(kwargs[k])
-
-        return rID, req
+        # coerce and check values in one pass
+        if method != 'verify':
+            kwargs['n'] = kwargs['number']
+        return SPECS[method].normalize(kwargs)
 
     def _verify_response(self, resp):
+        local = self._verify_locally(resp)
+        if local is not None:
+            return local
+        rID, req = self._verify_request(resp)
+        ver_resp = self.api.call(req)
+        return self._authentic(ver_resp)
+
+    def _verify_locally(self, resp):
+        # None means the response should be verified remotely. That is
+        # only the case without a public key: a response whose signature
+        # fails the local check is rejected, not sent back for a second
+        # opinion (whoever forged it may also answer verifySignature).
+        if self.verify != 'local':
+            return None
+        if self.public_key is None:
+            return None if self.verify_fallback else False
+        return verify_result(resp['result'], self.public_key,
+                             raw_random(resp))
+
+    def _verify_request(self, resp):
+        # Send the random object back exactly as it was received.
+        raw = raw_random(resp)
+        random = RawJSON(raw) if raw is not None else resp['result']['random']
         kwargs = {
             'method': 'verify',
-            'random': resp['result']['random'],
+            'random': random,
             'signature': resp['result']['signature'],
         }
-        rID, req = self._build_request(**kwargs)
-        ver_resp = self.api.call(req)
+        return self._build_request(**kwargs)
 
+    def _authentic(self, ver_resp):
         def errorfunc(resp):
             return False
 
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Durable on-disk reservoir of random.org entropy shared between processes.
+
+A filler appends blob bytes to the reservoir file; consumers in any number of
+processes on the host read them through ``mmap``. The header of the file
+holds the consumption offset, which is only moved under an exclusive
+``flock``, so no byte is ever handed out twice. With sync (the default),
+appended bytes are fsynced before they can be claimed and the header is
+flushed to disk after every claim, so this also holds across crashes; a
+crash may waste bytes, but never serves consumed ones again.
+
+Offsets are positions in the stream of bytes ever written, so they stay
+valid when ``compact`` drops consumed bytes from the start of the file.
+'''
+
+from .functions import error_raise
+from .specs import MAX_BLOB_BYTES
+from base64 import b64decode
+from contextlib import contextmanager
+from threading import Event, Lock
+import json
+import mmap
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Header: magic, stream offset of the first byte in the file, consumption
+# offset
+MAGIC = b'RPYRSV01'
+HEADER = struct.Struct('>8sQQ')
+HEADER_SIZE = 64
+
+
+class ReservoirEmpty(Exception):
+    pass
+
+
+class Reservoir:
+    '''Append-only entropy file with an atomic consumption offset.
+
+    ``take`` claims and returns the next n bytes, waiting up to timeout
+    seconds for the filler when fewer are left. Instances may be shared by
+    threads; a forked child reopens the file, so its locks are its own.
+    '''
+
+    def __init__(self, path, timeout=5.0, poll=0.05, sync=True):
+        if fcntl is None:
+            raise Exception('Reservoirs need fcntl (POSIX) file locking!')
+        self.path = os.path.expanduser(path)
+        self.timeout = timeout
+        self.poll = poll
+        self.sync = sync
+        self.lock = Lock()
+        self.pid = None
+        self.fd = None
+        self.map = None
+        self._open()
+        with self._locked():
+            if self.map[:len(MAGIC)] != MAGIC:
+                raise Exception('Not a reservoir file: {}'.format(self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        '''Number of bytes left.'''
+        with self._locked():
+            start, consumed = self._header()
+            # After a crash during compact, consumed may lie past the end.
+            return max(0, self._end(start) - consumed)
+
+    def close(self):
+        with self.lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+    def take(self, n, timeout=None):
+        '''Claim the next n bytes; returns them.'''
+        if timeout is None:
+            timeout = self.timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._locked():
+                start, consumed = self._header()
+                if self._end(start) - consumed >= n:
+                    self._set_header(start, consumed + n)
+                    self._flush()
+                    pos = HEADER_SIZE + consumed - start
+                    return self.map[pos:pos + n]
+                left = max(0, self._end(start) - consumed)
+            if time.monotonic() >= deadline:
+                raise ReservoirEmpty('Reservoir {}: {} bytes left, {} '
+                                     'needed!'.format(self.path, left, n))
+            time.sleep(self.poll)
+
+    def append(self, data):
+        '''Append data; returns its stream offset.'''
+        with self._locked():
+            start, _ = self._header()
+            size = os.fstat(self.fd).st_size
+            os.pwrite(self.fd, data, size)
+            if self.sync:
+                os.fsync(self.fd)
+            return start + size - HEADER_SIZE
+
+    def compact(self):
+        '''Drop the consumed bytes from the file; returns how many.'''
+        with self._locked():
+            start, consumed = self._header()
+            dropped = consumed - start
+            if dropped:
+                left = self.map[HEADER_SIZE + dropped:]
+                # Mark everything consumed while the bytes move: a crash in
+                # between loses the unconsumed bytes instead of serving the
+                # consumed ones again.
+                self._set_header(start, self._end(start))
+                self._flush()
+                os.pwrite(self.fd, left, HEADER_SIZE)
+                os.ftruncate(self.fd, HEADER_SIZE + len(left))
+                if self.sync:
+                    os.fsync(self.fd)
+                self._remap()
+                self._set_header(consumed, consumed)
+                self._flush()
+            return dropped
+
+    def entropy(self, nbytes=1 << 16, numpy=None):
+        '''An Entropy that takes nbytes at a time from the reservoir.'''
+        from .transforms import Entropy
+        return Entropy(refill=lambda: self.take(nbytes), numpy=numpy)
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            self._create()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.fd = os.open(self.path, os.O_RDWR)
+        self.pid = os.getpid()
+
+    def _create(self):
+        # Link a complete file into place, so nobody sees a partial header.
+        tmp = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 0, 0).ljust(HEADER_SIZE, b'\0'))
+        try:
+            os.link(tmp, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+
+    @contextmanager
+    def _locked(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                # After a fork, the descriptor and its flock are shared with
+                # the parent.
+                os.close(self.fd)
+                self._open()
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                self._remap()
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _remap(self):
+        # Other processes may have appended or compacted.
+        size = os.fstat(self.fd).st_size
+        if self.map is None or len(self.map) != size:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.fd, size)
+
+    def _header(self):
+        _, start, consumed = HEADER.unpack_from(self.map)
+        return start, consumed
+
+    def _set_header(self, start, consumed):
+        HEADER.pack_into(self.map, 0, MAGIC, start, consumed)
+
+    def _flush(self):
+        if self.sync:
+            self.map.flush(0, HEADER_SIZE)
+
+    def _end(self, start):
+        return start + len(self.map) - HEADER_SIZE
+
+
+class Filler:
+    '''Keeps a reservoir between the low and high water marks.
+
+    Blobs are fetched through ``rand`` (a RandomPy) in requests of up to
+    batch bytes whenever fewer than low bytes are left. With signed
+    requests, every signed result is appended to ``path + '.signed'`` as an
+    NDJSON line with the stream offset and size of its bytes. Only bytes
+    from random.org are stored; results of a local engine are rejected.
+    '''
+
+    def __init__(self, path, rand=None, low=1 << 20, high=8 << 20,
+                 batch=1 << 20, interval=1.0):
+        if rand is None:
+            rand = _remote_client({})
+        self.reservoir = Reservoir(path)
+        self.rand = rand
+        self.low = low
+        self.high = high
+        self.batch = batch
+        self.interval = interval
+
+    def fill(self):
+        '''Top the reservoir up if it is low; returns the bytes added.'''
+        left = len(self.reservoir)
+        if left >= self.low:
+            return 0
+        self.reservoir.compact()
+        added = 0
+        while left + added < self.high:
+            added += self._fetch(min(self.batch, self.high - left - added))
+        return added
+
+    def run(self, stop=None):
+        '''Fill every interval seconds until stop (an Event) is set.'''
+        stop = stop or Event()
+        while not stop.is_set():
+            self.fill()
+            stop.wait(self.interval)
+
+    def _fetch(self, nbytes):
+        from .engines import SOURCES
+        size = min(nbytes, MAX_BLOB_BYTES)
+        result = self.rand.blobs(-(-nbytes // size), size=size * 8,
+                                 format='base64', errorfunc=_fill_error,
+                                 successfunc=lambda resp: resp['result'])
+        if result.get('source') != SOURCES['remote']:
+            raise Exception('Reservoir fill got {} bytes, not random.org '
+                            'ones!'.format(result.get('source')))
+        data = b''.join(b64decode(x) for x in result['random']['data'])
+        offset = self.reservoir.append(data)
+        if 'signature' in result:
+            record = {'offset': offset, 'size': len(data),
+                      'random': result['random'],
+                      'signature': result['signature']}
+            with open(self.reservoir.path + '.signed', 'a') as f:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        return len(data)
+
+
+_fill_error = error_raise('Reservoir fill')
+
+
+def _remote_client(client):
+    # A RandomPy that only fetches from random.org, whatever the [engine]
+    # config says; a reservoir engine would read from the reservoir itself.
+    from .randompy import RandomPy
+    rand = RandomPy(**dict(client, engine='remote'))
+    rand.engine_fallback = False
+    return rand
+
+
+def _run_filler(path, client, options):
+    Filler(path, _remote_client(client), **options).run()
+
+
+def start_filler(path, client=None, **options):
+    '''Run a Filler in a background (daemon) process; returns the process.
+
+    client holds the RandomPy arguments of the process, options those of
+    the Filler.
+    '''
+    from multiprocessing import Process
+    Reservoir(path).close()
+    process = Process(target=_run_filler, args=(path, client or {}, options),
+                      daemon=True)
+    process.start()
+    return process
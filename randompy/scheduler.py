@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .api import ALIAS
+from math import ceil, log2
+from threading import Lock
+import time
+
+
+# Delay policies
+POLICIES = ('wait', 'reject')
+
+
+# Error codes meaning that a key ran out of requests or bits for today
+REQUESTS_EXHAUSTED = 402
+BITS_EXHAUSTED = 403
+
+
+# Approximate number of bits used per value
+BITS = {
+    'integers': lambda p: log2(p['max'] - p['min'] + 1),
+    'decimals': lambda p: p['decimalPlaces'] * log2(10),
+    'gaussians': lambda p: p['significantDigits'] * log2(10),
+    'strings': lambda p: p['length'] * log2(max(len(p['characters']), 1)),
+    'uuids': lambda p: 122,
+    'blobs': lambda p: p['size'],
+    'verify': lambda p: 0,
+}
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def estimate_bits(req):
+    '''Estimate the number of bits a request will use.'''
+    params = req['params']
+    alias = ALIAS[req['method']]
+    return int(ceil(params.get('n', 0) * BITS[alias](params)))
+
+
+class KeyState:
+
+    def __init__(self):
+        self.bits_left = None
+        self.requests_left = None
+        self.known_at = None
+        self.delay = 0.0
+        self.ready_at = 0.0
+
+    def forget(self, now, cooldown):
+        '''Drop quota info older than cooldown seconds (quotas reset).'''
+        if self.known_at is not None and now - self.known_at >= cooldown:
+            self.bits_left = None
+            self.requests_left = None
+            self.known_at = None
+
+
+class Scheduler:
+    '''Paces requests per API key using the usage info of the responses.
+
+    Before a request is sent, ``acquire`` waits out the advisoryDelay of the
+    previous response (or raises QuotaExceeded with the 'reject' policy)
+    and rejects requests that the remaining requests or bits of the key
+    cannot cover. Concurrent requests of a key are spaced one advisoryDelay
+    apart. ``update`` records the usage info of every response; quota info
+    is forgotten after cooldown seconds, so an exhausted key is tried again
+    once its quota may have been reset.
+    '''
+
+    _shared = {}
+    _shared_lock = Lock()
+
+    def __init__(self, policy='wait', cooldown=3600.0):
+        if policy not in POLICIES:
+            raise Exception('Unknown scheduler policy: {}'.format(policy))
+        self.policy = policy
+        self.cooldown = cooldown
+        self.keys = {}
+        self.lock = Lock()
+
+    @classmethod
+    def shared(cls, policy='wait', cooldown=3600.0):
+        '''Process-wide scheduler, so every client sees the same quotas.'''
+        with cls._shared_lock:
+            if (policy, cooldown) not in cls._shared:
+                cls._shared[policy, cooldown] = cls(policy, cooldown)
+            return cls._shared[policy, cooldown]
+
+    def state(self, key):
+        with self.lock:
+            return self.keys.setdefault(key, KeyState())
+
+    def reserve(self, req):
+        '''Reserve quota for req; returns the number of seconds to wait.'''
+        key = req['params'].get('apiKey')
+        if key is None:
+            return 0.0
+
+        cost = estimate_bits(req)
+        with self.lock:
+            now = time.monotonic()
+            state = self.keys.setdefault(key, KeyState())
+            state.forget(now, self.cooldown)
+            if state.requests_left is not None and state.requests_left < 1:
+                raise QuotaExceeded('No requests left for this key!')
+            if state.bits_left is not None and cost > state.bits_left:
+                raise QuotaExceeded('Request needs ~{} bits, {} left!'
+                                    .format(cost, state.bits_left))
+
+            start = max(now, state.ready_at)
+            wait = start - now
+            if wait and self.policy == 'reject':
+                raise QuotaExceeded('Advisory delay not over for {:.3f}s!'
+                                    .format(wait))
+            # The next request of this key goes one delay after this one.
+            state.ready_at = start + state.delay
+
+            if state.requests_left is not None:
+                state.requests_left -= 1
+            if state.bits_left is not None:
+                state.bits_left -= cost
+            return wait
+
+    def acquire(self, req):
+        time.sleep(self.reserve(req))
+
+    def update(self, req, resp):
+        key = req['params'].get('apiKey')
+        if key is None:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            state = self.keys.setdefault(key, KeyState())
+            if 'error' in resp:
+                code = resp['error'].get('code')
+                if code == REQUESTS_EXHAUSTED:
+                    state.requests_left = 0
+                    state.known_at = now
+                elif code == BITS_EXHAUSTED:
+                    state.bits_left = 0
+                    state.known_at = now
+                return
+
+            result = resp.get('result', {})
+            if 'requestsLeft' in result:
+                state.requests_left = result['requestsLeft']
+                state.known_at = now
+            if 'bitsLeft' in result:
+                state.bits_left = result['bitsLeft']
+                state.known_at = now
+            state.delay = result.get('advisoryDelay', 0) / 1000
+            # Slots already reserved by waiting requests are kept.
+            state.ready_at = max(state.ready_at, now + state.delay)
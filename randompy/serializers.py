@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+
+
+class RawJSON:
+    '''Already serialized JSON, embedded into a request as is.'''
+
+    def __init__(self, raw):
+        self.raw = raw
+
+
+class Response(dict):
+    '''Parsed JSON-RPC response that remembers its raw bytes.'''
+
+    def __init__(self, obj, raw):
+        super().__init__(obj)
+        self.raw = raw
+
+
+class Serializer:
+    '''Base class; subclasses implement _dumps (to bytes) and loads.'''
+
+    name = None
+
+    def dumps(self, obj):
+        raws = []
+        obj = self._strip(obj, raws)
+        data = self._dumps(obj)
+        for i, raw in enumerate(raws):
+            data = data.replace(self._token(i), raw, 1)
+        return data
+
+    def loads(self, data):
+        raise NotImplementedError
+
+    def _dumps(self, obj):
+        raise NotImplementedError
+
+    def _token(self, i):
+        return '"__randompy_raw_{}__"'.format(i).encode('ascii')
+
+    def _strip(self, obj, raws):
+        # Replace RawJSON values by placeholder strings.
+        if isinstance(obj, RawJSON):
+            raws.append(obj.raw)
+            return self._token(len(raws) - 1)[1:-1].decode('ascii')
+        if isinstance(obj, dict):
+            return {k: self._strip(v, raws) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self._strip(v, raws) for v in obj]
+        return obj
+
+
+class JSONSerializer(Serializer):
+
+    name = 'json'
+
+    def _dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonSerializer(Serializer):
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+
+    def _dumps(self, obj):
+        return self.orjson.dumps(obj)
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+
+class UjsonSerializer(Serializer):
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self.ujson = ujson
+
+    def _dumps(self, obj):
+        return self.ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return self.ujson.loads(data)
+
+
+SERIALIZERS = {
+    'orjson': OrjsonSerializer,
+    'ujson': UjsonSerializer,
+    'json': JSONSerializer,
+}
+
+
+def get_serializer(name='auto'):
+    '''Serializer by name; 'auto' picks the fastest one installed.'''
+    if name != 'auto':
+        if name not in SERIALIZERS:
+            raise Exception('Unknown serializer: {}'.format(name))
+        return SERIALIZERS[name]()
+    for cls in SERIALIZERS.values():
+        try:
+            return cls()
+        except ImportError:
+            continue
+
+
+def _skip_ws(raw, pos):
+    while raw[pos:pos + 1] in (b' ', b'\t', b'\n', b'\r'):
+        pos += 1
+    return pos
+
+
+def _string_end(raw, pos):
+    # pos is at the opening quote; returns the index after the closing one.
+    pos += 1
+    while True:
+        c = raw[pos]
+        if c == 0x5c:  # backslash
+            pos += 2
+        elif c == 0x22:  # quote
+            return pos + 1
+        else:
+            pos += 1
+
+
+def _value_end(raw, pos):
+    c = raw[pos:pos + 1]
+    if c == b'"':
+        return _string_end(raw, pos)
+    if c in (b'{', b'['):
+        depth = 0
+        while True:
+            c = raw[pos:pos + 1]
+            if c == b'"':
+                pos = _string_end(raw, pos)
+                continue
+            if c in (b'{', b'['):
+                depth += 1
+            elif c in (b'}', b']'):
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            pos += 1
+    while raw[pos:pos + 1] not in (b',', b'}', b']', b' ', b'\t', b'\n',
+                                   b'\r', b''):
+        pos += 1
+    return pos
+
+
+def raw_member(raw, *path):
+    '''Raw bytes of the value at path (object keys) in a JSON document.
+
+    Returns None if the path does not exist.
+    '''
+    pos = _skip_ws(raw, 0)
+    for key in path:
+        if raw[pos:pos + 1] != b'{':
+            return None
+        target = json.dumps(key).encode('utf-8')
+        pos = _skip_ws(raw, pos + 1)
+        while True:
+            if raw[pos:pos + 1] != b'"':
+                return None
+            end = _string_end(raw, pos)
+            name = raw[pos:end]
+            pos = _skip_ws(raw, _skip_ws(raw, end) + 1)
+            if name == target:
+                break
+            pos = _skip_ws(raw, _value_end(raw, pos))
+            if raw[pos:pos + 1] != b',':
+                return None
+            pos = _skip_ws(raw, pos + 1)
+    return raw[pos:_value_end(raw, pos)]
+
+
+def raw_random(resp):
+    '''Raw bytes of the signed random object of resp, if they are known.'''
+    raw = getattr(resp, 'raw', None)
+    if raw is None:
+        return None
+    return raw_member(raw, 'result', 'random')
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from base64 import b64decode
+from hashlib import sha512
+from hmac import compare_digest
+import json
+import os
+
+
+# DER encoded DigestInfo prefix for SHA-512 (RFC 8017, section 9.2)
+SHA512_PREFIX = bytes.fromhex('3051300d060960864801650304020305000440')
+
+
+# rsaEncryption object identifier (1.2.840.113549.1.1.1)
+RSA_OID = bytes.fromhex('2a864886f70d010101')
+
+
+class PublicKey:
+
+    def __init__(self, n, e):
+        self.n = n
+        self.e = e
+        self.size = (n.bit_length() + 7) // 8
+
+
+def _der_read(data, pos):
+    '''Read one DER element at pos; return (tag, value, next position).'''
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        count = length & 0x7f
+        length = int.from_bytes(data[pos:pos + count], 'big')
+        pos += count
+    return tag, data[pos:pos + length], pos + length
+
+
+def _der_children(data):
+    pos = 0
+    while pos < len(data):
+        tag, value, pos = _der_read(data, pos)
+        yield tag, value
+
+
+def parse_public_key(der):
+    '''Parse a DER encoded RSA public key.
+
+    Both SubjectPublicKeyInfo ("BEGIN PUBLIC KEY") and PKCS#1
+    ("BEGIN RSA PUBLIC KEY") structures are accepted.
+    '''
+    _, body, _ = _der_read(der, 0)
+    children = list(_der_children(body))
+    if children[0][0] == 0x30:
+        # SubjectPublicKeyInfo: algorithm identifier + bit string
+        algorithm, bits = children[0][1], children[1][1]
+        if next(_der_children(algorithm))[1] != RSA_OID:
+            raise Exception('Public key is not an RSA key!')
+        return parse_public_key(bits[1:])
+    n, e = (int.from_bytes(v, 'big') for _, v in children[:2])
+    return PublicKey(n, e)
+
+
+def load_public_key(path):
+    '''Load an RSA public key from a PEM or DER file.'''
+    with open(os.path.expanduser(path), 'rb') as f:
+        data = f.read()
+    if data.lstrip().startswith(b'-----BEGIN'):
+        lines = data.strip().splitlines()
+        data = b64decode(b''.join(line for line in lines
+                                  if not line.startswith(b'-----')))
+    return parse_public_key(data)
+
+
+def serialize(random):
+    '''Serialize a random object the way random.org signs it.'''
+    return json.dumps(random, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+def encode(message, size):
+    '''EMSA-PKCS1-v1_5 encoding of the SHA-512 digest of message.'''
+    digest = SHA512_PREFIX + sha512(message).digest()
+    padding = b'\x00\x01' + b'\xff' * (size - len(digest) - 3) + b'\x00'
+    return padding + digest
+
+
+def verify(message, signature, key):
+    '''Check a base64 RSASSA-PKCS1-v1_5 SHA-512 signature over message.'''
+    try:
+        sig = b64decode(signature)
+    except ValueError:
+        return False
+    if len(sig) != key.size:
+        return False
+    m = pow(int.from_bytes(sig, 'big'), key.e, key.n)
+    return compare_digest(m.to_bytes(key.size, 'big'),
+                          encode(message, key.size))
+
+
+def verify_result(result, key, raw=None):
+    '''Verify the signature of a signed result object.
+
+    raw are the bytes of the random object as received, if known; otherwise
+    the object is serialized again.
+    '''
+    message = raw if raw is not None else serialize(result['random'])
+    return verify(message, result['signature'], key)
+
+
+def verify_many(results, key):
+    '''Verify a batch of signed result objects; returns a list of bools.'''
+    return [verify_result(result, key) for result in results]
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .chunking import truthy
+
+
+# Maximum number of values per API call
+MAX_N = {
+    'integers': 10000,
+    'decimals': 10000,
+    'gaussians': 10000,
+    'strings': 10000,
+    'uuids': 1000,
+    'blobs': 100,
+}
+
+
+# Largest blob the API serves, in bytes
+MAX_BLOB_BYTES = 131072
+
+
+BLOB_FORMATS = [
+    'base64',
+    'hex',
+]
+
+
+class Field:
+    '''One request parameter: how to coerce it and which values are allowed.
+
+    check is a predicate on the coerced value; allowed describes it in
+    error messages.
+    '''
+
+    def __init__(self, name, coerce, check=None, allowed=None):
+        self.name = name
+        self.coerce = coerce
+        self.check = check
+        self.allowed = allowed
+
+    def error(self, value):
+        return '{}={!r} (allowed: {})'.format(self.name, value, self.allowed)
+
+
+def between(name, coerce, low, high):
+    return Field(name, coerce, lambda x: low <= x <= high,
+                 '{:g}..{:g}'.format(low, high))
+
+
+def one_of(name, coerce, choices):
+    return Field(name, coerce, lambda x: x in choices,
+                 ', '.join(map(str, choices)))
+
+
+def count(method):
+    return between('n', int, 1, MAX_N[method])
+
+
+class Spec:
+    '''Validator and normalizer for the parameters of one method.
+
+    The checks are collected once at construction; validating a valid
+    request only runs the predicates, error messages are built on failure.
+    '''
+
+    def __init__(self, method, *fields):
+        self.method = method
+        self.fields = fields
+        self.keys = tuple(f.name for f in fields if f.name != 'n')
+        self.checks = tuple((f.name, f.check) for f in fields
+                            if f.check is not None)
+        self.by_name = {f.name: f for f in fields}
+
+    def ok(self, params):
+        '''Fast path: True if all present parameters are allowed.'''
+        for name, check in self.checks:
+            if name in params and not check(params[name]):
+                return False
+        return True
+
+    def results(self, params):
+        '''Map every checked parameter present in params to its result.'''
+        return {name: check(params[name]) for name, check in self.checks
+                if name in params}
+
+    def errors(self, params):
+        '''Describe every parameter that is not allowed.'''
+        return [self.by_name[name].error(params[name])
+                for name, check in self.checks
+                if name in params and not check(params[name])]
+
+    def check(self, params):
+        if not self.ok(params):
+            raise Exception('Argument constraints violated: {}'.format(
+                            ', '.join(self.errors(params))))
+
+    def normalize(self, values):
+        '''Coerce and check the values of all fields in one pass.
+
+        Returns the request parameters; raises naming every failing field.
+        '''
+        params = {}
+        errors = []
+        for f in self.fields:
+            try:
+                value = f.coerce(values[f.name])
+            except (TypeError, ValueError):
+                errors.append(f.error(values[f.name]))
+                continue
+            if f.check is not None and not f.check(value):
+                errors.append(f.error(value))
+            params[f.name] = value
+        if errors:
+            raise Exception('Argument constraints violated: {}'.format(
+                            ', '.join(errors)))
+        return params
+
+
+SPECS = {
+    'integers': Spec(
+        'integers',
+        count('integers'),
+        between('min', int, -1e9, 1e9),
+        between('max', int, -1e9, 1e9),
+        Field('replacement', truthy),
+        one_of('base', int, (2, 8, 10, 12)),
+    ),
+    'decimals': Spec(
+        'decimals',
+        count('decimals'),
+        between('decimalPlaces', int, 1, 20),
+        Field('replacement', truthy),
+    ),
+    'gaussians': Spec(
+        'gaussians',
+        count('gaussians'),
+        between('mean', float, -1e6, 1e6),
+        between('standardDeviation', float, -1e6, 1e6),
+        between('significantDigits', int, 2, 20),
+    ),
+    'strings': Spec(
+        'strings',
+        count('strings'),
+        between('length', int, 1, 20),
+        Field('characters', str, lambda x: 1 <= len(x) <= 80,
+              '1..80 characters'),
+        Field('replacement', truthy),
+    ),
+    'uuids': Spec(
+        'uuids',
+        count('uuids'),
+    ),
+    'blobs': Spec(
+        'blobs',
+        count('blobs'),
+        Field('size', int, lambda x: 1 <= x <= 1048576 and x % 8 == 0,
+              '1..1048576, divisible by 8'),
+        one_of('format', str, BLOB_FORMATS),
+    ),
+    'verify': Spec(
+        'verify',
+        Field('random', lambda x: x),
+        Field('signature', str),
+    ),
+}
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Local stand-in for the random.org JSON-RPC API.
+
+Serves every method in randompy.randompy.METHODS, including the signed
+variants and verifySignature, with configurable latency, error injection
+and per-key quotas. Meant for tests and benchmarks; the values are not
+suitable for anything that needs real randomness.
+'''
+
+from .api import ALIAS
+from .engines import GENERATORS
+from .signature import PublicKey, encode, serialize, verify
+from .specs import SPECS
+from base64 import b64encode
+from datetime import datetime, timezone
+from hashlib import sha512
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+import json
+import random
+import time
+
+
+# JSON-RPC and random.org error codes used by the stand-in
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INJECTED_ERROR = -32000
+REQUESTS_EXHAUSTED = 402
+BITS_EXHAUSTED = 403
+
+
+def _is_prime(n, rng, rounds=40):
+    if n < 4:
+        return n in (2, 3)
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _prime(bits, rng):
+    while True:
+        n = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if _is_prime(n, rng):
+            return n
+
+
+def _inverse(a, m):
+    '''Inverse of a modulo m (extended Euclid; pow(a, -1, m) needs 3.8).'''
+    r0, r1, s0, s1 = m, a % m, 0, 1
+    while r1:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        s0, s1 = s1, s0 - q * s1
+    if r0 != 1:
+        raise ValueError('{} has no inverse modulo {}'.format(a, m))
+    return s0 % m
+
+
+def generate_key(bits=1024, rng=None):
+    '''Generate an RSA key pair; returns (PublicKey, private exponent).'''
+    rng = rng or random.SystemRandom()
+    e = 65537
+    while True:
+        p, q = _prime(bits // 2, rng), _prime(bits // 2, rng)
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % e:
+            return PublicKey(p * q, e), _inverse(e, phi)
+
+
+class Quota:
+
+    def __init__(self, requests, bits):
+        self.requests = requests
+        self.bits = bits
+
+
+class StandIn:
+    '''The JSON-RPC logic of the stand-in, independent of HTTP.'''
+
+    def __init__(self, latency=0.0, error_rate=0.0, requests=1000,
+                 bits=250000, advisory_delay=0, key_bits=1024, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = requests
+        self.bits = bits
+        self.advisory_delay = advisory_delay
+        self.rng = random.Random(seed)
+        self.public_key, self.private_exponent = generate_key(key_bits,
+                                                              self.rng)
+        self.quotas = {}
+        self.serial = 0
+        self.lock = Lock()
+
+    def handle(self, body):
+        '''Answer a raw request body; returns the raw response body.'''
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            req = json.loads(body.decode('utf-8'))
+        except ValueError:
+            return self._dumps(self._error(None, PARSE_ERROR, 'Parse error'))
+        if isinstance(req, list):
+            return self._dumps([self.answer(r) for r in req])
+        return self._dumps(self.answer(req))
+
+    def answer(self, req):
+        rID = req.get('id')
+        method = req.get('method')
+        params = req.get('params', {})
+        if method not in ALIAS:
+            return self._error(rID, METHOD_NOT_FOUND, 'Method not found')
+        spec = SPECS[ALIAS[method]]
+        if not spec.ok(params):
+            return self._error(rID, INVALID_PARAMS, ', '.join(
+                               spec.errors(params)))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return self._error(rID, INJECTED_ERROR, 'Injected error')
+
+        if method == 'verifySignature':
+            authentic = verify(serialize(params['random']),
+                               params['signature'], self.public_key)
+            return {'jsonrpc': '2.0', 'id': rID,
+                    'result': {'authenticity': authentic}}
+        return self._generate(rID, method, params)
+
+    def sign(self, message):
+        key = self.public_key
+        m = int.from_bytes(encode(message, key.size), 'big')
+        sig = pow(m, self.private_exponent, key.n)
+        return b64encode(sig.to_bytes(key.size, 'big')).decode('ascii')
+
+    def _generate(self, rID, method, params):
+        alias = ALIAS[method]
+        key = params.get('apiKey')
+        with self.lock:
+            quota = self.quotas.setdefault(key, Quota(self.requests,
+                                                      self.bits))
+            if quota.requests < 1:
+                return self._error(rID, REQUESTS_EXHAUSTED,
+                                   'Daily request allowance exceeded')
+            data, bits = GENERATORS[alias](self.rng, params)
+            if bits > quota.bits:
+                return self._error(rID, BITS_EXHAUSTED,
+                                   'Daily bit allowance exceeded')
+            quota.requests -= 1
+            quota.bits -= bits
+            self.serial += 1
+            serial = self.serial
+
+        completion = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%SZ')
+        random_obj = {'data': data, 'completionTime': completion}
+        result = {'random': random_obj, 'bitsUsed': bits,
+                  'bitsLeft': quota.bits, 'requestsLeft': quota.requests,
+                  'advisoryDelay': self.advisory_delay}
+
+        if 'Signed' in method:
+            hashed = b64encode(sha512(str(key).encode('utf-8')).digest())
+            random_obj = dict(params, method=method, data=data,
+                              hashedApiKey=hashed.decode('ascii'),
+                              completionTime=completion,
+                              serialNumber=serial)
+            del random_obj['apiKey']
+            result['random'] = random_obj
+            result['signature'] = self.sign(serialize(random_obj))
+
+        return {'jsonrpc': '2.0', 'id': rID, 'result': result}
+
+    def _error(self, rID, code, message):
+        return {'jsonrpc': '2.0', 'id': rID,
+                'error': {'code': code, 'message': message, 'data': None}}
+
+    def _dumps(self, resp):
+        # Same serialization as the signed objects, so their raw bytes can
+        # be cut out of the response.
+        return serialize(resp)
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.server.standin.handle(self.rfile.read(length))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer:
+    '''HTTP server around StandIn, running in a background thread.
+
+    Use as a context manager; clients talk to ``url``, and local signature
+    verification works with ``public_key``.
+    '''
+
+    def __init__(self, host='127.0.0.1', port=0, **options):
+        self.standin = StandIn(**options)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.standin = self.standin
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://{}:{}/json-rpc/1/invoke'.format(host, port)
+
+    @property
+    def public_key(self):
+        return self.standin.public_key
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .engines import SOURCES
+from .functions import error_raise
+from .specs import MAX_N
+from concurrent.futures import Future, ThreadPoolExecutor
+import time
+
+
+_errorfunc = error_raise('Stream request')
+
+
+def _successfunc(resp):
+    return resp['result']
+
+
+class ChunkFetcher:
+    '''Fetches the chunks of a stream one request at a time.
+
+    Honours the advisoryDelay of the previous response and reports the end
+    of the stream (None) once requestsLeft or bitsLeft says that the next
+    chunk cannot be served.
+    '''
+
+    def __init__(self, rand, method, chunk_size=None, **params):
+        self.rand = rand
+        self.method = method
+        self.chunk_size = chunk_size or MAX_N[method]
+        self.params = params
+        self.ready_at = 0.0
+        self.exhausted = False
+
+    def kwargs(self):
+        return dict(self.params, method=self.method, number=self.chunk_size,
+                    errorfunc=_errorfunc, successfunc=_successfunc)
+
+    def wait_time(self):
+        return max(0.0, self.ready_at - time.monotonic())
+
+    def update(self, result):
+        '''Record a chunk's result; returns its data.'''
+        delay = result.get('advisoryDelay', 0) / 1000
+        self.ready_at = time.monotonic() + delay
+        if result.get('requestsLeft') == 0:
+            self.exhausted = True
+        # Locally generated results carry no quota.
+        if result.get('bitsLeft', float('inf')) < result.get('bitsUsed', 0):
+            self.exhausted = True
+        return result['random']['data']
+
+    def __call__(self):
+        if self.exhausted:
+            return None
+        time.sleep(self.wait_time())
+        return self.update(self.rand.generate(**self.kwargs()))
+
+    def submit(self):
+        '''Fetch the next chunk and verify it in the background.
+
+        Returns a Future of the chunk's data (None at the end of the
+        stream); failures are raised by the Future, in stream order.
+        '''
+        if self.exhausted:
+            return None
+        time.sleep(self.wait_time())
+        rand = self.rand
+        kwargs = rand._prepare(**self.kwargs())
+        try:
+            resp = rand._unverified(**kwargs)
+        except Exception as e:
+            self.exhausted = True
+            future = Future()
+            future.set_exception(e)
+            return future
+        if 'result' in resp:
+            self.update(resp['result'])
+        else:
+            self.exhausted = True
+
+        future = Future()
+        remote = SOURCES['remote']
+        if resp.get('result', {}).get('source', remote) != remote:
+            # Generated locally, so there is no signature to verify.
+            verified = Future()
+            verified.set_result(resp)
+        else:
+            verified = rand._verify_later(kwargs, resp)
+        verified.add_done_callback(lambda f: self._finish(f, kwargs, future))
+        return future
+
+    def _finish(self, verified, kwargs, future):
+        try:
+            resp = self.rand._finish(verified.result(), **kwargs)
+            future.set_result(resp['random']['data'])
+        except Exception as e:
+            future.set_exception(e)
+
+
+def _pipelined(fetch):
+    pending = None
+    while True:
+        future = fetch.submit()
+        if pending is not None:
+            yield from pending.result()
+        if future is None:
+            return
+        pending = future
+
+
+def stream(rand, method, chunk_size=None, prefetch=False, **params):
+    '''Lazily yield values, fetching chunk_size values per request.
+
+    With prefetch, the next chunk is requested in the background while the
+    current one is consumed. With a pipelined signed client, the next chunk
+    is fetched while the previous one is verified; values are only yielded
+    once their chunk has been verified.
+    '''
+    fetch = ChunkFetcher(rand, method, chunk_size, **params)
+    if rand.signed and rand.pipeline and fetch.chunk_size <= MAX_N[method]:
+        yield from _pipelined(fetch)
+        return
+    if not prefetch:
+        while True:
+            data = fetch()
+            if data is None:
+                return
+            yield from data
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch)
+        try:
+            while True:
+                data = future.result()
+                if data is None:
+                    return
+                future = executor.submit(fetch)
+                yield from data
+        finally:
+            future.cancel()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Distributions derived locally from raw random.org entropy.
+
+An Entropy object holds the decoded bytes of one or more blobs and turns them
+into values of many distributions, consuming the bytes in order. With NumPy
+installed the transforms are vectorized and return NumPy arrays; without it
+they run in pure Python and return lists.
+'''
+
+from bisect import bisect_right
+from itertools import accumulate
+import math
+
+
+# Bytes per candidate word, by the number of random bits needed
+WIDTHS = (1, 2, 4, 8)
+
+
+# Native array/memoryview formats and NumPy dtypes per word width
+FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+DTYPES = {1: 'uint8', 2: 'uint16', 4: 'uint32', 8: 'uint64'}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _width(bits):
+    for w in WIDTHS:
+        if bits <= 8 * w:
+            return w
+    raise Exception('Ranges above 2**64 are not supported!')
+
+
+def _poisson_table(lam):
+    '''Cumulative Poisson probabilities up to where they reach 1.0.'''
+    if lam <= 0:
+        raise Exception('Poisson mean must be positive!')
+    # Start from the mode in log space, so large means do not underflow.
+    mode = int(lam)
+    log_p = mode * math.log(lam) - lam - math.lgamma(mode + 1)
+    p = math.exp(log_p)
+    probs = {mode: p}
+    k, q = mode, p
+    while k > 0 and q > 0:
+        q *= k / lam
+        k -= 1
+        probs[k] = q
+    k, q = mode, p
+    while q > 1e-300 and (q > 1e-17 * p or k < lam):
+        k += 1
+        q *= lam / k
+        probs[k] = q
+    low = min(probs)
+    cdf = list(accumulate(probs[i] for i in range(low, max(probs) + 1)))
+    total = cdf[-1]
+    return low, [c / total for c in cdf]
+
+
+class Entropy:
+    '''Random bytes and the distributions derived from them.
+
+    data is any bytes-like object. When it runs out, refill() is called for
+    more bytes if given; otherwise an exception is raised. Every value is
+    derived from bytes that no other value used.
+    '''
+
+    def __init__(self, data=b'', refill=None, numpy=None):
+        self.buffer = bytes(data)
+        self.pos = 0
+        self.refill = refill
+        if numpy is None or numpy:
+            self.np = _numpy()
+            if numpy and self.np is None:
+                raise Exception('Vectorized transforms need numpy to be '
+                                'installed!')
+        else:
+            self.np = None
+
+    def __len__(self):
+        '''Number of bytes left.'''
+        return len(self.buffer) - self.pos
+
+    def take(self, n):
+        '''The next n bytes.'''
+        while len(self) < n:
+            if self.refill is None:
+                raise Exception('Entropy exhausted: {} bytes left, {} needed!'
+                                .format(len(self), n))
+            self.buffer = self.buffer[self.pos:] + bytes(self.refill())
+            self.pos = 0
+        out = self.buffer[self.pos:self.pos + n]
+        self.pos += n
+        return out
+
+    def words(self, n, width):
+        '''n unsigned integers of width bytes each.'''
+        data = self.take(n * width)
+        if self.np is not None:
+            return self.np.frombuffer(data, dtype=DTYPES[width])
+        return memoryview(data).cast(FORMATS[width]).tolist()
+
+    def integers(self, n, low, high):
+        '''n unbiased integers between low and high (inclusive).
+
+        Candidates with just enough bits for the range are drawn and those
+        outside of it are rejected, so every value is equally likely.
+        '''
+        size = high - low + 1
+        if size < 1:
+            raise Exception('Empty range: {}..{}'.format(low, high))
+        bits = (size - 1).bit_length()
+        width = _width(bits)
+        mask = (1 << bits) - 1
+        if self.np is not None:
+            return self._np_integers(n, low, size, width, mask)
+
+        out = []
+        while len(out) < n:
+            need = n - len(out)
+            for x in self.words(need + need // 2 + 8, width):
+                x &= mask
+                if x < size:
+                    out.append(low + x)
+                    if len(out) == n:
+                        break
+        return out
+
+    def _np_integers(self, n, low, size, width, mask):
+        np = self.np
+        dtype = DTYPES[width]
+        if n == 0:
+            return np.zeros(0, 'int64')
+        chunks = []
+        have = 0
+        while have < n:
+            need = n - have
+            x = self.words(need + need // 2 + 8, width)
+            x = x & np.array(mask, dtype)
+            if size <= mask:
+                x = x[x < np.array(size, dtype)]
+            chunks.append(x[:need])
+            have += len(chunks[-1])
+        x = np.concatenate(chunks)
+        if -2 ** 63 <= low and low + size <= 2 ** 63:
+            return x.astype('int64') + low
+        return x.astype(object) + low
+
+    def floats(self, n):
+        '''n uniform floats in [0, 1) with 53 random bits each.'''
+        words = self.words(n, 8)
+        if self.np is not None:
+            return (words >> self.np.uint64(11)) * 2.0 ** -53
+        return [(x >> 11) * 2.0 ** -53 for x in words]
+
+    def gaussians(self, n, mean=0.0, sd=1.0):
+        '''n normal values (Box-Muller), any mean and standard deviation.'''
+        pairs = (n + 1) // 2
+        u1, u2 = self.floats(pairs), self.floats(pairs)
+        if self.np is not None:
+            np = self.np
+            r = np.sqrt(-2.0 * np.log1p(-u1))
+            z = np.concatenate([r * np.cos(2 * np.pi * u2),
+                                r * np.sin(2 * np.pi * u2)])
+            return mean + sd * z[:n]
+        out = []
+        for a, b in zip(u1, u2):
+            r = math.sqrt(-2.0 * math.log1p(-a))
+            out.append(mean + sd * r * math.cos(2 * math.pi * b))
+            out.append(mean + sd * r * math.sin(2 * math.pi * b))
+        return out[:n]
+
+    def exponential(self, n, rate=1.0):
+        '''n exponentially distributed values with the given rate.'''
+        u = self.floats(n)
+        if self.np is not None:
+            return -self.np.log1p(-u) / rate
+        return [-math.log1p(-x) / rate for x in u]
+
+    def poisson(self, n, lam):
+        '''n Poisson distributed counts with mean lam (by inversion).'''
+        low, cdf = _poisson_table(lam)
+        u = self.floats(n)
+        if self.np is not None:
+            np = self.np
+            k = np.searchsorted(np.array(cdf), u, side='right')
+            return np.minimum(k, len(cdf) - 1).astype('int64') + low
+        return [low + min(bisect_right(cdf, x), len(cdf) - 1) for x in u]
+
+    def shuffle(self, seq):
+        '''A uniformly shuffled copy of seq.
+
+        Items are sorted by random 64-bit keys; keys are drawn again in the
+        (unlikely) case of a tie, so every order is equally likely.
+        '''
+        items = list(seq)
+        while True:
+            keys = self.words(len(items), 8)
+            if self.np is not None:
+                if len(self.np.unique(keys)) == len(items):
+                    order = self.np.argsort(keys).tolist()
+                    break
+            elif len(set(keys)) == len(items):
+                order = sorted(range(len(items)), key=keys.__getitem__)
+                break
+        return [items[i] for i in order]
+
+    def choice(self, population, n, weights=None):
+        '''n items of population, picked with replacement.
+
+        Without weights every item is equally likely (unbiased); with
+        weights, item i is picked with probability weights[i] / sum(weights).
+        '''
+        items = list(population)
+        if weights is None:
+            picks = self.integers(n, 0, len(items) - 1)
+        else:
+            if len(weights) != len(items):
+                raise Exception('Need one weight per item!')
+            cum = list(accumulate(weights))
+            if cum[-1] <= 0:
+                raise Exception('Weights must add up to more than zero!')
+            u = self.floats(n)
+            if self.np is not None:
+                picks = self.np.searchsorted(self.np.array(cum),
+                                             u * cum[-1], side='right')
+            else:
+                picks = [bisect_right(cum, x * cum[-1]) for x in u]
+        if self.np is not None:
+            picks = picks.tolist()
+        # Rounding may push u * total onto the last bound.
+        last = len(items) - 1
+        return [items[min(i, last)] for i in picks]
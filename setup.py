@@ -17,6 +17,10 @@ setup(
     author_email='mail@koendercksen.com',
     url='http://github.com/KDercksen/randompy',
     install_requires=[str(ir.req) for ir in install_reqs],
+    extras_require={
+        'async': ['aiohttp'],
+        'numpy': ['numpy'],
+    },
     packages=find_packages(exclude=['tests']),
     entry_points={
         'console_scripts': ['randompy=randompy.__main__:main'],
@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''Shared fakes for the tests (not collected as tests itself).'''
+
+from random import randint, sample
+
+
+def fake_post(req):
+    '''Answer a generateIntegers request like random.org would.'''
+    params = req['params']
+    if params.get('replacement', True):
+        data = [randint(params['min'], params['max'])
+                for _ in range(params['n'])]
+    else:
+        data = sample(range(params['min'], params['max'] + 1), params['n'])
+    return {'jsonrpc': '2.0', 'id': req['id'], 'result': {
+        'random': {'data': data, 'n': params['n']}, 'bitsUsed': params['n'],
+        'bitsLeft': 1000, 'requestsLeft': 10, 'advisoryDelay': 0}}
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_raises
+from randompy import AsyncRandomAPI, AsyncRandomPy
+from randompy.aio import gather
+from randompy.engines import LocalEngine
+from unittest.mock import patch
+import asyncio
+import threading
+
+
+def fake_post(req):
+    params = req['params']
+    if req['method'] == 'verifySignature':
+        return {'jsonrpc': '2.0', 'id': req['id'],
+                'result': {'authenticity': True}}
+    return {'jsonrpc': '2.0', 'id': req['id'], 'result': {
+        'random': {'data': list(range(params['n']))},
+        'signature': 'sig', 'bitsUsed': params['n']}}
+
+
+class TestGather:
+
+    def setup(self):
+        self.loop = asyncio.new_event_loop()
+
+    def teardown(self):
+        self.loop.close()
+
+    def test_order_and_limit(self):
+        running = []
+        peak = []
+
+        async def job(i):
+            running.append(i)
+            peak.append(len(running))
+            await asyncio.sleep(0.001 * (5 - i))
+            running.remove(i)
+            return i
+
+        out = self.loop.run_until_complete(
+            gather(*(job(i) for i in range(5)), limit=2))
+        assert out == [0, 1, 2, 3, 4]
+        assert max(peak) == 2
+
+
+class TestAsyncGenerate:
+
+    def setup(self):
+        self.loop = asyncio.new_event_loop()
+        self.r = AsyncRandomPy(key='key', workers=2)
+        self.patcher = patch.object(AsyncRandomAPI, '_post',
+                                    side_effect=fake_post)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.loop.close()
+        self.r = None
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_integers(self):
+        resp = self.run(self.r.integers(3, min=0, max=10))
+        assert resp['random']['data'] == [0, 1, 2]
+        methods = [c[0][0]['method'] for c in self.mock_post.call_args_list]
+        assert methods == ['generateSignedIntegers', 'verifySignature']
+
+    def test_chunked(self):
+        resp = self.run(self.r.uuids(2500))
+        assert len(resp['random']['data']) == 2500
+        assert len(resp['chunks']) == 3
+
+    def test_successfunc(self):
+        data = self.run(self.r.blobs(2, successfunc=lambda r: 'ok'))
+        assert data == 'ok'
+
+    def test_verification_failed(self):
+        def post(req):
+            resp = fake_post(req)
+            if req['method'] == 'verifySignature':
+                resp['result']['authenticity'] = False
+            return resp
+        self.mock_post.side_effect = post
+        assert_raises(Exception, self.run, self.r.integers(1))
+
+    def test_id_mismatch(self):
+        self.mock_post.side_effect = lambda req: dict(fake_post(req), id=-1)
+        assert_raises(Exception, self.run, self.r.integers(1))
+
+    def test_invalid(self):
+        assert_raises(Exception, self.run, self.r.integers(1, base=7))
+
+    def test_batch_rejected(self):
+        assert_raises(TypeError, self.r.batch)
+
+    def test_submit(self):
+        async def submit():
+            task = await self.r.submit('integers', 3, min=0, max=10)
+            return await task
+        assert self.run(submit())['random']['data'] == [0, 1, 2]
+
+    def test_map(self):
+        self.r.in_flight = 2
+        running = []
+        peak = []
+        generate = self.r.generate
+
+        async def tracked(**kwargs):
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.001)
+            running.pop()
+            return await generate(**kwargs)
+
+        async def collect():
+            return [resp['random']['data']
+                    async for resp in self.r.map('integers', [1, 2, 3, 4],
+                                                 min=0, max=10)]
+
+        with patch.object(self.r, 'generate', side_effect=tracked):
+            data = self.run(collect())
+        assert data == [[0], [0, 1], [0, 1, 2], [0, 1, 2, 3]]
+        assert max(peak) <= 2
+
+    def test_engine_off_the_loop(self):
+        self.r.engine = LocalEngine()
+        threads = []
+        generate = self.r._generate_engine
+
+        def record(**kwargs):
+            threads.append(threading.current_thread())
+            return generate(**kwargs)
+
+        with patch.object(self.r, '_generate_engine', side_effect=record):
+            resp = self.run(self.r.integers(3, min=0, max=10))
+        assert resp['source'] == 'local'
+        assert threads and threads[0] is not threading.main_thread()
+
+
+class FakeAiohttp:
+    '''Stands in for the aiohttp module; post replies with the replies.'''
+
+    class ClientConnectionError(Exception):
+        pass
+
+    class ClientConnectorError(ClientConnectionError):
+        pass
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.posts = 0
+
+    def TCPConnector(self, **kwargs):
+        return None
+
+    def ClientTimeout(self, **kwargs):
+        return None
+
+    def ClientSession(self, **kwargs):
+        return self
+
+    def post(self, url, data=None, headers=None):
+        self.posts += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return FakeReply(*reply)
+
+
+class FakeReply:
+
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def read(self):
+        return self.body
+
+
+class TestAiohttpPost:
+
+    def setup(self):
+        self.loop = asyncio.new_event_loop()
+        self.api = AsyncRandomAPI('url', retries=2, backoff=0)
+
+    def teardown(self):
+        self.loop.close()
+
+    def post(self, *replies):
+        self.aiohttp = FakeAiohttp(replies)
+        self.api.client = None
+        with patch('randompy.aio._aiohttp', return_value=self.aiohttp):
+            return self.loop.run_until_complete(self.api._post({'id': 1}))
+
+    def test_retry_status(self):
+        assert self.post((503, b''), (200, b'{"id": 1}')) == {'id': 1}
+        assert self.aiohttp.posts == 2
+
+    def test_no_retry(self):
+        assert self.post((502, b'{"id": 1}')) == {'id': 1}
+        assert self.aiohttp.posts == 1
+
+    def test_retries_exhausted(self):
+        body = b'{"id": 1, "error": {}}'
+        assert 'error' in self.post(*[(503, body)] * 3)
+        assert self.aiohttp.posts == 3
+
+    def test_connection_errors(self):
+        error = FakeAiohttp.ClientConnectorError('refused')
+        assert self.post(error, (200, b'{"id": 1}')) == {'id': 1}
+        assert_raises(FakeAiohttp.ClientConnectorError, self.post,
+                      *[error] * 3)
+        assert_raises(FakeAiohttp.ClientConnectionError, self.post,
+                      FakeAiohttp.ClientConnectionError('disconnected'),
+                      (200, b'{"id": 1}'))
+        assert self.aiohttp.posts == 1
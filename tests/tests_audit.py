@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_raises
+from randompy import RandomPy
+from randompy.audit import AuditLog, audit, entries, gaps, log_files
+from randompy.standin import StandInServer
+from unittest.mock import patch
+import json
+import os
+import shutil
+import tempfile
+
+
+class TestGaps:
+
+    def test_gaps(self):
+        assert gaps([3, 1, 2]) == ([], [])
+        assert gaps([1, 2, 5, 5, 9]) == ([(3, 4), (6, 8)], [5])
+        assert gaps([]) == ([], [])
+
+
+class TestAuditLog:
+
+    def setup(self):
+        self.server = StandInServer(seed=6, bits=10 ** 9)
+        self.server.start()
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'audit')
+
+    def teardown(self):
+        self.server.stop()
+        shutil.rmtree(self.dir)
+
+    def client(self, log, **kwargs):
+        return RandomPy(key='k', url=self.server.url, audit=log, **kwargs)
+
+    def fill(self, format='ndjson', max_bytes=1 << 20, n=6, **kwargs):
+        with AuditLog(self.path, format=format, max_bytes=max_bytes) as log:
+            r = self.client(log, **kwargs)
+            for _ in range(n):
+                r.integers(5, min=1, max=6)
+        return r
+
+    def test_ndjson(self):
+        self.fill()
+        with open(self.path) as f:
+            lines = [json.loads(line) for line in f]
+        assert [e['serialNumber'] for e in lines] == list(range(1, 7))
+        assert all('signature' in e and 'logged' in e for e in lines)
+        assert all(len(e['random']['data']) == 5 for e in lines)
+
+    def test_verify_locally(self):
+        self.fill(format='binary')
+        report = audit(self.path, public_key=self.server.public_key,
+                       workers=2)
+        assert report['entries'] == 6
+        assert report['failed'] == report['gaps'] == []
+        assert report['rate'] > 0
+
+    def test_verify_remotely(self):
+        self.fill()
+        report = audit(self.path, workers=2,
+                       client={'key': 'k', 'url': self.server.url})
+        assert report['entries'] == 6
+        assert report['failed'] == []
+
+    def test_rotation(self):
+        self.fill(max_bytes=600, n=5)
+        files = log_files(self.path)
+        assert len(files) > 1
+        assert files[-1] == self.path
+        assert files[0] == self.path + '.1'
+        assert all(os.path.getsize(f) <= 600 for f in files)
+        report = audit(self.path, public_key=self.server.public_key,
+                       workers=2)
+        assert report['entries'] == 5
+        assert report['gaps'] == []
+
+    def test_binary_rotation(self):
+        self.fill(format='binary', max_bytes=1000, n=4)
+        assert len(log_files(self.path)) > 1
+        assert len(list(entries(self.path))) == 4
+
+    def test_tampered(self):
+        self.fill()
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        lines[1] = lines[1].replace('"data":[', '"data":[7,')
+        del lines[3]
+        with open(self.path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        report = audit(self.path, public_key=self.server.public_key,
+                       workers=2)
+        assert [serial for _, serial in report['failed']] == [2]
+        assert [(a, b) for _, a, b in report['gaps']] == [(4, 4)]
+
+    def test_deferred_verification(self):
+        with AuditLog(self.path) as log:
+            r = self.client(log, verify='audit')
+            with patch.object(RandomPy, '_verify_response') as mock_verify:
+                resp = r.integers(5, min=1, max=6)
+            assert not mock_verify.called
+            assert len(resp['random']['data']) == 5
+        assert len(list(entries(self.path))) == 1
+        assert_raises(Exception, RandomPy, key='k', verify='audit')
+
+    def test_unsigned_not_logged(self):
+        with AuditLog(self.path) as log:
+            self.client(log, signed=False).integers(5)
+        assert log_files(self.path) == []
+
+    def test_invalid(self):
+        assert_raises(Exception, AuditLog, self.path, format='xml')
+        with open(self.path, 'wb') as f:
+            f.write(b'RPYAUD01\x00\x00')
+        assert_raises(Exception, list, entries(self.path))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_raises
+from randompy import RandomAPI, RandomPy
+from unittest.mock import patch
+
+
+def respond(req):
+    if req['method'] == 'verifySignature':
+        authentic = req['params']['random']['data'] != ['forged']
+        return {'jsonrpc': '2.0', 'id': req['id'],
+                'result': {'authenticity': authentic}}
+    if req['params']['n'] == 13:
+        return {'jsonrpc': '2.0', 'id': req['id'],
+                'error': {'code': 13, 'message': 'unlucky', 'data': None}}
+    data = ['forged'] if req['params']['n'] == 7 else [req['method']]
+    return {'jsonrpc': '2.0', 'id': req['id'],
+            'result': {'random': {'data': data}, 'signature': 'sig'}}
+
+
+def fake_post(reqs):
+    # Answer out of order to check that responses are matched by ID.
+    return [respond(req) for req in reversed(reqs)]
+
+
+class TestBatch:
+
+    def setup(self):
+        self.r = RandomPy(key='key')
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=fake_post)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.r = None
+
+    def data(self, resp):
+        return resp['result']['random']['data']
+
+    def test_heterogeneous(self):
+        with self.r.batch() as b:
+            ints = b.integers(2, successfunc=self.data)
+            uuids = b.uuids(1, successfunc=self.data)
+            blobs = b.blobs(3)
+        assert ints.result() == ['generateSignedIntegers']
+        assert uuids.result() == ['generateSignedUUIDs']
+        assert blobs.result()['random']['data'] == ['generateSignedBlobs']
+        # one generate batch and one verifySignature batch
+        assert self.mock_post.call_count == 2
+        verify = self.mock_post.call_args_list[1][0][0]
+        assert [req['method'] for req in verify] == ['verifySignature'] * 3
+
+    def test_entry_error(self):
+        with self.r.batch() as b:
+            ok = b.integers(1)
+            bad = b.integers(13, errorfunc=lambda resp: 'error handled')
+        assert bad.result() == 'error handled'
+        assert ok.result()['random']['data'] == ['generateSignedIntegers']
+
+    def test_entry_not_verified(self):
+        with self.r.batch() as b:
+            forged = b.integers(7)
+            ok = b.integers(1)
+        assert_raises(Exception, forged.result)
+        assert ok.result()
+
+    def test_invalid_entry(self):
+        b = self.r.batch()
+        assert_raises(Exception, b.integers, 1, base=7)
+        assert len(b) == 0
+
+    def test_unsigned_builder(self):
+        r = RandomPy(key='key', signed=False)
+        b = r.batch()
+        b.strings(1)
+        b.decimals(1)
+        futures = b.send()
+        assert [f.result()['random']['data'] for f in futures] == [
+            ['generateStrings'], ['generateDecimalFractions']]
+        assert self.mock_post.call_count == 1
+
+    def test_batch_error(self):
+        self.mock_post.side_effect = lambda reqs: {'error': 'bad batch'}
+        b = self.r.batch()
+        f = b.integers(1)
+        assert_raises(Exception, b.send)
+        assert_raises(Exception, f.result)
+
+    def test_missing_response(self):
+        self.mock_post.side_effect = lambda reqs: fake_post(reqs)[1:]
+        r = RandomPy(key='key', signed=False)
+        b = r.batch()
+        first = b.integers(1)
+        second = b.integers(1)
+        b.send()
+        assert first.result()
+        assert_raises(Exception, second.result)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from randompy import RandomAPI, RandomPy
+from randompy.cache import ResponseCache, cache_key
+from randompy.serializers import RawJSON
+from unittest.mock import patch
+import os
+import tempfile
+import time
+
+
+def verify_request(rID=1, data=(1, 2)):
+    return {'jsonrpc': '2.0', 'id': rID, 'method': 'verifySignature',
+            'params': {'random': {'data': list(data), 'n': len(data)},
+                       'signature': 'sig'}}
+
+
+def verify_response(req):
+    return {'jsonrpc': '2.0', 'id': req['id'],
+            'result': {'authenticity': True}}
+
+
+class TestCacheKey:
+
+    def test_ignores_id(self):
+        assert cache_key(verify_request(1)) == cache_key(verify_request(2))
+
+    def test_canonical(self):
+        raw = verify_request()
+        raw['params']['random'] = RawJSON(b'{"n": 2, "data": [1, 2]}')
+        assert cache_key(raw) == cache_key(verify_request())
+        assert cache_key(verify_request(data=(2, 1))) != \
+            cache_key(verify_request())
+
+
+class TestResponseCache:
+
+    def setup(self):
+        self.cache = ResponseCache(maxsize=2)
+
+    def teardown(self):
+        self.cache = None
+
+    def test_hit_uses_request_id(self):
+        self.cache.put(verify_request(1), verify_response(verify_request(1)))
+        resp = self.cache.get(verify_request(7))
+        assert resp['id'] == 7 and resp['result']['authenticity']
+
+    def test_never_caches_generation(self):
+        req = {'id': 1, 'method': 'generateIntegers', 'params': {'n': 1}}
+        self.cache.put(req, {'id': 1, 'result': {}})
+        assert self.cache.get(req) is None
+        assert len(self.cache) == 0
+
+    def test_no_errors(self):
+        self.cache.put(verify_request(), {'id': 1, 'error': {}})
+        assert self.cache.get(verify_request()) is None
+
+    def test_lru(self):
+        reqs = [verify_request(data=(i,)) for i in range(3)]
+        for req in reqs[:2]:
+            self.cache.put(req, verify_response(req))
+        self.cache.get(reqs[0])
+        self.cache.put(reqs[2], verify_response(reqs[2]))
+        assert self.cache.get(reqs[1]) is None
+        assert self.cache.get(reqs[0]) is not None
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.put(verify_request(), verify_response(verify_request()))
+        time.sleep(0.02)
+        assert cache.get(verify_request()) is None
+
+    def test_disk(self):
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        try:
+            cache = ResponseCache(path=path)
+            cache.put(verify_request(), verify_response(verify_request()))
+            other = ResponseCache(path=path)
+            assert other.get(verify_request(3))['id'] == 3
+        finally:
+            os.remove(path)
+
+
+class TestCachedCall:
+
+    def setup(self):
+        self.api = RandomAPI('url', cache=ResponseCache())
+
+    def teardown(self):
+        self.api = None
+
+    @patch.object(RandomAPI, '_post', side_effect=verify_response)
+    def test_call(self, mock_post):
+        self.api.call(verify_request(1))
+        assert self.api.call(verify_request(2))['id'] == 2
+        assert mock_post.call_count == 1
+
+    @patch.object(RandomAPI, '_post',
+                  side_effect=lambda reqs: [verify_response(r) for r in reqs])
+    def test_call_batch(self, mock_post):
+        self.api.call_batch([verify_request(1)])
+        resps = self.api.call_batch([verify_request(2),
+                                     verify_request(3, data=(5,))])
+        assert sorted(r['id'] for r in resps) == [2, 3]
+        assert len(mock_post.call_args_list[1][0][0]) == 1
+
+
+class TestCachedVerify:
+
+    def setup(self):
+        self.r = RandomPy(key='key', cache=ResponseCache())
+        self.patcher = patch.object(RandomAPI, '_post',
+                                    side_effect=verify_response)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.r = None
+
+    def test_repeated_audit(self):
+        params = verify_request()['params']
+        for _ in range(3):
+            assert self.r.generate(method='verify', **params)
+        assert self.mock_post.call_count == 1
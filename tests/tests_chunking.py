@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import randompy.chunking as c
+
+
+class TestChunking:
+
+    def setup(self):
+        self.resps = [
+            {'jsonrpc': '2.0', 'id': 1, 'result': {
+                'random': {'data': [1, 2], 'n': 2, 'serialNumber': 1},
+                'signature': 'sig1', 'bitsUsed': 14, 'bitsLeft': 86,
+                'requestsLeft': 9, 'advisoryDelay': 100}},
+            {'jsonrpc': '2.0', 'id': 2, 'result': {
+                'random': {'data': [3], 'n': 1, 'serialNumber': 2},
+                'signature': 'sig2', 'bitsUsed': 7, 'bitsLeft': 79,
+                'requestsLeft': 8, 'advisoryDelay': 300}},
+        ]
+
+    def test_split(self):
+        assert c.split(25, 10) == [10, 10, 5]
+
+    def test_split_exact(self):
+        assert c.split(20, 10) == [10, 10]
+
+    def test_truthy(self):
+        assert c.truthy('yes') and c.truthy(True)
+        assert not c.truthy('no') and not c.truthy(False)
+
+    def test_population(self):
+        assert c.population('integers', {'min': 1, 'max': 6}) == 6
+        params = {'characters': 'ab', 'length': 3}
+        assert c.population('strings', params) == 8
+        assert c.population('uuids', {}) is None
+
+    def test_request_size(self):
+        assert c.request_size(10, 0, 100, 50) == 10
+        assert c.request_size(10, 50, 100, 50) == 20
+        assert c.request_size(10, 50, 100, 15) == 15
+
+    def test_shuffled_sample(self):
+        sample = c.ShuffledSample(3, 10, 4, 2)
+        assert sample.next_size() == 2
+        sample.add({'id': 1, 'result': {'random': {'data': [3, 999999999]}}})
+        assert sample.values == [13, 11, 12, 10] and sample.i == 1
+        sample.add({'id': 2, 'result': {'random': {'data': [0, 1]}}})
+        assert sample.done
+        assert sample.result()['result']['random']['data'] == [13, 11, 10]
+
+    def test_merge(self):
+        resp = c.merge(self.resps)
+        result = resp['result']
+        assert resp['id'] == 1
+        assert result['random']['data'] == [1, 2, 3]
+        assert result['random']['n'] == 3
+        assert 'serialNumber' not in result['random']
+        assert result['bitsUsed'] == 21
+        assert result['bitsLeft'] == 79
+        assert result['requestsLeft'] == 8
+        assert result['advisoryDelay'] == 300
+        assert [r['signature'] for r in result['chunks']] == ['sig1', 'sig2']
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+from helpers import fake_post
+from nose.tools import assert_raises
+from randompy import RandomAPI, RandomPy
+from randompy.coalesce import Coalescer
+from threading import Barrier
+from unittest.mock import patch
+
+
+class TestCoalescer:
+
+    def setup(self):
+        self.c = Coalescer(window=0.2)
+        self.totals = []
+
+    def teardown(self):
+        self.c = None
+
+    def fetch(self, total):
+        self.totals.append(total)
+        return {'id': 1, 'result': {'random': {'data': list(range(total))}}}
+
+    def run(self, ns, cap=100, key='k'):
+        barrier = Barrier(len(ns))
+
+        def generate(n):
+            barrier.wait()
+            return self.c.generate(key, n, cap, self.fetch)
+
+        with ThreadPoolExecutor(max_workers=len(ns)) as executor:
+            return list(executor.map(generate, ns))
+
+    def test_merged(self):
+        resps = self.run([1, 2, 3, 4])
+        assert self.totals == [10]
+        data = [x for r in resps for x in r['result']['random']['data']]
+        assert sorted(data) == list(range(10))
+        assert [r['result']['random']['n'] for r in resps] == [1, 2, 3, 4]
+        assert all('chunks' not in r['result'] for r in resps)
+
+    def test_signed(self):
+        unsigned = self.fetch
+
+        def fetch(total):
+            resp = unsigned(total)
+            resp['result']['signature'] = 'sig'
+            resp['result']['random']['serialNumber'] = 1
+            return resp
+        self.fetch = fetch
+        resps = self.run([1, 2])
+        for r in resps:
+            assert 'signature' not in r['result']
+            assert 'serialNumber' not in r['result']['random']
+            chunk, = r['result']['chunks']
+            assert chunk['signature'] == 'sig'
+            assert chunk['random']['data'] == [0, 1, 2]
+
+    def test_cap(self):
+        self.run([3] * 6, cap=10)
+        assert sorted(self.totals) == [9, 9]
+
+    def test_full_group_goes_early(self):
+        self.c.window = 10.0
+        self.run([5, 5], cap=10)
+        assert self.totals == [10]
+
+    def test_single(self):
+        resp = self.c.generate('k', 3, 10, self.fetch)
+        assert resp['result']['random']['data'] == [0, 1, 2]
+        assert 'coalesced' not in resp['result']
+
+    def test_error(self):
+        def fetch(total):
+            raise OSError('unreachable')
+        self.fetch = fetch
+        assert_raises(OSError, self.run, [1, 1])
+
+
+class TestRandomPyCoalesce:
+
+    def setup(self):
+        self.r = RandomPy(key='key', signed=False, coalesce=0.2)
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=fake_post)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.r = None
+        self.patcher.stop()
+
+    def run(self, calls):
+        barrier = Barrier(len(calls))
+
+        def call(kwargs):
+            barrier.wait()
+            return self.r.integers(**kwargs)
+
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            return list(executor.map(call, calls))
+
+    def test_identical(self):
+        calls = [{'n': 1, 'min': 0, 'max': 99}] * 20
+        resps = self.run(calls)
+        assert self.mock_post.call_count == 1
+        assert self.mock_post.call_args[0][0]['params']['n'] == 20
+        assert all(len(r['random']['data']) == 1 for r in resps)
+
+    def test_different_params(self):
+        self.run([{'n': 1, 'min': 0, 'max': 99},
+                  {'n': 1, 'min': 0, 'max': 9}])
+        assert self.mock_post.call_count == 2
+
+    def test_without_replacement(self):
+        calls = [{'n': 4, 'min': 1, 'max': 10, 'replacement': False}] * 5
+        resps = self.run(calls)
+        ns = sorted(c[0][0]['params']['n']
+                    for c in self.mock_post.call_args_list)
+        assert all(n <= 10 for n in ns)
+        assert sum(ns) == 20
+        for r in resps:
+            data = r['random']['data']
+            assert len(data) == 4 and len(set(data)) == 4
+
+    def test_handlers(self):
+        def f(resp):
+            return resp['result']['random']['data']
+        assert len(self.r.integers(3, min=1, max=6, successfunc=f)) == 3
+
+    def test_disabled(self):
+        assert RandomPy(key='key', signed=False).coalescer is None
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from randompy import config as c
+from unittest.mock import patch
+import os
+import subprocess
+import sys
+import tempfile
+
+
+class TestLoadConfig:
+
+    def setup(self):
+        fd, self.path = tempfile.mkstemp(suffix='.ini')
+        with os.fdopen(fd, 'w') as f:
+            f.write('[config]\nkey = first\n')
+        self.patcher = patch.object(c, '_read', side_effect=self.read)
+        self.mock_read = self.patcher.start()
+        c._cache['config'] = None
+
+    def teardown(self):
+        self.patcher.stop()
+        c._cache['config'] = None
+        os.remove(self.path)
+
+    def read(self):
+        from configparser import ConfigParser
+        config = ConfigParser()
+        config.read([c.DEFAULTS, self.path])
+        return config, self.path
+
+    def test_cached(self):
+        assert c.load_config() is c.load_config()
+        assert self.mock_read.call_count == 1
+
+    def test_reload_on_change(self):
+        assert c.load_config()['config']['key'] == 'first'
+        with open(self.path, 'w') as f:
+            f.write('[config]\nkey = second\n')
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert c.load_config()['config']['key'] == 'second'
+        assert self.mock_read.call_count == 2
+
+
+class TestLazyImports:
+
+    def test_requests_not_imported(self):
+        code = ('import sys, randompy; randompy.RandomPy(key="k"); '
+                'print("requests" in sys.modules, "asyncio" in sys.modules, '
+                '"multiprocessing" in sys.modules)')
+        out = subprocess.check_output([sys.executable, '-c', code],
+                                      cwd=os.path.dirname(
+                                          os.path.dirname(c.__file__)))
+        assert out.split() == [b'False', b'False', b'False']
+
+    def test_lazy_async(self):
+        import randompy
+        from randompy.aio import AsyncRandomPy
+        assert randompy.AsyncRandomPy is AsyncRandomPy
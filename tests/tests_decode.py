@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from nose.tools import assert_raises
+from randompy import RandomAPI, RandomPy
+from randompy.decode import decode, decode_blobs
+from unittest import SkipTest
+from unittest.mock import patch
+
+
+def numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise SkipTest('numpy is not installed')
+    return numpy
+
+
+class TestDecode:
+
+    def test_list(self):
+        data = [1, 2]
+        assert decode(data, 'integers') is data
+
+    def test_integers_array(self):
+        out = decode([1, -2, 3], 'integers', 'array')
+        assert out == array('q', [1, -2, 3])
+
+    def test_integers_base(self):
+        out = decode(['101', '11'], 'integers', 'array', base=2)
+        assert list(out) == [5, 3]
+        out = decode(['b', '10'], 'integers', 'array', base='12')
+        assert list(out) == [11, 12]
+
+    def test_decimals_array(self):
+        assert decode([0.5, 0.25], 'decimals', 'array').typecode == 'd'
+
+    def test_blobs_hex(self):
+        views = decode_blobs(['00ff', 'abcd'], 'hex')
+        assert [bytes(v) for v in views] == [b'\x00\xff', b'\xab\xcd']
+
+    def test_blobs_base64(self):
+        views = decode(['AAE=', '/w8='], 'blobs', 'array', format='base64')
+        assert [bytes(v) for v in views] == [b'\x00\x01', b'\xff\x0f']
+        assert views[0].obj is views[1].obj
+
+    def test_unsupported(self):
+        assert_raises(Exception, decode, ['ab'], 'strings', 'array')
+        assert_raises(Exception, decode, [1], 'integers', 'tuple')
+
+    def test_numpy(self):
+        np = numpy()
+        out = decode(['7', '10'], 'integers', 'numpy', base=8)
+        assert out.dtype == np.int64 and list(out) == [7, 8]
+        blobs = decode(['00ff', 'abcd'], 'blobs', 'numpy', format='hex')
+        assert blobs.shape == (2, 2) and blobs[1, 0] == 0xab
+
+
+class TestGenerateOutput:
+
+    def setup(self):
+        self.r = RandomPy(key='key', signed=False)
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=lambda
+                                    req: {'id': req['id'], 'result': {
+                                        'random': {'data': ['11', '101']}}})
+        self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.r = None
+
+    def test_integers(self):
+        resp = self.r.integers(2, base=2, output='array')
+        assert resp['random']['data'] == array('q', [3, 5])
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from itertools import islice
+from nose.tools import assert_raises
+from randompy import RandomAPI, RandomPy
+from randompy.engines import (DRBG, GENERATORS, HybridEngine, LocalEngine,
+                              RequestRandom)
+from unittest.mock import patch
+import os
+import random
+
+
+def seed_post(req):
+    params = req['params']
+    assert req['method'] == 'generateBlobs'
+    return {'jsonrpc': '2.0', 'id': req['id'], 'result': {
+        'random': {'data': ['c2VlZA=='] * params['n'],
+                   'completionTime': '2020-01-01 00:00:00Z'},
+        'bitsUsed': params['size'], 'requestsLeft': 10}}
+
+
+class TestDRBG:
+
+    def test_deterministic(self):
+        a, b = DRBG(b'seed'), DRBG(b'seed')
+        assert a.randbytes(100) == b.randbytes(100)
+        assert a.getrandbits(77) == b.getrandbits(77)
+        assert DRBG(b'other').randbytes(100) != b.randbytes(100)
+
+    def test_reseed(self):
+        a, b = DRBG(b'seed'), DRBG(b'seed')
+        a.reseed(b'more')
+        assert a.randbytes(32) != b.randbytes(32)
+        assert a.output == 32
+
+    def test_random(self):
+        rng = DRBG(b'seed')
+        values = [rng.random() for _ in range(1000)]
+        assert all(0 <= x < 1 for x in values)
+        assert 0.4 < sum(values) / len(values) < 0.6
+        assert 0 <= rng.randint(5, 9) <= 9
+        assert rng.getrandbits(0) == 0
+
+    def test_forked_child(self):
+        rng = DRBG(b'seed')
+        rng.randbytes(16)
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write, rng.randbytes(16))
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert os.read(read, 16) != rng.randbytes(16)
+        os.close(read)
+        os.close(write)
+
+    def test_large_draw(self):
+        rng = DRBG(b'seed')
+        assert len(rng.randbytes(DRBG.BLOCK * 2 + 3)) == DRBG.BLOCK * 2 + 3
+
+
+class TestRequestRandom:
+
+    def test_leftovers_returned(self):
+        a, b = DRBG(b'seed'), DRBG(b'seed')
+        rng = RequestRandom(a)
+        assert rng.randbytes(10) == b.randbytes(10)
+        rng.close()
+        assert a.output == 10
+        assert a.randbytes(300) == b.randbytes(300)
+
+    def test_bulk_draws(self):
+        engine = HybridEngine()
+        engine.reseed(None)
+        with patch.object(DRBG, 'randbytes', autospec=True,
+                          side_effect=DRBG.randbytes) as mock_randbytes:
+            resp = engine.generate(1, 'integers', {'n': 10000, 'min': 1,
+                                                   'max': 6})
+        data = resp['result']['random']['data']
+        assert len(data) == 10000 and set(data) == set(range(1, 7))
+        assert mock_randbytes.call_count < 10
+
+
+class TestGenerators:
+
+    def setup(self):
+        self.rng = random.Random(5)
+
+    def teardown(self):
+        self.rng = None
+
+    def test_integers(self):
+        data, bits = GENERATORS['integers'](self.rng, {
+            'n': 50, 'min': 1, 'max': 50, 'replacement': False, 'base': 10})
+        assert sorted(data) == list(range(1, 51))
+        data, _ = GENERATORS['integers'](self.rng, {
+            'n': 5, 'min': 8, 'max': 8, 'replacement': True, 'base': 2})
+        assert data == ['1000'] * 5
+
+    def test_decimals(self):
+        data, _ = GENERATORS['decimals'](self.rng, {
+            'n': 100, 'decimalPlaces': 2, 'replacement': False})
+        assert len(set(data)) == 100
+        assert all(round(x, 2) == x for x in data)
+
+    def test_decimals_huge_population(self):
+        data, _ = GENERATORS['decimals'](self.rng, {
+            'n': 10, 'decimalPlaces': 20, 'replacement': False})
+        assert len(set(data)) == 10
+
+    def test_gaussians(self):
+        data, _ = GENERATORS['gaussians'](self.rng, {
+            'n': 10, 'mean': 1e7, 'standardDeviation': 5.0,
+            'significantDigits': 2})
+        assert all(x == 1e7 for x in data)
+
+    def test_strings(self):
+        data, _ = GENERATORS['strings'](self.rng, {
+            'n': 8, 'length': 3, 'characters': 'ab', 'replacement': False})
+        assert sorted(data) == sorted({a + b + c for a in 'ab'
+                                       for b in 'ab' for c in 'ab'})
+        assert_raises(Exception, GENERATORS['strings'], self.rng, {
+            'n': 9, 'length': 3, 'characters': 'ab', 'replacement': False})
+
+    def test_blobs(self):
+        data, bits = GENERATORS['blobs'](self.rng, {
+            'n': 3, 'size': 32, 'format': 'hex'})
+        assert [len(x) for x in data] == [8, 8, 8]
+        assert bits == 96
+
+
+class TestEngines:
+
+    def setup(self):
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=seed_post)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+
+    def test_local(self):
+        r = RandomPy(key='key', engine='local')
+        resp = r.strings(20000, length=5, characters=['lower', 'digits'],
+                         replacement=False)
+        assert len(set(resp['random']['data'])) == 20000
+        assert resp['source'] == 'local'
+        assert 'signature' not in resp
+        assert not self.mock_post.called
+
+    def test_hybrid(self):
+        engine = HybridEngine(reseed_bytes=64)
+        r = RandomPy(key='key', signed=False, engine=engine)
+        resp = r.integers(5, min=1, max=6)
+        assert resp['source'] == 'hybrid'
+        assert resp['seed']['source'] == 'random.org'
+        assert self.mock_post.call_count == 1
+        assert self.mock_post.call_args[0][0]['params']['size'] == 512
+
+        r.integers(5, min=1, max=6)
+        assert self.mock_post.call_count == 1
+        r.blobs(1, size=1024)
+        r.integers(5, min=1, max=6)
+        assert self.mock_post.call_count == 2
+
+    def test_hybrid_seed_fails(self):
+        self.mock_post.side_effect = OSError('unreachable')
+        r = RandomPy(key='key', signed=False, engine='hybrid')
+        assert_raises(Exception, r.integers, 5)
+        r.engine_fallback = True
+        assert r.integers(5)['seed']['source'] == 'local'
+
+    def test_remote_source(self):
+        r = RandomPy(key='key', signed=False)
+        assert r.blobs(1, size=8)['source'] == 'random.org'
+
+    def test_fallback_on_quota(self):
+        error = {'code': 402, 'message': 'Daily request allowance exceeded'}
+        self.mock_post.side_effect = lambda req: {
+            'jsonrpc': '2.0', 'id': req['id'], 'error': error}
+        r = RandomPy(key='key', signed=False)
+        assert r.integers(5) == error
+        r.engine_fallback = True
+        assert r.integers(5)['source'] == 'local'
+
+    def test_fallback_on_connection_error(self):
+        self.mock_post.side_effect = OSError('unreachable')
+        r = RandomPy(key='key', signed=False)
+        assert_raises(OSError, r.integers, 5)
+        r.engine_fallback = True
+        resp = r.integers(5, min=1, max=6)
+        assert resp['source'] == 'local'
+        assert all(1 <= x <= 6 for x in resp['random']['data'])
+
+    def test_pipelined_stream(self):
+        r = RandomPy(key='key', engine='local', pipeline=True)
+        values = list(islice(r.stream('integers', chunk_size=4, min=1,
+                                      max=6), 10))
+        assert len(values) == 10 and all(1 <= x <= 6 for x in values)
+        assert not self.mock_post.called
+
+    def test_pipelined_stream_fallback(self):
+        self.mock_post.side_effect = OSError('unreachable')
+        r = RandomPy(key='key', pipeline=True)
+        it = r.stream('integers', chunk_size=4, min=1, max=6)
+        assert_raises(OSError, next, it)
+        r.engine_fallback = True
+        it = r.stream('integers', chunk_size=4, min=1, max=6)
+        assert len(list(islice(it, 10))) == 10
+
+    def test_unknown(self):
+        assert_raises(Exception, RandomPy, key='key', engine='quantum')
+
+    def test_local_engine_serves(self):
+        assert LocalEngine().serves('integers')
+        assert not LocalEngine().serves('verify')
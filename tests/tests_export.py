@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from nose.tools import assert_raises
+from randompy.export import export
+from randompy.standin import StandInServer
+import json
+import os
+import shutil
+import tempfile
+
+
+class TestExport:
+
+    def setup(self):
+        self.server = StandInServer(seed=4)
+        self.server.start()
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'out')
+        self.client = {'key': 'k', 'url': self.server.url, 'signed': False}
+
+    def teardown(self):
+        self.server.stop()
+        shutil.rmtree(self.dir)
+
+    def export(self, n, **kwargs):
+        params = dict(min=1, max=6, replacement=True, base=10)
+        params.update(kwargs)
+        return export(self.path, 'integers', n, workers=2,
+                      client=self.client, **params)
+
+    def lines(self):
+        with open(self.path) as f:
+            return f.read().splitlines()
+
+    def test_ndjson(self):
+        progress = []
+        assert self.export(25, chunk_size=10,
+                           progress=lambda *p: progress.append(p)) == 25
+        values = [json.loads(line) for line in self.lines()]
+        assert len(values) == 25
+        assert all(1 <= x <= 6 for x in values)
+        assert progress == [(10, 25), (20, 25), (25, 25)]
+        assert not os.path.exists(self.path + '.ckpt')
+
+    def test_csv(self):
+        self.export(12, chunk_size=5, format='csv')
+        assert len(self.lines()) == 12
+
+    def test_binary(self):
+        self.export(12, chunk_size=5, format='binary')
+        values = array('q')
+        with open(self.path, 'rb') as f:
+            values.frombytes(f.read())
+        assert len(values) == 12
+        assert all(1 <= x <= 6 for x in values)
+
+    def test_signed(self):
+        self.client['signed'] = True
+        self.client['verify'] = 'remote'
+        self.export(15, chunk_size=5)
+        assert len(self.lines()) == 15
+
+    def test_resume(self):
+        self.server.standin.requests = 2
+        assert_raises(Exception, self.export, 30, chunk_size=10)
+        assert os.path.exists(self.path + '.ckpt')
+        assert len(self.lines()) in (0, 10, 20)
+        with open(self.path, 'a') as f:
+            f.write('partial\n')
+
+        self.server.standin.quotas.clear()
+        self.server.standin.requests = 1000
+        self.export(30, chunk_size=10)
+        values = [json.loads(line) for line in self.lines()]
+        assert len(values) == 30
+        assert not os.path.exists(self.path + '.ckpt')
+
+    def test_other_job(self):
+        self.server.standin.requests = 1
+        assert_raises(Exception, self.export, 30, chunk_size=10)
+        assert_raises(Exception, self.export, 30, chunk_size=10, max=7)
+
+    def test_invalid(self):
+        assert_raises(Exception, self.export, 10, format='xml')
+        assert_raises(Exception, self.export, 10, replacement=False)
+        assert_raises(Exception, export, self.path, 'uuids', 10,
+                      format='binary')
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from nose.tools import assert_raises
 import randompy.functions as f
 
 
@@ -57,3 +58,10 @@ class TestFunctions:
 
     def test_error_data(self):
         assert f.error_data(self.resp) == 'Error data'
+
+    def test_error_raise(self):
+        errorfunc = f.error_raise('Test request')
+        with assert_raises(Exception) as cm:
+            errorfunc(self.resp)
+        assert str(cm.exception) == \
+            'Test request failed (-1): Error with code -1'
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+from nose.tools import assert_raises
+from randompy.ids import IDGenerator, Registry
+
+
+class TestIDGenerator:
+
+    def test_monotonic(self):
+        gen = IDGenerator()
+        assert [gen() for _ in range(3)] == [1, 2, 3]
+
+    def test_unique_across_threads(self):
+        gen = IDGenerator()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ids = list(executor.map(lambda _: gen(), range(10000)))
+        assert len(set(ids)) == 10000
+
+
+class TestRegistry:
+
+    def setup(self):
+        self.registry = Registry()
+
+    def teardown(self):
+        self.registry = None
+
+    def test_dispatch_out_of_order(self):
+        futures = [self.registry.register(rID) for rID in (1, 2, 3)]
+        unmatched = self.registry.dispatch([{'id': 3}, {'id': 9}, {'id': 1},
+                                            {'id': 2}])
+        assert unmatched == [{'id': 9}]
+        assert [f.result()['id'] for f in futures] == [1, 2, 3]
+        assert len(self.registry) == 0
+
+    def test_duplicate(self):
+        self.registry.register(1)
+        assert_raises(Exception, self.registry.register, 1)
+
+    def test_fail(self):
+        future = self.registry.register(1)
+        self.registry.fail(1, ValueError('boom'))
+        assert isinstance(future.exception(), ValueError)
+        assert 1 not in self.registry
+
+    def test_fail_all(self):
+        futures = [self.registry.register(rID) for rID in (1, 2)]
+        self.registry.fail_all(ValueError('boom'))
+        assert all(isinstance(f.exception(), ValueError) for f in futures)
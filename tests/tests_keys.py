@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from configparser import ConfigParser
+from nose.tools import assert_raises
+from randompy import (KeyPool, QuotaExceeded, RandomAPI, RandomPy,
+                      Scheduler)
+from unittest.mock import patch
+
+
+def response(requests_left, bits_left=1000):
+    return {'result': {'requestsLeft': requests_left, 'bitsLeft': bits_left}}
+
+
+class TestKeyPool:
+
+    def setup(self):
+        self.pool = KeyPool(['a', 'b', 'c'])
+
+    def teardown(self):
+        self.pool = None
+
+    def test_most_remaining(self):
+        self.pool.update('a', response(10))
+        self.pool.update('b', response(50))
+        self.pool.update('c', response(20))
+        assert self.pool.acquire() == 'b'
+
+    def test_unknown_first(self):
+        self.pool.update('a', response(10))
+        self.pool.update('b', response(50))
+        assert self.pool.acquire() == 'c'
+
+    def test_exhausted(self):
+        assert self.pool.update('a', {'error': {'code': 402}})
+        assert not self.pool.update('b', response(0))
+        assert not self.pool.update('c', response(1))
+        assert self.pool.available() == ['c']
+
+    def test_all_cooling(self):
+        for key in 'abc':
+            self.pool.mark_exhausted(key)
+        assert_raises(QuotaExceeded, self.pool.acquire)
+
+    def test_from_config(self):
+        config = ConfigParser()
+        config.read_string('[keys]\nfirst = k1\nsecond = k2\n')
+        assert KeyPool.from_config(config).keys == ['k1', 'k2']
+        config.read_string('[keys]\ncooldown = 60\n')
+        pool = KeyPool.from_config(config)
+        assert pool.keys == ['k1', 'k2']
+        assert pool.cooldown == 60.0
+
+    def test_exclude(self):
+        assert self.pool.acquire(exclude=['a', 'c']) == 'b'
+        assert_raises(QuotaExceeded, self.pool.acquire, ['a', 'b', 'c'])
+
+    def test_empty(self):
+        assert_raises(Exception, KeyPool, [])
+
+
+class TestKeyPoolFailover:
+
+    def setup(self):
+        self.pool = KeyPool(['a', 'b'])
+        self.r = RandomPy(signed=False, keys=self.pool)
+
+    def teardown(self):
+        self.r = None
+
+    def fake_post(self, req):
+        if req['params']['apiKey'] == 'a':
+            return {'id': req['id'], 'error': {'code': 402}}
+        return {'id': req['id'], 'result': {'random': {'data': [1]},
+                                            'requestsLeft': 9}}
+
+    def test_failover(self):
+        self.pool.update('b', response(5))
+        with patch.object(RandomAPI, '_post', side_effect=self.fake_post) \
+                as mock_post:
+            resp = self.r.integers(1)
+        assert resp['random']['data'] == [1]
+        keys = [c[0][0]['params']['apiKey'] for c in mock_post.call_args_list]
+        assert keys == ['a', 'b']
+        assert self.pool.available() == ['b']
+
+    def test_last_request_kept(self):
+        def fake_post(req):
+            left = 0 if req['params']['apiKey'] == 'a' else 9
+            return {'id': req['id'], 'result': {
+                'random': {'data': [req['params']['apiKey']]},
+                'requestsLeft': left}}
+        with patch.object(RandomAPI, '_post', side_effect=fake_post) \
+                as mock_post:
+            resp = self.r.integers(1)
+        assert resp['random']['data'] == ['a']
+        assert mock_post.call_count == 1
+        assert self.pool.available() == ['b']
+
+    def test_failover_on_quota_exceeded(self):
+        scheduler = Scheduler()
+        scheduler.update({'params': {'apiKey': 'a'}}, response(0))
+        r = RandomPy(signed=False, keys=self.pool, scheduler=scheduler)
+        with patch.object(RandomAPI, '_post', side_effect=self.fake_post) \
+                as mock_post:
+            assert r.integers(1)['random']['data'] == [1]
+            keys = [c[0][0]['params']['apiKey']
+                    for c in mock_post.call_args_list]
+            assert keys == ['b']
+            scheduler.update({'params': {'apiKey': 'b'}}, response(0))
+            assert_raises(QuotaExceeded, r.integers, 1)
+        assert self.pool.available() == ['a', 'b']
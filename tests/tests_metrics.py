@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from randompy import Metrics, RandomPy
+from randompy.metrics import STAGES
+from randompy.standin import StandInServer
+
+
+class TestMetrics:
+
+    def setup(self):
+        self.metrics = Metrics(buckets=(0.1, 1.0))
+
+    def teardown(self):
+        self.metrics = None
+
+    def test_histogram(self):
+        for seconds in (0.05, 0.5, 5.0):
+            self.metrics.observe('http', 'integers', seconds)
+        text = self.metrics.prometheus()
+        prefix = 'randompy_stage_seconds_bucket{stage="http",' \
+                 'method="integers",'
+        assert prefix + 'le="0.1"} 1' in text
+        assert prefix + 'le="1.0"} 2' in text
+        assert prefix + 'le="+Inf"} 3' in text
+        assert 'randompy_stage_seconds_count{stage="http",' \
+               'method="integers"} 3' in text
+
+    def test_hooks(self):
+        events = []
+
+        def hook(*event):
+            events.append(event)
+        self.metrics.add_hook(hook)
+        with self.metrics.time('build', 'uuids'):
+            pass
+        self.metrics.remove_hook(hook)
+        self.metrics.observe('build', 'uuids', 0.0)
+        assert len(events) == 1
+        assert events[0][:2] == ('build', 'uuids')
+
+    def test_record(self):
+        self.metrics.record('integers', {'result': {
+            'bitsUsed': 30, 'bitsLeft': 970, 'requestsLeft': 9}})
+        self.metrics.record('integers', {'result': {
+            'bitsUsed': 20, 'bitsLeft': 950, 'requestsLeft': 8}})
+        self.metrics.record('integers', {'error': {'code': 402}})
+        text = self.metrics.prometheus()
+        assert 'randompy_requests_total{method="integers"} 2' in text
+        assert 'randompy_bits_total{method="integers"} 50' in text
+        assert 'randompy_errors_total{method="integers"} 1' in text
+        assert 'randompy_bits_left 950' in text
+        assert 'randompy_requests_left 8' in text
+
+    def test_reset(self):
+        self.metrics.observe('http', 'integers', 0.5)
+        self.metrics.reset()
+        assert 'randompy_stage_seconds_bucket' not in \
+            self.metrics.prometheus()
+
+
+class TestInstrumentedCalls:
+
+    def setup(self):
+        self.server = StandInServer(seed=3)
+        self.server.start()
+        self.metrics = Metrics()
+        self.r = RandomPy(key='k', url=self.server.url, metrics=self.metrics)
+
+    def teardown(self):
+        self.server.stop()
+
+    def test_stages(self):
+        self.r.integers(5, min=1, max=6)
+        stages = {stage for stage, method in self.metrics.histograms}
+        assert stages == set(STAGES)
+        assert ('http', 'verify') in self.metrics.histograms
+        assert self.metrics.counters['requests', 'integers'] == 1
+        assert self.metrics.counters['requests', 'verify'] == 1
+
+    def test_batch(self):
+        with self.r.batch() as batch:
+            batch.uuids(1)
+            batch.uuids(2)
+        assert ('http', 'batch') in self.metrics.histograms
+        assert self.metrics.counters['requests', 'uuids'] == 2
+        assert self.metrics.counters['bits', 'uuids'] == 3 * 122
+
+    def test_disabled(self):
+        r = RandomPy(key='k', url=self.server.url)
+        assert r.metrics is None
+        assert r.api.metrics is None
+        r.uuids(1)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from itertools import count
+from nose.tools import assert_raises
+from randompy import (AsyncRandomPy, PoolEmpty, RandomAPI, RandomPool,
+                      RandomPy)
+from threading import Event
+from unittest.mock import patch
+
+
+class FakeServer:
+
+    def __init__(self):
+        self.counter = count()
+        self.sizes = []
+        self.gate = Event()
+        self.gate.set()
+
+    def __call__(self, req):
+        self.gate.wait()
+        n = req['params']['n']
+        self.sizes.append(n)
+        data = [next(self.counter) for _ in range(n)]
+        return {'jsonrpc': '2.0', 'id': req['id'],
+                'result': {'random': {'data': data}}}
+
+
+class TestRandomPool:
+
+    def setup(self):
+        self.r = RandomPy(key='key', signed=False)
+        self.server = FakeServer()
+        self.patcher = patch.object(RandomAPI, '_post',
+                                    side_effect=self.server)
+        self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.r = None
+
+    def test_take_in_order(self):
+        with RandomPool(self.r, 'integers', capacity=100, batch=50) as pool:
+            assert pool.take(3) == [0, 1, 2]
+            assert pool.take(2, timeout=1) == [3, 4]
+
+    def test_refill_below_low_water(self):
+        with RandomPool(self.r, 'integers', capacity=100, batch=40,
+                        low=30) as pool:
+            pool.take(60, timeout=1)
+            pool.take(15, timeout=1)
+            assert all(size <= 40 for size in self.server.sizes)
+            assert len(self.server.sizes) >= 2
+
+    def test_fail_fast(self):
+        self.server.gate.clear()
+        with RandomPool(self.r, 'integers', capacity=10,
+                        policy='fail') as pool:
+            assert_raises(PoolEmpty, pool.take, 1)
+            self.server.gate.set()
+
+    def test_block_timeout(self):
+        self.server.gate.clear()
+        with RandomPool(self.r, 'integers', capacity=10) as pool:
+            assert_raises(PoolEmpty, pool.take, 1, timeout=0.01)
+            self.server.gate.set()
+
+    def test_error(self):
+        self.patcher.stop()
+        error = {'error': {'code': 402, 'message': 'quota'}}
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=lambda
+                                    req: dict(error, id=req['id']))
+        self.patcher.start()
+        with RandomPool(self.r, 'integers', capacity=10, retry=0.01) as pool:
+            assert_raises(Exception, pool.take, 1, timeout=1)
+
+    def test_gives_up(self):
+        self.patcher.stop()
+        self.patcher = patch.object(RandomAPI, '_post',
+                                    side_effect=OSError('unreachable'))
+        mock_post = self.patcher.start()
+        with RandomPool(self.r, 'integers', capacity=10, policy='fail',
+                        retry=0.01, max_failures=3) as pool:
+            pool.thread.join(1)
+            assert not pool.thread.is_alive()
+            assert mock_post.call_count == 3
+            assert_raises(OSError, pool.take, 1)
+
+    def test_recovers(self):
+        self.patcher.stop()
+        replies = [OSError('unreachable')] * 2 + [self.server] * 10
+        self.patcher = patch.object(RandomAPI, '_post',
+                                    side_effect=lambda req: self.reply(
+                                        replies.pop(0), req))
+        self.patcher.start()
+        with RandomPool(self.r, 'integers', capacity=10, retry=0.01,
+                        max_failures=3) as pool:
+            assert pool.take(2, timeout=1) == [0, 1]
+            assert pool.error is None and pool.failures == 0
+
+    def reply(self, reply, req):
+        if isinstance(reply, Exception):
+            raise reply
+        return reply(req)
+
+    def test_too_many(self):
+        with RandomPool(self.r, 'integers', capacity=10) as pool:
+            assert_raises(Exception, pool.take, 11)
+
+    def test_async_rejected(self):
+        assert_raises(TypeError, RandomPool, AsyncRandomPy(key='key'),
+                      'integers')
+
+    def test_bad_values(self):
+        self.patcher.stop()
+
+        def bad_values(req):
+            return {'id': req['id'], 'result': {'random': {'data': None}}}
+
+        replies = [bad_values] + [self.server] * 10
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=lambda
+                                    req: replies.pop(0)(req))
+        self.patcher.start()
+        with RandomPool(self.r, 'integers', capacity=10, retry=0.01) as pool:
+            assert pool.take(2, timeout=1) == [0, 1]
+            assert pool.thread.is_alive()
+
+    def test_without_replacement(self):
+        assert_raises(Exception, RandomPool, self.r, 'integers',
+                      replacement=False)
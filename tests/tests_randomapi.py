@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from nose.tools import assert_raises
-from randompy import RandomAPI
+from randompy import RandomAPI, RandomPy
 from unittest.mock import patch
 
 
@@ -93,3 +93,64 @@ class TestCall:
     def test_correct(self, mock_post):
         req = {'method': 'generateIntegers', 'params': {'n': 1}}
         assert self.randomapi.call(req)
+
+
+class TestSession:
+
+    def test_shared(self):
+        assert RandomAPI('url').session is RandomAPI('url').session
+
+    def test_separate_urls(self):
+        assert RandomAPI('url').session is not RandomAPI('other').session
+
+    def test_pool_settings(self):
+        api = RandomAPI('http://pool', pool_size=3, retries=5)
+        adapter = api.session.get_adapter('http://pool')
+        assert adapter._pool_maxsize == 3
+        assert adapter.max_retries.total == 5
+
+    def test_retry_statuses(self):
+        api = RandomAPI('http://statuses')
+        retry = api.session.get_adapter('http://statuses').max_retries
+        assert list(retry.status_forcelist) == [503]
+        api = RandomAPI('http://statuses', retry_statuses=[502, 503])
+        retry = api.session.get_adapter('http://statuses').max_retries
+        assert list(retry.status_forcelist) == [502, 503]
+
+    def test_retry_statuses_from_config(self):
+        assert RandomPy(key='k').api.retry_statuses == (503,)
+
+    def test_keep_alive(self):
+        assert 'Connection' not in RandomAPI('url').headers
+        assert RandomAPI('url', keep_alive=False).headers['Connection'] == \
+            'close'
+
+    def test_post(self):
+        api = RandomAPI('url', timeout=2.5)
+        with patch.object(api.session, 'post') as mock_post:
+            mock_post.return_value.content = b'{"id": 1}'
+            resp = api._post({'id': 1})
+            assert resp == {'id': 1}
+            assert resp.raw == b'{"id": 1}'
+            assert mock_post.call_args[1]['timeout'] == 2.5
+
+
+class TestCallBatch:
+
+    def setup(self):
+        self.randomapi = RandomAPI('url')
+
+    def teardown(self):
+        self.randomapi = None
+
+    @patch.object(RandomAPI, '_post', side_effect=lambda reqs: reqs)
+    def test_correct(self, mock_post):
+        reqs = [{'method': 'generateUUIDs', 'params': {'n': 1}}]
+        assert self.randomapi.call_batch(reqs) == reqs
+
+    @patch.object(RandomAPI, '_post')
+    def test_invalid_entry(self, mock_post):
+        reqs = [{'method': 'generateUUIDs', 'params': {'n': 1}},
+                {'method': 'generateUUIDs', 'params': {'n': 1e4}}]
+        assert_raises(Exception, self.randomapi.call_batch, reqs)
+        assert not mock_post.called
@@ -1,8 +1,14 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from concurrent.futures import ThreadPoolExecutor
+from helpers import fake_post
+from itertools import islice
+from nose.tools import assert_raises
 from randompy import RandomAPI, RandomPy
+from threading import Event, Lock
 from unittest.mock import MagicMock, patch
+import time
 
 
 class TestGenerateUnsigned:
@@ -185,3 +191,238 @@ class TestHandleResponse:
         resp = {'result': 42}
         o = self.r._handle_response(resp, self.error, self.success)
         assert o == 'success'
+
+
+class TestGenerateChunked:
+
+    def setup(self):
+        self.r = RandomPy(key='key', signed=False, workers=2)
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=fake_post)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.r = None
+        self.patcher.stop()
+
+    def test_with_replacement(self):
+        resp = self.r.integers(25000, min=0, max=9)
+        assert len(resp['random']['data']) == 25000
+        assert len(resp['chunks']) == 3
+        assert resp['bitsUsed'] == 25000
+        sizes = [c[0][0]['params']['n'] for c in self.mock_post.call_args_list]
+        assert sorted(sizes) == [5000, 10000, 10000]
+
+    def test_without_replacement(self):
+        resp = self.r.integers(15000, min=1, max=20000, replacement=False)
+        data = resp['random']['data']
+        assert len(data) == 15000
+        assert len(set(data)) == 15000
+        assert all(1 <= x <= 20000 for x in data)
+
+    def test_without_replacement_sparse(self):
+        resp = self.r.integers(15000, min=1, max=10 ** 6, replacement=False)
+        assert len(set(resp['random']['data'])) == 15000
+        # The second chunk rarely needs a top-up for repeats
+        assert self.mock_post.call_count in (2, 3)
+
+    def test_whole_population(self):
+        resp = self.r.integers(100000, min=1, max=100000, replacement=False)
+        assert sorted(resp['random']['data']) == list(range(1, 100001))
+        assert resp['random']['max'] == 100000
+        assert not resp['random']['replacement']
+        # One request per 10000 values, rarely one more for rejected draws
+        assert self.mock_post.call_count in (10, 11)
+        params = self.mock_post.call_args[0][0]['params']
+        assert params['replacement'] and params['max'] == 10 ** 9 - 1
+
+    def test_without_replacement_too_many(self):
+        assert_raises(Exception, self.r.integers, 20000, min=1, max=15000,
+                      replacement=False)
+
+    def test_error(self):
+        error = {'jsonrpc': '2.0', 'id': None, 'error': {'code': 401}}
+        self.mock_post.side_effect = lambda req: dict(error, id=req['id'])
+        resp = self.r.integers(20000)
+        assert resp == {'code': 401}
+
+
+class PipelineServer:
+    '''Verifies a chunk only once the next chunk has been requested.'''
+
+    def __init__(self, authentic=True):
+        self.authentic = authentic
+        self.requested = []
+        self.events = []
+
+    def __call__(self, req):
+        if req['method'] == 'verifySignature':
+            index = int(req['params']['signature'])
+            ok = self.authentic
+            if index + 1 < self.last:
+                ok = ok and self.events[index + 1].wait(5)
+            return {'jsonrpc': '2.0', 'id': req['id'],
+                    'result': {'authenticity': ok}}
+        self.events[len(self.requested)].set()
+        self.requested.append(req['params']['n'])
+        resp = fake_post(req)
+        resp['result']['signature'] = str(len(self.requested) - 1)
+        return resp
+
+    def expect(self, chunks):
+        self.last = chunks
+        self.events = [Event() for _ in range(chunks + 1)]
+
+
+class TestPipeline:
+
+    def setup(self):
+        self.r = RandomPy(key='key', workers=1, pipeline=True)
+        self.server = PipelineServer()
+        self.patcher = patch.object(RandomAPI, '_post',
+                                    side_effect=self.server)
+        self.patcher.start()
+
+    def teardown(self):
+        self.r = None
+        self.patcher.stop()
+
+    def test_with_replacement(self):
+        self.server.expect(3)
+        resp = self.r.integers(25000, min=0, max=9)
+        assert len(resp['random']['data']) == 25000
+        assert self.server.requested == [10000, 10000, 5000]
+
+    def test_without_replacement(self):
+        self.server.expect(2)
+        resp = self.r.integers(15000, min=1, max=10 ** 9,
+                               replacement=False)
+        assert len(set(resp['random']['data'])) == 15000
+
+    def test_stream(self):
+        self.server.expect(4)
+        values = list(islice(self.r.stream('integers', chunk_size=10), 25))
+        assert len(values) == 25
+
+    def test_unverified(self):
+        self.server.authentic = False
+        self.server.expect(3)
+        assert_raises(Exception, self.r.integers, 25000)
+
+    def test_unverified_stream(self):
+        self.server.authentic = False
+        self.server.expect(2)
+        it = self.r.stream('integers', chunk_size=10)
+        assert_raises(Exception, next, it)
+
+
+class ConcurrencyServer:
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.ids = []
+        self.lock = Lock()
+
+    def __call__(self, req):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.ids.append(req['id'])
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        return fake_post(req)
+
+
+class TestThreads:
+
+    def setup(self):
+        self.r = RandomPy(key='key', signed=False, workers=4, in_flight=6)
+        self.server = ConcurrencyServer()
+        self.patcher = patch.object(RandomAPI, '_post',
+                                    side_effect=self.server)
+        self.patcher.start()
+
+    def teardown(self):
+        self.r.close()
+        self.patcher.stop()
+
+    def test_shared_instance(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            resps = list(executor.map(
+                lambda n: self.r.integers(n, min=1, max=6), range(1, 41)))
+        assert [len(r['random']['data']) for r in resps] == \
+            list(range(1, 41))
+        assert len(set(self.server.ids)) == 40
+
+    def test_kwargs_untouched(self):
+        def f(x):
+            return x
+        kwargs = {'method': 'strings', 'number': 2,
+                  'characters': ['lower', 'digits'], 'length': 4,
+                  'successfunc': f}
+        with patch.object(RandomAPI, '_post', side_effect=f):
+            self.r.generate(**kwargs)
+        assert kwargs == {'method': 'strings', 'number': 2,
+                          'characters': ['lower', 'digits'], 'length': 4,
+                          'successfunc': f}
+
+    def test_submit(self):
+        futures = [self.r.submit('integers', 3, min=1, max=6)
+                   for _ in range(10)]
+        assert all(len(f.result()['random']['data']) == 3 for f in futures)
+        assert self.server.peak <= 4
+
+    def test_map(self):
+        resps = self.r.map('integers', range(1, 21), min=1, max=6)
+        assert [len(r['random']['data']) for r in resps] == \
+            list(range(1, 21))
+        assert self.server.peak <= 4
+
+    def test_bounded(self):
+        fanout = self.r._get_fanout()
+        resps = self.r.map('integers', range(1, 100), min=1, max=6)
+        next(resps)
+        time.sleep(0.05)
+        assert len(self.server.ids) <= fanout.in_flight + 1
+        resps.close()
+
+
+class TestVerifyLocal:
+
+    def setup(self):
+        self.r = RandomPy(key='key', verify='local')
+        self.r.public_key = 'key'
+        self.patcher = patch.object(RandomAPI, '_post', return_value={
+            'id': 1, 'result': {'authenticity': True}})
+        self.mock_post = self.patcher.start()
+        self.resp = {'result': {'random': {}, 'signature': 'sig'}}
+
+    def teardown(self):
+        self.r = None
+        self.patcher.stop()
+
+    @patch('randompy.randompy.verify_result', return_value=True)
+    def test_local(self, mock_verify):
+        assert self.r._verify_response(self.resp)
+        assert not self.mock_post.called
+
+    @patch('randompy.randompy.verify_result', return_value=False)
+    def test_rejected(self, mock_verify):
+        assert not self.r._verify_response(self.resp)
+        assert not self.mock_post.called
+
+    def test_fallback_without_key(self):
+        self.r.public_key = None
+        assert self.r._verify_response(self.resp)
+        assert self.mock_post.called
+
+    def test_no_fallback(self):
+        self.r.public_key = None
+        self.r.verify_fallback = False
+        assert not self.r._verify_response(self.resp)
+        assert not self.mock_post.called
+
+    def test_unknown_mode(self):
+        assert_raises(Exception, RandomPy, key='key', verify='psychic')
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Pool
+from nose.tools import assert_raises
+from randompy import RandomPy
+from randompy.engines import ReservoirEngine
+from randompy.reservoir import (Filler, Reservoir, ReservoirEmpty,
+                                _remote_client)
+from randompy.standin import StandInServer
+from unittest.mock import patch
+import json
+import os
+import shutil
+import tempfile
+
+
+def take_words(path, n):
+    with Reservoir(path, timeout=0) as reservoir:
+        return [reservoir.take(4) for _ in range(n)]
+
+
+def words(start, n):
+    return b''.join(i.to_bytes(4, 'big') for i in range(start, start + n))
+
+
+class TestReservoir:
+
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'reservoir')
+        self.reservoir = Reservoir(self.path, timeout=0)
+
+    def teardown(self):
+        self.reservoir.close()
+        shutil.rmtree(self.dir)
+
+    def test_take(self):
+        assert len(self.reservoir) == 0
+        assert self.reservoir.append(b'abcdef') == 0
+        assert self.reservoir.append(b'ghi') == 6
+        assert self.reservoir.take(4) == b'abcd'
+        assert len(self.reservoir) == 5
+        assert_raises(ReservoirEmpty, self.reservoir.take, 6)
+        assert self.reservoir.take(5) == b'efghi'
+
+    def test_shared(self):
+        self.reservoir.append(b'abcdef')
+        with Reservoir(self.path) as other:
+            assert other.take(2) == b'ab'
+            other.append(b'gh')
+        assert self.reservoir.take(6) == b'cdefgh'
+
+    def test_compact(self):
+        self.reservoir.append(b'abcdef')
+        self.reservoir.take(4)
+        assert self.reservoir.compact() == 4
+        assert os.path.getsize(self.path) == 64 + 2
+        assert self.reservoir.append(b'gh') == 6
+        assert self.reservoir.take(4) == b'efgh'
+        assert self.reservoir.compact() == 4
+
+    def test_crash_during_compact(self):
+        self.reservoir.append(b'abcdef')
+        self.reservoir.take(4)
+        with patch('os.ftruncate', side_effect=OSError('crash')):
+            assert_raises(OSError, self.reservoir.compact)
+        with Reservoir(self.path, timeout=0) as other:
+            assert len(other) == 0
+            assert_raises(ReservoirEmpty, other.take, 1)
+            other.compact()
+            other.append(b'gh')
+            assert other.take(2) == b'gh'
+
+    def test_not_a_reservoir(self):
+        with open(self.path + '2', 'wb') as f:
+            f.write(bytes(64))
+        assert_raises(Exception, Reservoir, self.path + '2')
+
+    def test_processes(self):
+        self.reservoir.append(words(0, 4000))
+        with Pool(4) as pool:
+            taken = pool.starmap(take_words, [(self.path, 1000)] * 4)
+        taken = [w for ws in taken for w in ws]
+        assert sorted(taken) == [words(i, 1) for i in range(4000)]
+        assert len(self.reservoir) == 0
+
+    def test_forked_child(self):
+        self.reservoir.append(words(0, 100))
+        self.reservoir.take(4)
+        pid = os.fork()
+        if pid == 0:
+            code = 0 if self.reservoir.take(4) == words(1, 1) else 1
+            os._exit(code)
+        assert os.waitpid(pid, 0)[1] == 0
+        assert self.reservoir.take(4) == words(2, 1)
+
+    def test_entropy(self):
+        self.reservoir.append(os.urandom(256))
+        e = self.reservoir.entropy(64, numpy=False)
+        assert all(1 <= x <= 6 for x in e.integers(20, 1, 6))
+        assert len(self.reservoir) < 256
+
+
+class TestReservoirEngine:
+
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'reservoir')
+
+    def teardown(self):
+        shutil.rmtree(self.dir)
+
+    def test_generate(self):
+        with Reservoir(self.path) as reservoir:
+            reservoir.append(os.urandom(1 << 16))
+        engine = ReservoirEngine(self.path, block=256, timeout=0)
+        r = RandomPy(key='key', signed=False, engine=engine)
+        resp = r.integers(100, min=1, max=6)
+        assert resp['source'] == 'reservoir'
+        assert all(1 <= x <= 6 for x in resp['random']['data'])
+        assert len(r.uuids(3)['random']['data']) == 3
+        assert len(engine.reservoir) < 1 << 16
+
+    def test_forked_child(self):
+        with Reservoir(self.path) as reservoir:
+            reservoir.append(words(0, 4096))
+        engine = ReservoirEngine(self.path, block=1024, timeout=0)
+        engine.rng.randbytes(16)
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write, engine.rng.randbytes(16))
+            os._exit(0)
+        os.waitpid(pid, 0)
+        child = os.read(read, 16)
+        os.close(read)
+        os.close(write)
+        assert child != engine.rng.randbytes(16)
+        assert child == words(256, 4)
+
+    def test_empty(self):
+        engine = ReservoirEngine(self.path, timeout=0)
+        r = RandomPy(key='key', signed=False, engine=engine)
+        assert_raises(ReservoirEmpty, r.integers, 5)
+        r.engine_fallback = True
+        assert r.integers(5)['source'] == 'local'
+
+
+class TestFiller:
+
+    def setup(self):
+        self.server = StandInServer(seed=4, bits=10 ** 9)
+        self.server.start()
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'reservoir')
+
+    def teardown(self):
+        self.server.stop()
+        shutil.rmtree(self.dir)
+
+    def filler(self, signed):
+        r = RandomPy(key='k', url=self.server.url, signed=signed)
+        return Filler(self.path, r, low=1000, high=5000, batch=2048)
+
+    def test_fill(self):
+        filler = self.filler(signed=False)
+        assert filler.fill() >= 5000
+        assert filler.fill() == 0
+        filler.reservoir.take(len(filler.reservoir) - 500)
+        filler.fill()
+        assert len(filler.reservoir) >= 5000
+        assert os.path.getsize(self.path) < 64 + 6000
+        assert not os.path.exists(self.path + '.signed')
+
+    def test_signed(self):
+        filler = self.filler(signed=True)
+        added = filler.fill()
+        with open(self.path + '.signed') as f:
+            records = [json.loads(line) for line in f]
+        assert records[0]['offset'] == 0
+        assert sum(r['size'] for r in records) == added
+        assert all('signature' in r and 'random' in r for r in records)
+
+    def test_remote_only(self):
+        rand = _remote_client({'key': 'k', 'url': self.server.url,
+                               'signed': False, 'engine': 'reservoir'})
+        assert rand.engine.name == 'remote' and not rand.engine_fallback
+        filler = Filler(self.path, rand, low=1000, high=5000, batch=2048)
+        assert filler.fill() >= 5000
+
+    def test_local_rejected(self):
+        rand = RandomPy(key='k', signed=False, engine='local')
+        filler = Filler(self.path, rand, low=1000, high=5000, batch=2048)
+        assert_raises(Exception, filler.fill)
+        assert len(filler.reservoir) == 0
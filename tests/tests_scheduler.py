@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_raises
+from randompy import QuotaExceeded, RandomAPI, Scheduler
+from randompy.scheduler import estimate_bits
+from unittest.mock import patch
+import time
+
+
+def request(method='generateIntegers', key='key', **params):
+    params.update({'apiKey': key, 'n': 10, 'min': 1, 'max': 16})
+    return {'method': method, 'id': 1, 'params': params}
+
+
+def response(bits_left=1000, requests_left=100, delay=0):
+    return {'id': 1, 'result': {'bitsLeft': bits_left,
+                                'requestsLeft': requests_left,
+                                'advisoryDelay': delay}}
+
+
+class TestEstimateBits:
+
+    def test_integers(self):
+        assert estimate_bits(request()) == 40
+
+    def test_blobs(self):
+        req = {'method': 'generateSignedBlobs',
+               'params': {'n': 3, 'size': 64}}
+        assert estimate_bits(req) == 192
+
+    def test_verify(self):
+        req = {'method': 'verifySignature', 'params': {'random': {}}}
+        assert estimate_bits(req) == 0
+
+
+class TestScheduler:
+
+    def setup(self):
+        self.s = Scheduler()
+
+    def teardown(self):
+        self.s = None
+
+    def test_unknown_quota(self):
+        assert self.s.reserve(request()) == 0.0
+
+    def test_advisory_delay(self):
+        self.s.update(request(), response(delay=1000))
+        assert 0.9 < self.s.reserve(request()) <= 1.0
+        assert self.s.reserve(request(key='other')) == 0.0
+
+    def test_concurrent_requests_spaced(self):
+        self.s.update(request(), response(delay=1000))
+        waits = [self.s.reserve(request()) for _ in range(3)]
+        assert 0.9 < waits[0] <= 1.0
+        assert 1.9 < waits[1] <= 2.0
+        assert 2.9 < waits[2] <= 3.0
+
+    def test_no_delay(self):
+        self.s.update(request(), response())
+        assert [self.s.reserve(request()) for _ in range(3)] == [0.0] * 3
+
+    def test_reject_delay(self):
+        s = Scheduler(policy='reject')
+        s.update(request(), response(delay=1000))
+        assert_raises(QuotaExceeded, s.reserve, request())
+
+    def test_bits_exhausted(self):
+        self.s.update(request(), response(bits_left=39))
+        assert_raises(QuotaExceeded, self.s.reserve, request())
+
+    def test_requests_reserved(self):
+        self.s.update(request(), response(requests_left=1))
+        self.s.reserve(request())
+        assert_raises(QuotaExceeded, self.s.reserve, request())
+
+    def test_error_codes(self):
+        self.s.update(request(), {'error': {'code': 402}})
+        assert_raises(QuotaExceeded, self.s.reserve, request())
+
+    def test_exhausted_expires(self):
+        s = Scheduler(cooldown=0.05)
+        s.update(request(), {'error': {'code': 403}})
+        assert_raises(QuotaExceeded, s.reserve, request())
+        time.sleep(0.06)
+        assert s.reserve(request()) == 0.0
+
+    def test_counted_down_expires(self):
+        s = Scheduler(cooldown=0.05)
+        s.update(request(), response(requests_left=1))
+        s.reserve(request())
+        assert_raises(QuotaExceeded, s.reserve, request())
+        time.sleep(0.06)
+        s.reserve(request())
+
+    def test_success_clears_exhausted(self):
+        self.s.update(request(), {'error': {'code': 402}})
+        self.s.update(request(), response())
+        assert self.s.reserve(request()) == 0.0
+
+    def test_shared(self):
+        assert Scheduler.shared() is Scheduler.shared()
+        assert Scheduler.shared('reject').policy == 'reject'
+
+
+class TestSchedulerCall:
+
+    def setup(self):
+        self.s = Scheduler()
+        self.api = RandomAPI('url', scheduler=self.s)
+
+    def teardown(self):
+        self.api = None
+
+    @patch.object(RandomAPI, '_post', return_value=response(bits_left=0))
+    def test_call(self, mock_post):
+        self.api.call(request())
+        assert_raises(QuotaExceeded, self.api.call, request())
+        assert mock_post.call_count == 1
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_raises
+from randompy import RandomPy
+from randompy.serializers import (JSONSerializer, RawJSON, Response,
+                                  SERIALIZERS, get_serializer, raw_member,
+                                  raw_random)
+import json
+
+
+RAW = (b'{"jsonrpc": "2.0", "result": {"note": "random\\" }", '
+       b'"other": [1, {"random": 2}], "random" : {"data": [1, 2], '
+       b'"x": "}"}, "signature": "sig"}, "id": 3}')
+
+
+class TestSerializers:
+
+    def test_roundtrip(self):
+        for name in SERIALIZERS:
+            try:
+                s = get_serializer(name)
+            except ImportError:
+                continue
+            obj = {'a': [1, 2.5, 'x'], 'b': None}
+            assert s.loads(s.dumps(obj)) == obj
+
+    def test_auto(self):
+        assert get_serializer('auto').name in SERIALIZERS
+
+    def test_unknown(self):
+        assert_raises(Exception, get_serializer, 'pickle')
+
+    def test_raw_json(self):
+        s = JSONSerializer()
+        data = s.dumps({'params': {'random': RawJSON(b'{"b" : 1, "a": 2}')}})
+        assert data == b'{"params":{"random":{"b" : 1, "a": 2}}}'
+
+
+class TestRawMember:
+
+    def test_nested(self):
+        assert raw_member(RAW, 'result', 'random') == \
+            b'{"data": [1, 2], "x": "}"}'
+
+    def test_scalar(self):
+        assert raw_member(RAW, 'id') == b'3'
+
+    def test_missing(self):
+        assert raw_member(RAW, 'result', 'missing') is None
+        assert raw_member(RAW, 'id', 'deeper') is None
+
+    def test_raw_random(self):
+        resp = Response(json.loads(RAW.decode()), RAW)
+        assert json.loads(raw_random(resp).decode()) == \
+            resp['result']['random']
+        assert raw_random({'result': {}}) is None
+
+
+class TestVerifyRequest:
+
+    def test_reuses_raw(self):
+        r = RandomPy(key='key')
+        resp = Response(json.loads(RAW.decode()), RAW)
+        _, req = r._verify_request(resp)
+        data = r.api.serializer.dumps(req)
+        assert b'"random":{"data": [1, 2], "x": "}"}' in data
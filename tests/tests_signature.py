@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from base64 import b64encode
+from randompy import signature as s
+import os
+import tempfile
+
+
+PUBLIC_PEM = b'''-----BEGIN PUBLIC KEY-----
+MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDsO1ZoMeAu/QoFsVgMIbv2Rr/D
+UTEfV4NdM+sZnElOVxZbP/Pttt2nEBYVJTiq6TwmZhtSOL/4UYk2iNF2LhfUVozk
+bsVi8T0IxzaWzoZZwgSX996KWn8SyHrr2uKqxUDiMn33eWaYlq5FUA/TeIDnGGY4
+dOSDdl83v1Kk7SZsRQIDAQAB
+-----END PUBLIC KEY-----
+'''
+
+
+PRIVATE_EXPONENT = int(
+    '616e5fc6fdbb2ee6227a1298f3f7fde4276df40acaadd8944f9e983aa9e0fa34a4fde1'
+    'b4a3b8a656bf25bc76eb966237f2c66e424d31b02340ea8327910c95baad54eddb3ed8'
+    'bd9e3f12077a5cbc7f81033f9248867e4f24476c1011baced4fffa05cac2d0b8080068'
+    '47a3910e8de592144eea23028aa5c0f83c381ab6370381', 16)
+
+
+def sign(random, key):
+    m = int.from_bytes(s.encode(s.serialize(random), key.size), 'big')
+    sig = pow(m, PRIVATE_EXPONENT, key.n).to_bytes(key.size, 'big')
+    return b64encode(sig).decode('ascii')
+
+
+class TestSignature:
+
+    def setup(self):
+        fd, self.path = tempfile.mkstemp(suffix='.pem')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(PUBLIC_PEM)
+        self.key = s.load_public_key(self.path)
+        self.random = {'method': 'generateSignedIntegers',
+                       'data': [1, 5, 3], 'serialNumber': 42}
+
+    def teardown(self):
+        os.remove(self.path)
+
+    def test_load_public_key(self):
+        assert self.key.e == 65537
+        assert self.key.size == 128
+
+    def test_verify_result(self):
+        result = {'random': self.random, 'signature': sign(self.random,
+                                                           self.key)}
+        assert s.verify_result(result, self.key)
+
+    def test_tampered(self):
+        result = {'random': self.random, 'signature': sign(self.random,
+                                                           self.key)}
+        result['random'] = dict(self.random, data=[1, 5, 4])
+        assert not s.verify_result(result, self.key)
+
+    def test_garbage_signature(self):
+        assert not s.verify(b'message', 'not base64!', self.key)
+        assert not s.verify(b'message', 'AAAA', self.key)
+
+    def test_verify_many(self):
+        good = {'random': self.random, 'signature': sign(self.random,
+                                                         self.key)}
+        bad = dict(good, signature=sign({'other': 1}, self.key))
+        results = s.verify_many([good, bad, good], self.key)
+        assert results == [True, False, True]
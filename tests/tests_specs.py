@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_raises
+from randompy.specs import SPECS
+
+
+class TestSpec:
+
+    def test_ok(self):
+        assert SPECS['integers'].ok({'n': 5, 'min': 0, 'max': 10,
+                                     'base': 10})
+        assert not SPECS['integers'].ok({'n': 5, 'base': 7})
+
+    def test_ok_ignores_missing(self):
+        assert SPECS['blobs'].ok({'n': 1})
+
+    def test_errors(self):
+        errors = SPECS['gaussians'].errors({'n': 0, 'mean': 2e6,
+                                            'significantDigits': 5})
+        assert errors == ['n=0 (allowed: 1..10000)',
+                          'mean=2000000.0 (allowed: -1e+06..1e+06)']
+
+    def test_check(self):
+        try:
+            SPECS['blobs'].check({'n': 1, 'size': 7, 'format': 'raw'})
+        except Exception as e:
+            assert 'size=7' in str(e) and 'format=' in str(e)
+        else:
+            assert False
+
+    def test_normalize(self):
+        params = SPECS['integers'].normalize({'n': '3', 'min': '1',
+                                              'max': 6.0, 'base': '10',
+                                              'replacement': 'no',
+                                              'method': 'integers'})
+        assert params == {'n': 3, 'min': 1, 'max': 6, 'base': 10,
+                          'replacement': False}
+
+    def test_normalize_errors(self):
+        assert_raises(Exception, SPECS['strings'].normalize,
+                      {'n': 1, 'length': 'long', 'characters': 'ab',
+                       'replacement': True})
+        assert_raises(Exception, SPECS['uuids'].normalize, {'n': 1001})
+
+    def test_keys(self):
+        assert SPECS['decimals'].keys == ('decimalPlaces', 'replacement')
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from randompy import AsyncRandomPy, RandomPy
+from randompy.signature import serialize, verify
+from nose.tools import assert_raises
+from randompy.standin import (BITS_EXHAUSTED, INJECTED_ERROR,
+                              INVALID_PARAMS, REQUESTS_EXHAUSTED, StandIn,
+                              StandInServer, _inverse)
+import asyncio
+import json
+
+
+def call(standin, method, **params):
+    req = {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': 1}
+    return json.loads(standin.handle(json.dumps(req).encode('utf-8')))
+
+
+class TestInverse:
+
+    def test_inverse(self):
+        assert _inverse(3, 11) == 4
+        phi = 3120
+        assert 17 * _inverse(17, phi) % phi == 1
+        assert_raises(ValueError, _inverse, 2, 4)
+
+
+class TestStandIn:
+
+    def setup(self):
+        self.standin = StandIn(seed=1, requests=2, bits=100)
+
+    def teardown(self):
+        self.standin = None
+
+    def test_signed(self):
+        resp = call(self.standin, 'generateSignedIntegers', apiKey='k', n=5,
+                    min=1, max=6, replacement=True, base=10)
+        result = resp['result']
+        assert len(result['random']['data']) == 5
+        assert result['random']['serialNumber'] == 1
+        assert 'apiKey' not in result['random']
+        assert verify(serialize(result['random']), result['signature'],
+                      self.standin.public_key)
+
+        resp = call(self.standin, 'verifySignature', random=result['random'],
+                    signature=result['signature'])
+        assert resp['result']['authenticity']
+
+        result['random']['data'][0] = 7
+        resp = call(self.standin, 'verifySignature', random=result['random'],
+                    signature=result['signature'])
+        assert not resp['result']['authenticity']
+
+    def test_quotas(self):
+        resp = call(self.standin, 'generateIntegers', apiKey='k', n=50,
+                    min=1, max=6)
+        assert resp['error']['code'] == BITS_EXHAUSTED
+        for _ in range(2):
+            assert 'result' in call(self.standin, 'generateIntegers',
+                                    apiKey='k', n=1, min=1, max=6)
+        resp = call(self.standin, 'generateIntegers', apiKey='k', n=1, min=1,
+                    max=6)
+        assert resp['error']['code'] == REQUESTS_EXHAUSTED
+        assert 'result' in call(self.standin, 'generateIntegers', apiKey='j',
+                                n=1, min=1, max=6)
+
+    def test_invalid_params(self):
+        resp = call(self.standin, 'generateBlobs', apiKey='k', n=1, size=7)
+        assert resp['error']['code'] == INVALID_PARAMS
+
+    def test_error_injection(self):
+        self.standin.error_rate = 1.0
+        resp = call(self.standin, 'generateUUIDs', apiKey='k', n=1)
+        assert resp['error']['code'] == INJECTED_ERROR
+
+
+class TestStandInServer:
+
+    def setup(self):
+        self.server = StandInServer(seed=2)
+        self.server.start()
+
+    def teardown(self):
+        self.server.stop()
+
+    def test_remote_verify(self):
+        r = RandomPy(key='k', verify='remote', url=self.server.url)
+        resp = r.integers(5, min=1, max=6)
+        assert len(resp['random']['data']) == 5
+
+    def test_local_verify(self):
+        r = RandomPy(key='k', verify='local', url=self.server.url)
+        r.public_key = self.server.public_key
+        resp = r.blobs(3, size=64, output='array')
+        assert [len(b) for b in resp['random']['data']] == [8, 8, 8]
+
+    def test_chunked(self):
+        r = RandomPy(key='k', signed=False, url=self.server.url)
+        resp = r.integers(12000, min=1, max=50000, replacement=False)
+        assert len(set(resp['random']['data'])) == 12000
+
+    def test_batch(self):
+        r = RandomPy(key='k', url=self.server.url)
+        with r.batch() as batch:
+            a = batch.uuids(2)
+            b = batch.strings(3, length=4, characters=['lower'])
+        assert len(a.result()['random']['data']) == 2
+        assert len(b.result()['random']['data']) == 3
+
+    def test_async(self):
+        async def run():
+            async with AsyncRandomPy(key='k', url=self.server.url) as r:
+                return await r.decimals(4, decimalPlaces=3)
+        resp = asyncio.run(run())
+        assert len(resp['random']['data']) == 4
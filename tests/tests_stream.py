@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from itertools import count, islice
+from nose.tools import assert_raises
+from randompy import AsyncRandomAPI, AsyncRandomPy, RandomAPI, RandomPy
+from randompy.stream import ChunkFetcher
+from unittest.mock import patch
+import asyncio
+
+
+class FakeServer:
+
+    def __init__(self, requests_left=100, delay=0):
+        self.counter = count()
+        self.requests_left = requests_left
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, req):
+        self.calls += 1
+        self.requests_left -= 1
+        n = req['params']['n']
+        return {'jsonrpc': '2.0', 'id': req['id'], 'result': {
+            'random': {'data': [next(self.counter) for _ in range(n)]},
+            'bitsUsed': n, 'bitsLeft': 1000,
+            'requestsLeft': self.requests_left,
+            'advisoryDelay': self.delay}}
+
+
+class TestStream:
+
+    def setup(self):
+        self.r = RandomPy(key='key', signed=False)
+        self.server = FakeServer()
+        self.patcher = patch.object(RandomAPI, '_post',
+                                    side_effect=self.server)
+        self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.r = None
+
+    def test_lazy(self):
+        values = list(islice(self.r.stream('integers', chunk_size=4), 6))
+        assert values == list(range(6))
+        assert self.server.calls == 2
+
+    def test_prefetch(self):
+        it = self.r.stream('integers', chunk_size=4, prefetch=True)
+        assert list(islice(it, 5)) == list(range(5))
+        it.close()
+        assert self.server.calls >= 2
+
+    def test_stops_when_requests_run_out(self):
+        self.server.requests_left = 3
+        values = list(self.r.stream('integers', chunk_size=2))
+        assert values == list(range(6))
+
+    def test_error(self):
+        self.patcher.stop()
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=lambda
+                                    req: {'id': req['id'],
+                                          'error': {'code': 402}})
+        self.patcher.start()
+        assert_raises(Exception, next, self.r.stream('integers'))
+
+
+class TestChunkFetcher:
+
+    def test_advisory_delay(self):
+        fetch = ChunkFetcher(None, 'integers')
+        fetch.update({'random': {'data': []}, 'advisoryDelay': 500})
+        assert 0.4 < fetch.wait_time() <= 0.5
+        assert fetch.chunk_size == 10000
+
+    def test_bits_exhausted(self):
+        fetch = ChunkFetcher(None, 'blobs')
+        fetch.update({'random': {'data': []}, 'bitsUsed': 100,
+                      'bitsLeft': 50})
+        assert fetch.exhausted
+        assert fetch() is None
+
+
+class TestAsyncStream:
+
+    def setup(self):
+        self.loop = asyncio.new_event_loop()
+        self.r = AsyncRandomPy(key='key', signed=False)
+        self.server = FakeServer(requests_left=3)
+        self.patcher = patch.object(AsyncRandomAPI, '_post',
+                                    side_effect=self.server)
+        self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.loop.close()
+        self.r = None
+
+    def collect(self, it):
+        async def run():
+            return [x async for x in it]
+        return self.loop.run_until_complete(run())
+
+    def test_stream(self):
+        assert self.collect(self.r.stream('uuids', chunk_size=2)) == \
+            list(range(6))
+
+    def test_prefetch(self):
+        assert self.collect(self.r.stream('uuids', chunk_size=2,
+                                          prefetch=True)) == list(range(6))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from base64 import b64encode
+from nose.tools import assert_raises
+from randompy import AsyncRandomAPI, AsyncRandomPy, RandomAPI, RandomPy
+from randompy.transforms import Entropy, _numpy, _poisson_table
+from unittest import SkipTest
+from unittest.mock import patch
+import asyncio
+import os
+
+
+def blob_post(req):
+    params = req['params']
+    blob = b64encode(os.urandom(params['size'] // 8)).decode('ascii')
+    return {'jsonrpc': '2.0', 'id': req['id'], 'result': {
+        'random': {'data': [blob] * params['n']},
+        'bitsUsed': params['n'] * params['size']}}
+
+
+def mean(values):
+    values = list(values)
+    return sum(values) / len(values)
+
+
+class TestEntropy:
+
+    numpy = False
+
+    def entropy(self, data=None, refill=None):
+        if data is None:
+            data = os.urandom(1 << 20)
+        return Entropy(data, refill=refill, numpy=self.numpy)
+
+    def test_integers_rejection(self):
+        e = self.entropy(bytes([3, 0, 7, 1, 2]) + bytes(7))
+        assert list(e.integers(3, 0, 2)) == [0, 1, 2]
+        assert len(e) == 0
+
+    def test_no_integers(self):
+        assert len(self.entropy().integers(0, 1, 6)) == 0
+
+    def test_integers(self):
+        values = list(self.entropy().integers(60000, -3, 2))
+        assert min(values) == -3 and max(values) == 2
+        for v in range(-3, 3):
+            assert 9000 < values.count(v) < 11000
+
+    def test_wide_integers(self):
+        values = list(self.entropy().integers(100, 0, 2 ** 64 - 1))
+        assert len(values) == 100
+        assert max(values) > 2 ** 63
+
+    def test_floats(self):
+        assert list(self.entropy(b'\xff' * 8).floats(1)) == [1 - 2 ** -53]
+        values = self.entropy().floats(10000)
+        assert all(0 <= x < 1 for x in values)
+        assert 0.48 < mean(values) < 0.52
+
+    def test_gaussians(self):
+        values = list(self.entropy().gaussians(20001, 1e7, 50.0))
+        assert len(values) == 20001
+        m = mean(values)
+        assert abs(m - 1e7) < 2
+        sd = mean((x - m) ** 2 for x in values) ** 0.5
+        assert 48 < sd < 52
+
+    def test_exponential(self):
+        assert 0.24 < mean(self.entropy().exponential(20000, 4.0)) < 0.26
+
+    def test_poisson(self):
+        assert 3.4 < mean(self.entropy().poisson(20000, 3.5)) < 3.6
+        assert abs(mean(self.entropy().poisson(2000, 1e6)) - 1e6) < 100
+
+    def test_shuffle(self):
+        items = list(range(100))
+        shuffled = self.entropy().shuffle(items)
+        assert sorted(shuffled) == items
+        assert shuffled != items
+
+    def test_choice(self):
+        picks = self.entropy().choice('abc', 3000, weights=[1, 0, 3])
+        assert 'b' not in picks
+        assert 600 < picks.count('a') < 900
+        picks = self.entropy().choice('abc', 3000)
+        assert set(picks) == {'a', 'b', 'c'}
+        assert_raises(Exception, self.entropy().choice, 'abc', 1, [1, 2])
+
+    def test_exhausted(self):
+        e = self.entropy(bytes(4))
+        assert_raises(Exception, e.floats, 1)
+
+    def test_refill(self):
+        calls = []
+
+        def refill():
+            calls.append(1)
+            return os.urandom(16)
+
+        e = self.entropy(bytes(4), refill=refill)
+        assert len(e.floats(4)) == 4
+        assert len(calls) == 2
+        assert len(e) == 4
+
+
+class TestEntropyNumpy(TestEntropy):
+
+    numpy = True
+
+    def setup(self):
+        if _numpy() is None:
+            raise SkipTest('numpy is not installed')
+
+
+class TestPoissonTable:
+
+    def test_sums_to_one(self):
+        low, cdf = _poisson_table(2.0)
+        assert low == 0
+        assert abs(cdf[0] - 0.1353352832) < 1e-9
+        assert cdf[-1] == 1.0
+
+    def test_invalid(self):
+        assert_raises(Exception, _poisson_table, 0)
+
+
+class TestRandomPyEntropy:
+
+    def setup(self):
+        self.r = RandomPy(key='key', signed=False)
+        self.patcher = patch.object(RandomAPI, '_post', side_effect=blob_post)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.r = None
+        self.patcher.stop()
+
+    def test_entropy(self):
+        e = self.r.entropy(1 << 20, numpy=False)
+        assert len(e) == 1 << 20
+        params = self.mock_post.call_args[0][0]['params']
+        assert params['n'] == 8 and params['size'] == 1048576
+        e.take(len(e))
+        assert len(e.integers(10, 1, 6)) == 10
+        assert self.mock_post.call_count == 2
+
+    def test_small(self):
+        e = self.r.entropy(1000, refill=False, numpy=False)
+        assert len(e) == 1000
+        e.take(1000)
+        assert_raises(Exception, e.take, 1)
+
+
+class TestAsyncRandomPyEntropy:
+
+    def setup(self):
+        self.loop = asyncio.new_event_loop()
+        self.r = AsyncRandomPy(key='key', signed=False)
+        self.patcher = patch.object(AsyncRandomAPI, '_post',
+                                    side_effect=blob_post)
+        self.mock_post = self.patcher.start()
+
+    def teardown(self):
+        self.patcher.stop()
+        self.loop.close()
+        self.r = None
+
+    def test_entropy(self):
+        e = self.loop.run_until_complete(self.r.entropy(1000, numpy=False))
+        assert len(e) == 1000
+        assert len(e.integers(10, 1, 6)) == 10
+        assert e.refill is None